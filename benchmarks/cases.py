@@ -0,0 +1,153 @@
+"""Benchmark cases for the adapter, CLI and snapshot hot paths"""
+import os
+import shutil
+
+from benchmarks.harness import Fixture, benchmark, run_python
+
+from src.db.checksum import file_digest
+from src.db.snapshot_manager import SnapshotManager
+from src.db.sqlite_adapter import SQLiteAdapter
+
+LARGE_QUERY = "SELECT * FROM users"
+
+# CLI cases spawn an interpreter per call; fewer repeats keep the suite short
+CLI_REPEAT = 3
+
+
+def _adapter(fixture: Fixture, name: str) -> SQLiteAdapter:
+    """Connected adapter with its own metadata cache, so cases do not share cached state"""
+    return SQLiteAdapter(str(fixture.db_path), cache_dir=str(fixture.path(f"cache-{name}"))).connect()
+
+
+def _row_count(adapter: SQLiteAdapter, table: str = 'users') -> int:
+    return adapter.get_row_count(table, 'exact')[0]
+
+
+def _megabytes(path) -> float:
+    return os.path.getsize(path) / (1024 * 1024)
+
+
+# ----------------------------------------
+# Adapter
+# ----------------------------------------
+
+@benchmark('schema.full_exact', group='adapter')
+def schema_full_exact(fixture):
+    db = _adapter(fixture, 'schema-exact')
+    return lambda: db.get_full_schema(count_mode='exact'), None
+
+
+@benchmark('schema.full_estimate', group='adapter')
+def schema_full_estimate(fixture):
+    db = _adapter(fixture, 'schema-estimate')
+    return lambda: db.get_full_schema(count_mode='estimate'), None
+
+
+@benchmark('schema.full_cached', group='adapter')
+def schema_full_cached(fixture):
+    db = _adapter(fixture, 'schema-cached')
+    return lambda: db.get_full_schema(count_mode='cached', use_cache=True), None
+
+
+@benchmark('query.execute_query', group='adapter')
+def query_execute_query(fixture):
+    db = _adapter(fixture, 'query')
+    return lambda: db.execute_query(LARGE_QUERY), (_row_count(db), 'rows')
+
+
+@benchmark('query.batches', group='adapter')
+def query_batches(fixture):
+    db = _adapter(fixture, 'batches')
+
+    def run():
+        for _ in db.execute_query_batches(LARGE_QUERY, batch_size=10000):
+            pass
+    return run, (_row_count(db), 'rows')
+
+
+@benchmark('query.columnar', group='adapter')
+def query_columnar(fixture):
+    db = _adapter(fixture, 'columnar')
+    return lambda: db.execute_query_columnar(LARGE_QUERY), (_row_count(db), 'rows')
+
+
+# ----------------------------------------
+# CLI latency (fresh interpreter per call)
+# ----------------------------------------
+
+def _cli_env(fixture: Fixture, name: str) -> dict:
+    return {**os.environ, 'DB_AGENT_CACHE_DIR': str(fixture.path(f"cache-{name}"))}
+
+
+@benchmark('cli.python_startup', group='cli', repeat=CLI_REPEAT)
+def cli_python_startup(fixture):
+    # Interpreter startup alone; subtract from the other cli.* timings
+    return lambda: run_python('-c', 'pass'), None
+
+
+@benchmark('cli.import', group='cli', repeat=CLI_REPEAT)
+def cli_import(fixture):
+    return lambda: run_python('-c', 'import src.cli.main'), None
+
+
+@benchmark('cli.info', group='cli', repeat=CLI_REPEAT)
+def cli_info(fixture):
+    env = _cli_env(fixture, 'cli-info')
+    return lambda: run_python('src/cli/main.py', 'info', str(fixture.db_path), env=env), None
+
+
+@benchmark('cli.info_estimate', group='cli', repeat=CLI_REPEAT)
+def cli_info_estimate(fixture):
+    env = _cli_env(fixture, 'cli-info-estimate')
+    return lambda: run_python('src/cli/main.py', 'info', str(fixture.db_path), '--counts', 'estimate', env=env), None
+
+
+@benchmark('cli.schema', group='cli', repeat=CLI_REPEAT)
+def cli_schema(fixture):
+    env = _cli_env(fixture, 'cli-schema')
+    return lambda: run_python('src/cli/main.py', 'schema', str(fixture.db_path), env=env), None
+
+
+# ----------------------------------------
+# Snapshots
+# ----------------------------------------
+
+def _snapshot_manager(fixture: Fixture, name: str, **options) -> SnapshotManager:
+    """Manager over a private copy of the fixture, so restores never touch the shared database"""
+    db_path = fixture.path(f"{name}/db.sqlite")
+    if not db_path.exists():
+        shutil.copyfile(fixture.db_path, db_path)
+    return SnapshotManager(str(db_path), snapshots_dir=str(fixture.path(f"{name}/snapshots")), **options)
+
+
+def _create_case(storage: str):
+    def case(fixture):
+        manager = _snapshot_manager(fixture, f"create-{storage}", storage=storage)
+
+        def run():
+            snapshot_id = manager.create_snapshot("benchmark")
+            manager.delete_snapshot(snapshot_id)
+        return run, (_megabytes(manager.db_path), 'MB')
+    return case
+
+
+for _storage in ('file', 'chunked', 'compressed'):
+    benchmark(f'snapshot.create_{_storage}', group='snapshot')(_create_case(_storage))
+
+
+@benchmark('snapshot.restore', group='snapshot')
+def snapshot_restore(fixture):
+    manager = _snapshot_manager(fixture, 'restore')
+    snapshot_id = manager.create_snapshot("benchmark")
+    return (lambda: manager.restore_snapshot(snapshot_id, snapshot_current=False),
+            (_megabytes(manager.db_path), 'MB'))
+
+
+def _checksum_case(algorithm: str):
+    def case(fixture):
+        return lambda: file_digest(fixture.db_path, algorithm), (_megabytes(fixture.db_path), 'MB')
+    return case
+
+
+for _algorithm in ('sha256', 'blake2b', 'sha256-tree'):
+    benchmark(f'checksum.{_algorithm}', group='snapshot')(_checksum_case(_algorithm))
@@ -0,0 +1,197 @@
+"""Timing, fixtures, JSON history and baseline comparison for the benchmark suite"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = ROOT / "benchmarks"
+RESULTS_DIR = BENCH_DIR / "results"
+HISTORY_FILE = RESULTS_DIR / "history.jsonl"
+BASELINE_FILE = RESULTS_DIR / "baseline.json"
+# Generated databases, reused across runs with the same generator version, scale and seed
+FIXTURE_DIR = BENCH_DIR / ".data"
+
+DEFAULT_SCALE = 100.0
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 5
+
+# A benchmark regresses when its median is this fraction slower than the baseline's...
+DEFAULT_THRESHOLD = 0.10
+# ...and by at least this many seconds; smaller differences are timer and scheduler noise
+NOISE_FLOOR = 0.002
+
+# A case returns the callable to time and, optionally, the amount of work it does per call
+# as (amount, unit), e.g. (rows, 'rows') or (bytes, 'MB'), to report throughput
+Case = Callable[['Fixture'], Tuple[Callable[[], Any], Optional[Tuple[float, str]]]]
+
+BENCHMARKS: Dict[str, Dict[str, Any]] = {}
+
+
+def benchmark(name: str, group: str, repeat: Optional[int] = None):
+    """Register a case under ``name``; ``repeat`` overrides the run's repeat count"""
+    def register(case: Case) -> Case:
+        BENCHMARKS[name] = {'name': name, 'group': group, 'case': case, 'repeat': repeat}
+        return case
+    return register
+
+
+class Fixture:
+    """A generated database and a scratch directory shared by the cases of one run"""
+
+    def __init__(self, db_path: Path, scratch: Path, scale: float, seed: int):
+        self.db_path = db_path
+        self.scratch = scratch
+        self.scale = scale
+        self.seed = seed
+
+    def path(self, name: str) -> Path:
+        """Fresh path in the scratch directory"""
+        path = self.scratch / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+def fixture_database(scale: float, seed: int) -> Path:
+    """Database from scripts/generate_messy_db.py at ``scale``, generated on first use by each generator version"""
+    if str(ROOT / "scripts") not in sys.path:
+        sys.path.insert(0, str(ROOT / "scripts"))
+    from generate_messy_db import GENERATOR_VERSION, create_messy_database
+
+    db_path = FIXTURE_DIR / f"messy-v{GENERATOR_VERSION}-s{scale:g}-seed{seed}.db"
+    if not db_path.exists():
+        FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+        partial = db_path.with_suffix(".partial")
+        create_messy_database(str(partial), scale=scale, seed=seed, quiet=True)
+        partial.replace(db_path)
+    return db_path
+
+
+def measure(run: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    """Wall-clock seconds of ``repeat`` calls after ``warmup`` untimed ones"""
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def run_python(*args: str, env: Optional[Dict[str, str]] = None):
+    """Run the interpreter in a subprocess from the repository root; used to time CLI startup"""
+    subprocess.run([sys.executable, *args], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_benchmarks(fixture: Fixture, names: List[str], repeat: int = DEFAULT_REPEAT,
+                   progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Time the given registered cases.
+
+    Returns:
+        {name: {'group', 'repeat', 'median', 'min', 'max', 'times', 'throughput', 'throughput_unit'}}
+    """
+    results = {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        if progress:
+            progress(name)
+        run, work = spec['case'](fixture)
+        times = measure(run, spec['repeat'] or repeat)
+        median = statistics.median(times)
+        results[name] = {
+            'group': spec['group'],
+            'repeat': len(times),
+            'median': median,
+            'min': min(times),
+            'max': max(times),
+            'times': times,
+            'throughput': work[0] / median if work and median else None,
+            'throughput_unit': f"{work[1]}/s" if work else None
+        }
+    return results
+
+
+def run_record(results: Dict[str, Any], scale: float, seed: int) -> Dict[str, Any]:
+    """One history entry: the results plus what they were measured on"""
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.node(),
+        'scale': scale,
+        'seed': seed,
+        'results': results
+    }
+
+
+def append_history(record: Dict[str, Any], history_file: Path = HISTORY_FILE):
+    """Append a run to the JSON Lines history (one run per line)"""
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_file, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_history(history_file: Path = HISTORY_FILE) -> List[Dict[str, Any]]:
+    if not history_file.exists():
+        return []
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_baseline(record: Dict[str, Any], baseline_file: Path = BASELINE_FILE):
+    baseline_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(baseline_file, 'w') as f:
+        json.dump(record, f, indent=2)
+
+
+def load_baseline(baseline_file: Path = BASELINE_FILE) -> Optional[Dict[str, Any]]:
+    if not baseline_file.exists():
+        return None
+    with open(baseline_file) as f:
+        return json.load(f)
+
+
+def compare(record: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Median of each benchmark against the baseline.
+
+    Returns:
+        [{'name', 'baseline', 'current', 'change', 'status'}]; status is
+        'regression', 'improvement', 'unchanged' or 'new' (not in the baseline)
+    """
+    rows = []
+    for name, result in record['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            rows.append({'name': name, 'baseline': None, 'current': result['median'],
+                         'change': None, 'status': 'new'})
+            continue
+        change = result['median'] / before['median'] - 1 if before['median'] else 0.0
+        status = 'unchanged'
+        if abs(result['median'] - before['median']) >= NOISE_FLOOR:
+            if change > threshold:
+                status = 'regression'
+            elif change < -threshold:
+                status = 'improvement'
+        rows.append({'name': name, 'baseline': before['median'], 'current': result['median'],
+                     'change': change, 'status': status})
+    return rows
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
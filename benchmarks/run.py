@@ -0,0 +1,114 @@
+"""
+Run the benchmark suite, append the results to the JSON history and compare them with the baseline.
+
+    python benchmarks/run.py                      # all benchmarks at the default scale
+    python benchmarks/run.py -k schema -k cli     # only names containing 'schema' or 'cli'
+    python benchmarks/run.py --save-baseline      # make this run the new baseline
+    python benchmarks/run.py --list
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+# Make benchmarks and src importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks import cases  # noqa: F401 (registers the cases)
+from benchmarks.harness import (BASELINE_FILE, BENCHMARKS, DEFAULT_REPEAT, DEFAULT_SCALE, DEFAULT_SEED,
+                                DEFAULT_THRESHOLD, HISTORY_FILE, Fixture, append_history, compare,
+                                fixture_database, load_baseline, run_benchmarks, run_record, save_baseline)
+
+console = Console()
+
+STATUS_STYLES = {'regression': 'red', 'improvement': 'green', 'unchanged': 'dim', 'new': 'cyan'}
+
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:,.1f} ms" if seconds < 1 else f"{seconds:,.2f} s"
+
+
+def _report(record, comparison):
+    by_name = {row['name']: row for row in comparison}
+    table = Table(title=f"Benchmarks (scale {record['scale']:g}, commit {record['commit'] or '?'})")
+    table.add_column("Benchmark", style="cyan")
+    table.add_column("Median", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Throughput", justify="right")
+    table.add_column("vs baseline", justify="right")
+    for name, result in record['results'].items():
+        throughput = f"{result['throughput']:,.0f} {result['throughput_unit']}" if result['throughput'] else ""
+        row = by_name.get(name)
+        change = ""
+        if row and row['change'] is not None:
+            style = STATUS_STYLES[row['status']]
+            change = f"[{style}]{row['change']:+.1%}[/{style}]"
+        elif row:
+            change = "[cyan]new[/cyan]"
+        table.add_row(name, _format_seconds(result['median']), _format_seconds(result['min']), throughput, change)
+    console.print(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the adapter, CLI and snapshot hot paths")
+    parser.add_argument('-k', '--filter', action='append', default=[], metavar='TEXT',
+                        help="only run benchmarks whose name contains TEXT (repeatable)")
+    parser.add_argument('--scale', type=float, default=DEFAULT_SCALE,
+                        help="generate_messy_db.py scale of the fixture database")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed calls per benchmark")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown of the median, as a fraction, that counts as a regression")
+    parser.add_argument('--history', type=Path, default=HISTORY_FILE)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--no-history', action='store_true', help="do not append this run to the history")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or any(text in name for text in args.filter)]
+    if args.list:
+        for name in names:
+            console.print(f"{BENCHMARKS[name]['group']:<10} {name}")
+        return 0
+    if not names:
+        console.print("[red]✗ No benchmarks match the filter[/red]")
+        return 2
+
+    with console.status(f"[bold green]Preparing fixture database (scale {args.scale:g})..."):
+        db_path = fixture_database(args.scale, args.seed)
+    with tempfile.TemporaryDirectory(prefix="db-agent-bench-") as scratch:
+        fixture = Fixture(db_path, Path(scratch), args.scale, args.seed)
+        with console.status("[bold green]Running...") as status:
+            results = run_benchmarks(fixture, names, args.repeat,
+                                     progress=lambda name: status.update(f"[bold green]Running {name}..."))
+
+    record = run_record(results, args.scale, args.seed)
+    baseline = load_baseline(args.baseline)
+    comparison = []
+    if baseline is not None:
+        if (baseline['scale'], baseline['seed']) != (args.scale, args.seed):
+            console.print(f"[yellow]Baseline was measured at scale {baseline['scale']:g}, seed "
+                          f"{baseline['seed']}; not comparing[/yellow]")
+        else:
+            comparison = compare(record, baseline, args.threshold)
+    _report(record, comparison)
+
+    if not args.no_history:
+        append_history(record, args.history)
+    if args.save_baseline:
+        save_baseline(record, args.baseline)
+        console.print(f"[green]✓ Saved baseline: {args.baseline}[/green]")
+
+    regressions = [row for row in comparison if row['status'] == 'regression']
+    for row in regressions:
+        console.print(f"[red]✗ {row['name']}: {_format_seconds(row['baseline'])} → "
+                      f"{_format_seconds(row['current'])} ({row['change']:+.1%})[/red]")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
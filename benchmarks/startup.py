@@ -0,0 +1,105 @@
+"""
+Startup budget for the CLI: import time per command, measured with ``-X importtime``.
+
+Each command is run as ``python -X importtime -m src.cli COMMAND --help``,
+which imports the group and the command's module but touches no database.
+A command fails when its import time (best of --repeat runs) is over its
+budget, or when it imports a module it must not (e.g. numpy for info).
+Exits 1 on any failure, so it can gate CI. tests/test_startup.py checks the
+info and schema imports with the test suite; their time budgets run only with
+DB_AGENT_STARTUP_BUDGET=1 (DB_AGENT_STARTUP_SLACK sets the slack).
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --slack 1.5   # slower machine: allow 50% more
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Import time budget per command, in milliseconds. info and schema are the
+# ones called from cron and shell loops; they pay for click and the adapter
+# only (rich is imported when a table is rendered).
+BUDGETS_MS = {
+    'info': 120,
+    'schema': 120,
+    'fleet': 250,
+    'fk-check': 250,
+    'fix': 250,
+    'diff': 250,
+    'scan': 350,
+    'dedupe': 350,
+    'serve': 250,
+    'export': 450,
+    'profile': 450,
+}
+
+# Heavy modules no metadata command may import (directly or through the adapter)
+HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'chromadb', 'onnxruntime', 'anthropic', 'openai',
+                 'opentelemetry', 'torch', 'asyncio')
+LIGHT_COMMANDS = ('info', 'schema', 'fleet', 'fk-check', 'fix', 'diff')
+
+DEFAULT_REPEAT = 5
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_profile(command: str) -> Tuple[float, List[str]]:
+    """(total import ms, imported module names) of one ``COMMAND --help`` run"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'src.cli', command, '--help'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    total_us, modules = 0, []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, _, _, module = match.groups()
+        total_us += int(self_us)
+        modules.append(module)
+    return total_us / 1000, modules
+
+
+def check(commands: List[str], repeat: int, slack: float) -> List[Dict]:
+    """
+    Measure each command against its budget.
+
+    Returns:
+        [{'command', 'ms', 'budget_ms', 'heavy', 'ok'}]
+    """
+    rows = []
+    for command in commands:
+        runs = [import_profile(command) for _ in range(repeat)]
+        ms = min(total for total, _ in runs)
+        imported = {module.split('.')[0] for module in runs[0][1]}
+        heavy = sorted(imported & set(HEAVY_MODULES)) if command in LIGHT_COMMANDS else []
+        budget = BUDGETS_MS[command] * slack
+        rows.append({'command': command, 'ms': round(ms, 1), 'budget_ms': round(budget, 1),
+                     'heavy': heavy, 'ok': ms <= budget and not heavy})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check CLI import time against per-command budgets")
+    parser.add_argument('commands', nargs='*', help="commands to check (default: all)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="runs per command; the fastest counts")
+    parser.add_argument('--slack', type=float, default=1.0, help="multiply every budget by this factor")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.commands) - set(BUDGETS_MS)
+    if unknown:
+        parser.error(f"no budget for: {', '.join(sorted(unknown))}")
+
+    rows = check(args.commands or list(BUDGETS_MS), args.repeat, args.slack)
+    for row in rows:
+        status = "ok" if row['ok'] else "FAIL"
+        heavy = f"  imports {', '.join(row['heavy'])}" if row['heavy'] else ""
+        print(f"{status:<5} {row['command']:<10} {row['ms']:>7.1f} ms  (budget {row['budget_ms']:.0f} ms){heavy}")
+    return 0 if all(row['ok'] for row in rows) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
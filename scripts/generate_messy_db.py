@@ -1,26 +1,128 @@
 """Generate a messy demo database for testing"""
+import argparse
 import sqlite3
+import time
 from faker import Faker
-import random
+import numpy as np
 from pathlib import Path
 
 fake = Faker()
 
-def create_messy_database(db_path='data/messy_demo.db'):
-    """Generate a realistic messy database"""
-    
+# Row counts at scale=1.0; everything scales linearly
+BASE_USERS = 1000
+BASE_PRODUCTS = 100
+BASE_ORDERS = 500
+
+# Injected issue rates, as a fraction of the clean rows of the affected table.
+# The defaults reproduce the original fixture: 50 exact and 50 case-variant
+# duplicate users, 20 NULL emails, 30 orphaned orders, 10 negative prices and
+# 10 future dates at scale 1.
+DEFAULT_ISSUE_RATES = {
+    'exact_duplicates': 0.05,
+    'case_duplicates': 0.05,
+    'null_emails': 0.02,
+    'orphaned_orders': 0.06,
+    'negative_prices': 0.10,
+    'future_dates': 0.01,
+}
+
+# Distinct Faker values generated up front; rows sample from these pools
+POOL_SIZE = 2000
+
+# Bumped whenever the same arguments start producing different data, so cached
+# fixtures (benchmarks/.data) named after it are regenerated
+GENERATOR_VERSION = 2
+
+# "Now" of seeded runs: timestamps are anchored here rather than on the clock, so a
+# seed reproduces the same database on any day. Unseeded runs use the current time.
+SEEDED_NOW = '2025-06-15T12:00:00'
+
+USER_STATUSES = ['active', 'inactive', 'pending']
+ORDER_STATUSES = ['pending', 'completed', 'cancelled']
+
+# Build-time settings: no rollback journal, no fsync, exclusive access
+BUILD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MiB
+]
+
+
+def _build_pools(seed):
+    """Generate value pools with Faker once; per-row work is NumPy indexing"""
+    if seed is not None:
+        Faker.seed(seed)
+    return {
+        'first_names': np.array([fake.first_name() for _ in range(POOL_SIZE)], dtype=object),
+        'last_names': np.array([fake.last_name() for _ in range(POOL_SIZE)], dtype=object),
+        'domains': np.array([fake.free_email_domain() for _ in range(POOL_SIZE // 10)], dtype=object),
+        'phones': np.array([fake.phone_number() for _ in range(POOL_SIZE)], dtype=object),
+        'product_names': np.array([fake.catch_phrase() for _ in range(POOL_SIZE)], dtype=object),
+    }
+
+
+def _random_timestamps(rng, start, end, size):
+    """ISO timestamps uniformly between two dates, formatted by NumPy rather than per-row datetime calls"""
+    start = np.datetime64(start, 's')
+    span = max(1, int((np.datetime64(end, 's') - start) / np.timedelta64(1, 's')))
+    return (start + rng.integers(0, span, size=size).astype('timedelta64[s]')).astype(str)
+
+
+def _batches(total, batch_size):
+    """(first_id, size) pairs covering 1..total"""
+    for offset in range(0, total, batch_size):
+        yield offset + 1, min(batch_size, total - offset)
+
+
+def _mark(c, ids):
+    """Load picked ids into the _picked temp table for set-based UPDATE/INSERT ... SELECT"""
+    c.execute('DELETE FROM _picked')
+    c.executemany('INSERT INTO _picked (id) VALUES (?)', ((int(i),) for i in ids))
+
+
+def create_messy_database(db_path='data/messy_demo.db', scale=1.0, seed=None, issue_rates=None,
+                          batch_size=100_000, quiet=False, today=None):
+    """
+    Generate a realistic messy database.
+
+    Args:
+        db_path: Where to write the database (replaced if it exists)
+        scale: Multiplier on BASE_USERS/BASE_PRODUCTS/BASE_ORDERS; 10_000 gives ~15M rows
+        seed: Seed for Faker and NumPy, for reproducible fixtures
+        issue_rates: Overrides for DEFAULT_ISSUE_RATES
+        batch_size: Rows per executemany call
+        quiet: Skip progress output and the issue summary
+        today: ISO date or time clean dates end at (default: SEEDED_NOW with a seed, else the current time)
+    """
+    log = (lambda *args: None) if quiet else print
+    rates = {**DEFAULT_ISSUE_RATES, **(issue_rates or {})}
+    unknown = set(rates) - set(DEFAULT_ISSUE_RATES)
+    if unknown:
+        raise ValueError(f"Unknown issue rates: {sorted(unknown)}")
+
+    n_users = max(1, int(BASE_USERS * scale))
+    n_products = max(1, int(BASE_PRODUCTS * scale))
+    n_orders = max(1, int(BASE_ORDERS * scale))
+
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
     # Ensure data directory exists
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-    
+
     # Remove existing database
     if Path(db_path).exists():
         Path(db_path).unlink()
-    
+
     conn = sqlite3.connect(db_path)
     c = conn.cursor()
-    
-    print("Creating schema...")
-    
+    for pragma in BUILD_PRAGMAS:
+        c.execute(pragma)
+
+    log("Creating schema...")
+
     # Create tables
     c.executescript('''
         CREATE TABLE users (
@@ -32,7 +134,7 @@ def create_messy_database(db_path='data/messy_demo.db'):
             created_at TEXT,
             status TEXT
         );
-        
+
         CREATE TABLE orders (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
@@ -41,142 +143,213 @@ def create_messy_database(db_path='data/messy_demo.db'):
             created_at TEXT,
             FOREIGN KEY (user_id) REFERENCES users(id)
         );
-        
+
         CREATE TABLE products (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
             price REAL,
             stock INTEGER
         );
+
+        CREATE TEMP TABLE _picked (id INTEGER PRIMARY KEY);
     ''')
-    
-    print("Generating clean data...")
-    
-    # Generate clean users
-    users = []
-    for i in range(1000):
-        users.append((
-            fake.email(),
-            fake.first_name(),
-            fake.last_name(),
-            fake.phone_number(),
-            fake.date_time_this_year().isoformat(),
-            random.choice(['active', 'inactive', 'pending'])
+
+    log(f"Generating clean data ({n_users:,} users, {n_products:,} products, {n_orders:,} orders)...")
+    pools = _build_pools(seed)
+    if today is None:
+        today = SEEDED_NOW if seed is not None else np.datetime64('now', 's')
+    now = np.datetime64(today, 's')
+    year_start = f"{np.datetime64(now, 'Y')}-01-01"
+    month_start = f"{np.datetime64(now, 'M')}-01"
+    now = str(now)
+
+    # Generate clean users; the id in the email keeps clean rows unique
+    for first_id, size in _batches(n_users, batch_size):
+        first = pools['first_names'][rng.integers(0, POOL_SIZE, size)]
+        last = pools['last_names'][rng.integers(0, POOL_SIZE, size)]
+        domains = pools['domains'][rng.integers(0, len(pools['domains']), size)]
+        emails = [
+            f"{f}.{l}.{i}@{d}".lower()
+            for f, l, i, d in zip(first, last, range(first_id, first_id + size), domains)
+        ]
+        c.executemany('''
+            INSERT INTO users (email, first_name, last_name, phone, created_at, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', zip(
+            emails,
+            first.tolist(),
+            last.tolist(),
+            pools['phones'][rng.integers(0, POOL_SIZE, size)].tolist(),
+            _random_timestamps(rng, year_start, now, size).tolist(),
+            np.array(USER_STATUSES, dtype=object)[rng.integers(0, len(USER_STATUSES), size)].tolist(),
         ))
-    
-    c.executemany('''
-        INSERT INTO users (email, first_name, last_name, phone, created_at, status)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', users)
-    
+
     # Generate products
-    for _ in range(100):
-        c.execute('''
+    for _, size in _batches(n_products, batch_size):
+        c.executemany('''
             INSERT INTO products (name, price, stock)
             VALUES (?, ?, ?)
-        ''', (fake.catch_phrase(), round(random.uniform(9.99, 999.99), 2), random.randint(0, 100)))
-    
+        ''', zip(
+            pools['product_names'][rng.integers(0, POOL_SIZE, size)].tolist(),
+            np.round(rng.uniform(9.99, 999.99, size), 2).tolist(),
+            rng.integers(0, 101, size).tolist(),
+        ))
+
     # Generate orders
-    for _ in range(500):
-        c.execute('''
+    for _, size in _batches(n_orders, batch_size):
+        c.executemany('''
             INSERT INTO orders (user_id, amount, status, created_at)
             VALUES (?, ?, ?, ?)
-        ''', (
-            random.randint(1, 1000),
-            round(random.uniform(10, 1000), 2),
-            random.choice(['pending', 'completed', 'cancelled']),
-            fake.date_time_this_month().isoformat()
+        ''', zip(
+            rng.integers(1, n_users + 1, size).tolist(),
+            np.round(rng.uniform(10, 1000, size), 2).tolist(),
+            np.array(ORDER_STATUSES, dtype=object)[rng.integers(0, len(ORDER_STATUSES), size)].tolist(),
+            _random_timestamps(rng, month_start, now, size).tolist(),
         ))
-    
-    print("Injecting data quality issues...")
-    
+
+    conn.commit()
+
+    log("Injecting data quality issues...")
+
+    # Disjoint random users for each user-level issue
+    user_issue_counts = [int(rates[k] * n_users) for k in
+                         ('exact_duplicates', 'case_duplicates', 'null_emails', 'future_dates')]
+    picks = rng.choice(n_users, size=min(sum(user_issue_counts), n_users), replace=False) + 1
+    exact_ids, case_ids, null_ids, future_ids = np.split(picks, np.cumsum(user_issue_counts)[:-1])
+
     # 1. Add duplicate users (exact copies)
+    _mark(c, exact_ids)
     c.execute('''
         INSERT INTO users (email, first_name, last_name, phone, created_at, status)
         SELECT email, first_name, last_name, phone, created_at, status
-        FROM users WHERE id <= 50
+        FROM users WHERE id IN (SELECT id FROM _picked)
     ''')
-    
+
     # 2. Add duplicate users (case variation)
+    _mark(c, case_ids)
     c.execute('''
         INSERT INTO users (email, first_name, last_name, phone, created_at, status)
         SELECT UPPER(email), first_name, last_name, phone, created_at, status
-        FROM users WHERE id BETWEEN 51 AND 100
+        FROM users WHERE id IN (SELECT id FROM _picked)
     ''')
-    
+
     # 3. Add NULL emails
-    c.execute('UPDATE users SET email = NULL WHERE id BETWEEN 101 AND 120')
-    
-    # 4. Add orphaned orders (non-existent user_id)
-    for _ in range(30):
-        c.execute('''
-            INSERT INTO orders (user_id, amount, status, created_at)
-            VALUES (?, ?, ?, ?)
-        ''', (99999, random.uniform(10, 500), 'completed', fake.date_time_this_month().isoformat()))
-    
+    _mark(c, null_ids)
+    c.execute('UPDATE users SET email = NULL WHERE id IN (SELECT id FROM _picked)')
+
+    # 4. Add orphaned orders (user_id above any existing user)
+    n_orphans = int(rates['orphaned_orders'] * n_orders)
+    missing_user = c.execute('SELECT max(id) FROM users').fetchone()[0] + 99999
+    c.executemany('''
+        INSERT INTO orders (user_id, amount, status, created_at)
+        VALUES (?, ?, ?, ?)
+    ''', zip(
+        (missing_user + rng.integers(0, 1000, n_orphans)).tolist(),
+        np.round(rng.uniform(10, 500, n_orphans), 2).tolist(),
+        ['completed'] * n_orphans,
+        _random_timestamps(rng, month_start, now, n_orphans).tolist(),
+    ))
+
     # 5. Add negative prices
-    c.execute('UPDATE products SET price = -price WHERE id <= 10')
-    
+    _mark(c, rng.choice(n_products, size=int(rates['negative_prices'] * n_products), replace=False) + 1)
+    c.execute('UPDATE products SET price = -price WHERE id IN (SELECT id FROM _picked)')
+
     # 6. Add future dates
-    c.execute("UPDATE users SET created_at = '2050-01-01' WHERE id BETWEEN 121 AND 130")
-    
+    _mark(c, future_ids)
+    c.execute("UPDATE users SET created_at = '2050-01-01' WHERE id IN (SELECT id FROM _picked)")
+
     conn.commit()
-    
+
+    # Leave the file in a normal, durable journal mode for whoever opens it next
+    c.execute('PRAGMA journal_mode = DELETE')
+    c.execute('PRAGMA locking_mode = NORMAL')
+    c.execute('PRAGMA synchronous = FULL')
+
+    if quiet:
+        conn.close()
+        return db_path
+
     # Print summary
     print("\n" + "="*60)
-    print(f"DATABASE CREATED: {db_path}")
+    print(f"DATABASE CREATED: {db_path} in {time.perf_counter() - started:.1f}s")
     print("="*60)
-    
+
     for table in ['users', 'orders', 'products']:
         c.execute(f'SELECT COUNT(*) FROM {table}')
         count = c.fetchone()[0]
         print(f"{table.upper()}: {count} records")
-    
+
     print("\n" + "="*60)
     print("INJECTED ISSUES:")
     print("="*60)
-    
+
     # Count duplicates
     c.execute('''
         SELECT COUNT(*) FROM (
-            SELECT LOWER(email) as email FROM users 
+            SELECT LOWER(email) as email FROM users
             WHERE email IS NOT NULL
-            GROUP BY LOWER(email) 
+            GROUP BY LOWER(email)
             HAVING COUNT(*) > 1
         )
     ''')
     dup_emails = c.fetchone()[0]
     print(f"✗ Duplicate emails: ~{dup_emails * 2}")
-    
+
     # Count NULLs
     c.execute('SELECT COUNT(*) FROM users WHERE email IS NULL')
     nulls = c.fetchone()[0]
     print(f"✗ Users with NULL email: {nulls}")
-    
+
     # Count orphaned orders
     c.execute('''
-        SELECT COUNT(*) FROM orders 
+        SELECT COUNT(*) FROM orders
         WHERE user_id NOT IN (SELECT id FROM users)
     ''')
     orphans = c.fetchone()[0]
     print(f"✗ Orphaned orders: {orphans}")
-    
+
     # Count negative prices
     c.execute('SELECT COUNT(*) FROM products WHERE price < 0')
     neg_prices = c.fetchone()[0]
     print(f"✗ Products with negative price: {neg_prices}")
-    
+
     # Count future dates
     c.execute('SELECT COUNT(*) FROM users WHERE created_at > date("now")')
     future_dates = c.fetchone()[0]
     print(f"✗ Users with future created_at: {future_dates}")
-    
+
     print("="*60 + "\n")
-    
+
     conn.close()
-    
+
     return db_path
 
+
+def _parse_rate(value):
+    name, _, rate = value.partition('=')
+    if name not in DEFAULT_ISSUE_RATES or not rate:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=RATE with NAME one of {', '.join(DEFAULT_ISSUE_RATES)}"
+        )
+    return name, float(rate)
+
+
 if __name__ == '__main__':
-    db_path = create_messy_database()
-    print(f"✓ Ready to use: {db_path}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('db_path', nargs='?', default='data/messy_demo.db')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f"multiplier on {BASE_USERS} users / {BASE_PRODUCTS} products / {BASE_ORDERS} orders")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--today', default=None, metavar='DATE',
+                        help=f"anchor dates on this ISO date or time (default: {SEEDED_NOW} with --seed, else now)")
+    parser.add_argument('--rate', type=_parse_rate, action='append', default=[], metavar='NAME=RATE',
+                        help="override an issue rate, e.g. --rate null_emails=0.1 (repeatable)")
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    db_path = create_messy_database(
+        args.db_path, scale=args.scale, seed=args.seed, issue_rates=dict(args.rate),
+        batch_size=args.batch_size, quiet=args.quiet, today=args.today
+    )
+    print(f"✓ Ready to use: {db_path}")
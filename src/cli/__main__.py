@@ -0,0 +1,4 @@
+"""python -m src.cli"""
+from src.cli.main import cli
+
+cli(prog_name='db-agent')
@@ -0,0 +1,75 @@
+"""Duplicate detection"""
+import json
+from pathlib import Path
+
+import click
+from rich.table import Table
+
+from src.cli.common import console
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+from src.utils.dedupe import DEFAULT_THRESHOLD, DuplicateFinder, default_columns, parse_size
+
+
+@click.command()
+@click.argument('database')
+@click.argument('table')
+@click.option('--column', '-c', 'columns', multiple=True,
+              help="Key column (repeatable); default: email columns, or name/phone/email with --fuzzy")
+@click.option('--fuzzy', is_flag=True, help="Find near-duplicates with MinHash/LSH instead of exact matches")
+@click.option('--threshold', type=float, default=DEFAULT_THRESHOLD, show_default=True,
+              help="Minimum Jaccard similarity for --fuzzy")
+@click.option('--block-on', help="Only compare rows with the same value in this column (--fuzzy)")
+@click.option('--memory', default='256M', show_default=True, help="Memory budget before spilling to disk")
+@click.option('--spill-dir', type=click.Path(file_okay=False), help="Directory for spill files")
+@click.option('--examples', type=int, default=5, show_default=True, help="Duplicate groups to show")
+@click.option('--json', 'as_json', is_flag=True, help="Emit the result as JSON")
+def dedupe(database, table, columns, fuzzy, threshold, block_on, memory, spill_dir, examples, as_json):
+    """Find duplicate rows by normalized key or by similarity"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    
+    with console.status("[bold green]Looking for duplicates..."):
+        with SQLiteAdapter(database) as db:
+            table_info = db.get_full_schema(count_mode='estimate', use_cache=True).get(table)
+            if table_info is None:
+                console.print(f"[red]✗ Unknown table: {table}[/red]")
+                return
+            columns = list(columns) or default_columns(table_info, fuzzy)
+            if not columns:
+                console.print("[red]✗ No key columns found, pass them with --column[/red]")
+                return
+            try:
+                finder = DuplicateFinder(db, memory_budget=parse_size(memory), spill_dir=spill_dir)
+                if fuzzy:
+                    result = finder.near_duplicates(table, columns, threshold, block_on, max_examples=examples)
+                else:
+                    result = finder.exact_duplicates(table, columns, max_examples=examples)
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return
+            
+            samples = []
+            for group in result['examples']:
+                placeholders = ", ".join("?" * len(group))
+                samples.append(db.execute_query(
+                    f"SELECT rowid, * FROM {quote_identifier(table)} WHERE rowid IN ({placeholders})", tuple(group)
+                ))
+    
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+    
+    for group in filter(None, samples):
+        group_table = Table(show_header=True, header_style="bold cyan")
+        for column in group[0].keys():
+            group_table.add_column(column)
+        for row in group:
+            group_table.add_row(*(str(value) for value in row.values()))
+        console.print(group_table)
+    
+    spill_note = f"  [bold]Spilled:[/bold] {result['spilled_bytes'] / 1024 / 1024:.1f} MB" if result['spilled'] else ""
+    console.print(f"\n[bold]Rows scanned:[/bold] {result['rows_scanned']:,}  "
+                  f"[bold]Groups:[/bold] {result['groups']:,}  "
+                  f"[bold]Duplicate rows:[/bold] {result['duplicate_rows']:,}{spill_note}")
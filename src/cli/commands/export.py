@@ -0,0 +1,41 @@
+"""Columnar table export"""
+from pathlib import Path
+
+import click
+
+from src.cli.common import console
+from src.db.columnar import EXPORT_FORMATS, SUFFIXES, default_format, format_for_path
+from src.db.sqlite_adapter import COLUMNAR_CHUNK_ROWS, SQLiteAdapter
+
+
+@click.command()
+@click.argument('database')
+@click.argument('table')
+@click.option('--output', '-o', type=click.Path(dir_okay=False),
+              help="Output file (default: TABLE plus the format's suffix)")
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS),
+              help="File format (default: from the output suffix; parquet if pyarrow is installed, else npz)")
+@click.option('--column', '-c', 'columns', multiple=True, help="Only export this column (repeatable)")
+@click.option('--chunk-rows', type=int, default=COLUMNAR_CHUNK_ROWS, show_default=True,
+              help="Rows per row group / record batch / npz chunk")
+def export(database, table, output, fmt, columns, chunk_rows):
+    """Export a table to a columnar file in chunks"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    
+    fmt = fmt or (format_for_path(output) if output else None) or default_format()
+    output = output or f"{table}{SUFFIXES[fmt]}"
+    with console.status(f"[bold green]Exporting {table}..."):
+        with SQLiteAdapter(database, mode='ro') as db:
+            try:
+                result = db.export_table(table, output, fmt, chunk_rows, list(columns) or None)
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return
+    
+    kinds = ", ".join(f"{name} ({kind or 'null'})" for name, kind in result['columns'].items())
+    console.print(f"[green]✓[/green] Wrote {result['rows']:,} rows in {result['chunks']} chunk(s) "
+                  f"to {result['path']} ({result['format']}, {result['bytes'] / 1024 / 1024:.1f} MB)")
+    console.print(f"[dim]{kinds}[/dim]")
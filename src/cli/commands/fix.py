@@ -0,0 +1,103 @@
+"""Repairs for scan issues"""
+import json
+from pathlib import Path
+
+import click
+from rich.table import Table
+
+from src.cli.common import console
+from src.db.snapshot_manager import SnapshotManager
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.fixer import DEFAULT_FIX_BATCH_SIZE, FIX_ACTIONS, FixEngine
+from src.utils.health_check import HealthScanner
+
+
+def _parse_repairs(ctx, param, values):
+    repairs = {}
+    for value in values:
+        rule, _, action = value.partition('=')
+        if action not in FIX_ACTIONS.get(rule, ()):
+            choices = "; ".join(f"{name}={'|'.join(actions)}" for name, actions in FIX_ACTIONS.items())
+            raise click.BadParameter(f"'{value}', expected RULE=ACTION with one of: {choices}")
+        repairs[rule] = action
+    return repairs
+
+
+@click.command()
+@click.argument('database')
+@click.option('--table', 'tables', multiple=True, help="Only fix this table (repeatable)")
+@click.option('--rule', 'rules', multiple=True, type=click.Choice(list(FIX_ACTIONS)),
+              help="Only fix issues of this rule (repeatable)")
+@click.option('--repair', 'repairs', multiple=True, callback=_parse_repairs, metavar='RULE=ACTION',
+              help="Override a rule's repair, e.g. orphaned_references=delete (repeatable)")
+@click.option('--batch-size', type=click.IntRange(min=1), default=DEFAULT_FIX_BATCH_SIZE, show_default=True,
+              help="Rows changed per transaction")
+@click.option('--dry-run', is_flag=True, help="Show what would change without writing")
+@click.option('--no-snapshot', is_flag=True, help="Skip the snapshot taken before the first change")
+@click.option('--snapshots-dir', default="data/snapshots", show_default=True, type=click.Path(file_okay=False))
+@click.option('--json', 'as_json', is_flag=True, help="Emit the result as JSON")
+def fix(database, tables, rules, repairs, batch_size, dry_run, no_snapshot, snapshots_dir, as_json):
+    """Repair issues found by scan in batched transactions"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    
+    with SQLiteAdapter(database) as db:
+        try:
+            with console.status("[bold green]Scanning..."):
+                issues = HealthScanner(db).scan(list(tables) or None)['issues']
+            if rules:
+                issues = [issue for issue in issues if issue['rule'] in rules]
+            snapshots = None if dry_run or no_snapshot else SnapshotManager(database, snapshots_dir)
+            engine = FixEngine(db, snapshots, batch_size=batch_size)
+            plan = engine.plan(issues, repairs)
+            if dry_run:
+                with console.status("[bold green]Estimating..."):
+                    result = engine.estimate(plan)
+            else:
+                with console.status("[bold green]Fixing...") as status:
+                    result = engine.apply(plan, progress=lambda p: status.update(
+                        f"[bold green]Fixing {p['table']} ({p['rule']}): {p['rows_done']:,}/{p['rows']:,} rows"
+                    ))
+        except ValueError as e:
+            console.print(f"[red]✗ {e}[/red]")
+            return
+    result['skipped'] = plan['skipped']
+    
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+    
+    title = f"Fix plan (dry run): {database}" if dry_run else f"Fixed: {database}"
+    repairs_table = Table(title=title)
+    repairs_table.add_column("Table", style="cyan")
+    repairs_table.add_column("Column", style="magenta")
+    repairs_table.add_column("Issue", style="yellow")
+    repairs_table.add_column("Repair", style="green")
+    repairs_table.add_column("Rows", justify="right")
+    repairs_table.add_column("Batches", justify="right")
+    repairs_table.add_column("WAL/batch" if dry_run else "Time (ms)", justify="right")
+    for repair in result['repairs']:
+        last = (f"≤{repair['wal_bytes_per_batch'] / 1024 / 1024:.1f} MB" if dry_run
+                else str(repair['elapsed_ms']))
+        repairs_table.add_row(
+            repair['table'],
+            repair['column'] or "—",
+            repair['rule'],
+            repair['action'],
+            f"{repair['rows']:,}",
+            f"{repair['batches']:,}",
+            last
+        )
+    console.print(repairs_table)
+    
+    if result['skipped']:
+        skipped = sorted({f"{issue['table']}.{issue['column'] or '*'} {issue['rule']}" for issue in result['skipped']})
+        console.print(f"[dim]No automatic repair: {', '.join(skipped)}[/dim]")
+    if dry_run:
+        console.print(f"\n[bold]Rows to change:[/bold] {result['rows']:,}  [bold]Transactions:[/bold] {result['batches']:,}")
+    else:
+        snapshot = result['snapshot_id'] or "none"
+        console.print(f"\n[bold]Rows changed:[/bold] {result['rows']:,}  [bold]Snapshot:[/bold] {snapshot}  "
+                      f"[bold]Time:[/bold] {result['elapsed_ms'] / 1000:.1f} s")
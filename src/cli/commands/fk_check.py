@@ -0,0 +1,77 @@
+"""Foreign key integrity checks"""
+import json
+from pathlib import Path
+
+import click
+from rich.table import Table
+
+from src.cli.common import console
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.fk_checker import ForeignKeyChecker
+
+
+@click.command(name='fk-check')
+@click.argument('database')
+@click.option('--table', 'tables', multiple=True, help="Only check foreign keys of this table (repeatable)")
+@click.option('--samples', type=int, default=5, show_default=True, help="Orphaned rows to show per foreign key")
+@click.option('--json', 'as_json', is_flag=True, help="Emit the result as JSON")
+def fk_check(database, tables, samples, as_json):
+    """Check foreign key integrity and suggest missing indexes"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    
+    with console.status("[bold green]Checking foreign keys..."):
+        with SQLiteAdapter(database) as db:
+            try:
+                result = ForeignKeyChecker(db, sample_size=samples).check(list(tables) or None)
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return
+    
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+    
+    checks = Table(title=f"Foreign keys: {database}")
+    checks.add_column("Table", style="cyan")
+    checks.add_column("Column", style="magenta")
+    checks.add_column("References")
+    checks.add_column("Strategy", style="dim")
+    checks.add_column("Orphans", justify="right")
+    checks.add_column("Sample values")
+    checks.add_column("Time (ms)", justify="right")
+    
+    for fk in result['foreign_keys']:
+        orphans = f"[red]{fk['orphans']:,}[/red]" if fk['orphans'] else "[green]0[/green]"
+        checks.add_row(
+            fk['table'],
+            fk['column'],
+            fk['references'],
+            fk['strategy'],
+            orphans,
+            ", ".join(str(sample['value']) for sample in fk['samples']),
+            str(fk['elapsed_ms'])
+        )
+    console.print(checks)
+    
+    if result['missing_indexes']:
+        advice = Table(title="Missing indexes")
+        advice.add_column("Foreign key", style="cyan")
+        advice.add_column("Side")
+        advice.add_column("Scan cost", justify="right")
+        advice.add_column("Suggestion", style="yellow")
+        for item in result['missing_indexes']:
+            size = f"{item['estimated_bytes'] / 1024 / 1024:.1f} MB" if item['estimated_bytes'] is not None else "?"
+            advice.add_row(
+                item['foreign_key'],
+                item['side'],
+                f"~{item['estimated_rows']:,} rows, {size}",
+                item['suggestion']
+            )
+        console.print(advice)
+    
+    console.print(f"\n[bold]Foreign keys:[/bold] {len(result['foreign_keys'])}  "
+                  f"[bold]Orphaned rows:[/bold] {result['orphans']:,}  "
+                  f"[bold]Missing indexes:[/bold] {len(result['missing_indexes'])}")
@@ -0,0 +1,80 @@
+"""Inspect many databases concurrently"""
+import json
+
+import click
+from rich.live import Live
+from rich.table import Table
+
+from src.cli.common import console, count_option, no_cache_option
+from src.utils.fleet import EXECUTORS, discover_databases, scan_fleet
+
+
+@click.command()
+@click.argument('patterns', nargs=-1, required=True)
+@click.option('--mode', type=click.Choice(['info', 'schema']), default='info', show_default=True,
+              help="Per-database summary, or one row per table")
+@click.option('--workers', type=int, default=None, help="Pool size (default: executor default)")
+@click.option('--executor', type=click.Choice(EXECUTORS), default='thread', show_default=True)
+@click.option('--recursive', '-r', is_flag=True, help="Descend into directories and expand '**' globs")
+@click.option('--jsonl', 'as_jsonl', is_flag=True, help="Emit one JSON object per database instead of a table")
+@count_option
+@no_cache_option
+def fleet(patterns, mode, workers, executor, recursive, as_jsonl, counts, no_cache):
+    """Inspect many databases (globs or directories) concurrently"""
+    
+    databases = discover_databases(patterns, recursive=recursive)
+    if not databases:
+        console.print(f"[red]✗ No databases matched: {' '.join(patterns)}[/red]")
+        return
+    
+    results = scan_fleet(
+        databases, workers=workers, executor=executor,
+        count_mode=counts, include_schema=(mode == 'schema'), use_cache=not no_cache
+    )
+    
+    if as_jsonl:
+        # Stream each result as soon as its worker finishes
+        for result in results:
+            click.echo(json.dumps(result, default=str))
+        return
+    
+    summary = Table(title=f"Fleet: {len(databases)} databases")
+    summary.add_column("Database", style="cyan")
+    if mode == 'schema':
+        summary.add_column("Table", style="magenta")
+        summary.add_column("Columns", style="yellow")
+    else:
+        summary.add_column("Tables", style="magenta", justify="right")
+    summary.add_column("Rows", style="magenta", justify="right")
+    summary.add_column("Time (ms)", style="dim", justify="right")
+    
+    errors = 0
+    total_rows = 0
+    with Live(summary, console=console.get(), vertical_overflow="visible"):
+        for result in results:
+            if result['error']:
+                errors += 1
+                summary.add_row(result['database'], f"[red]{result['error']}[/red]",
+                                *([""] if mode == 'schema' else []), "", str(result['elapsed_ms']))
+                continue
+            
+            total_rows += result['total_rows']
+            if mode == 'schema':
+                for table_name, table_info in result['schema'].items():
+                    summary.add_row(
+                        result['database'],
+                        table_name,
+                        ", ".join(col['name'] for col in table_info['columns']),
+                        str(table_info['row_count']),
+                        str(result['elapsed_ms'])
+                    )
+            else:
+                summary.add_row(
+                    result['database'],
+                    str(result['tables']),
+                    f"{'~' if result['estimated'] else ''}{result['total_rows']:,}",
+                    str(result['elapsed_ms'])
+                )
+    
+    console.print(f"\n[bold]Databases:[/bold] {len(databases)}  "
+                  f"[bold]Total Records:[/bold] {total_rows:,}  [bold]Errors:[/bold] {errors}")
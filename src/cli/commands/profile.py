@@ -0,0 +1,71 @@
+"""Column profiling"""
+import json
+from pathlib import Path
+
+import click
+from rich.table import Table
+
+from src.cli.common import console, short
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.profiler import DEFAULT_TOP_K
+
+
+@click.command()
+@click.argument('database')
+@click.option('--table', 'tables', multiple=True, help="Only profile this table (repeatable)")
+@click.option('--column', '-c', 'columns', multiple=True, help="Only profile this column (repeatable, needs one --table)")
+@click.option('--sample', type=int, help="Profile a random sample of this many rows per table, read by rowid")
+@click.option('--seed', type=int, help="Seed for --sample")
+@click.option('--top-k', type=int, default=DEFAULT_TOP_K, show_default=True, help="Most frequent values to report")
+@click.option('--json', 'as_json', is_flag=True, help="Emit the profile as JSON")
+def profile(database, tables, columns, sample, seed, top_k, as_json):
+    """Profile columns: nulls, distinct values, top values, min/max, quantiles"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    if columns and len(tables) != 1:
+        console.print("[red]✗ --column needs exactly one --table[/red]")
+        return
+    
+    results = []
+    with console.status("[bold green]Profiling..."):
+        with SQLiteAdapter(database, mode='ro') as db:
+            try:
+                for table_name in tables or db.get_tables():
+                    results.append(db.profile_table(table_name, list(columns) or None, sample, seed, top_k))
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return
+    
+    if as_json:
+        click.echo(json.dumps({'tables': {result['table_name']: result for result in results}}, indent=2, default=repr))
+        return
+    
+    for result in results:
+        rows = f"sample of {result['rows_profiled']:,} rows" if result['sampled'] else f"{result['rows_profiled']:,} rows"
+        table_display = Table(title=f"Table: {result['table_name']} ({rows})")
+        table_display.add_column("Column", style="cyan")
+        table_display.add_column("Types", style="magenta")
+        table_display.add_column("Nulls", justify="right")
+        table_display.add_column("Distinct ~", justify="right")
+        table_display.add_column("Min / Max")
+        table_display.add_column("p01 / p50 / p99")
+        table_display.add_column("Top values", style="green")
+        for column in result['columns']:
+            types = ", ".join(f"{name} {count:,}" for name, count in column['types'].items())
+            if column['type_drift']:
+                types += f" [red](drift: {', '.join(column['type_drift'])})[/red]"
+            quantiles = column['quantiles']
+            top = ", ".join(f"{short(item['value'])} ({item['count']:,})" for item in column['top_values'][:3])
+            table_display.add_row(
+                column['name'],
+                types,
+                f"{column['null_rate']:.1%}",
+                f"{column['distinct_estimate']:,}",
+                f"{short(column['min'])} / {short(column['max'])}",
+                " / ".join(f"{quantiles[key]:g}" for key in ('p01', 'p50', 'p99')) if quantiles else "",
+                top
+            )
+        console.print(table_display)
+        console.print(f"[dim]{result['elapsed_ms']:,.0f} ms[/dim]\n")
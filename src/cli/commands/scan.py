@@ -0,0 +1,90 @@
+"""Data-quality checks"""
+import json
+from pathlib import Path
+
+import click
+from rich.table import Table
+
+from src.cli.common import console
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.health_check import HealthScanner
+from src.utils.incremental_scan import IncrementalScanner
+from src.utils.sampled_scan import SampledScanner
+from src.utils.sampling import SAMPLING_METHODS
+
+
+@click.command()
+@click.argument('database')
+@click.option('--table', 'tables', multiple=True, help="Only scan this table (repeatable)")
+@click.option('--json', 'as_json', is_flag=True, help="Emit the scan result as JSON")
+@click.option('--incremental', is_flag=True, help="Only read rows added since the last incremental scan")
+@click.option('--full', is_flag=True, help="With --incremental: rebuild the stored scan state from all rows")
+@click.option('--sample', 'sample_size', type=click.IntRange(min=1),
+              help="Estimate rates from a random sample of this many rows per table")
+@click.option('--seed', type=int, help="Seed for a repeatable --sample")
+@click.option('--method', type=click.Choice(SAMPLING_METHODS), default='rowid', show_default=True,
+              help="How --sample picks rows")
+@click.option('--stratify-by', help="With --sample: sample each value of this column proportionally")
+def scan(database, tables, as_json, incremental, full, sample_size, seed, method, stratify_by):
+    """Run data-quality checks (one pass per table)"""
+    
+    if not Path(database).exists():
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+    if sample_size and incremental:
+        console.print("[red]✗ --sample and --incremental cannot be combined[/red]")
+        return
+    
+    with console.status("[bold green]Scanning..."):
+        with SQLiteAdapter(database) as db:
+            try:
+                if sample_size:
+                    scanner = SampledScanner(db, sample_size, seed=seed, method=method, stratify_by=stratify_by)
+                    result = scanner.scan(list(tables) or None)
+                elif incremental:
+                    with IncrementalScanner(db) as scanner:
+                        result = scanner.scan(list(tables) or None, full=full)
+                else:
+                    result = HealthScanner(db).scan(list(tables) or None)
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return
+    
+    if as_json:
+        click.echo(json.dumps(result, indent=2))
+        return
+    
+    issues = Table(title=f"Health scan: {database}")
+    issues.add_column("Table", style="cyan")
+    issues.add_column("Column", style="magenta")
+    issues.add_column("Issue", style="yellow")
+    issues.add_column("Rows", justify="right")
+    issues.add_column("Rate", justify="right")
+    
+    for issue in result['issues']:
+        color = "red" if issue['severity'] == 'error' else "yellow"
+        description = issue['description']
+        if issue.get('references'):
+            description += f" ({issue['references']})"
+        rows, rate = f"{issue['count']:,}", f"{issue['rate']:.2%}"
+        if issue.get('sampled'):
+            # Symmetric display of the interval; the JSON output keeps the exact bounds
+            margin = max(issue['rate'] - issue['rate_low'], issue['rate_high'] - issue['rate'])
+            rows, rate = f"~{rows}", f"{rate} ±{margin:.2%}"
+        issues.add_row(
+            issue['table'],
+            issue['column'] or "—",
+            f"[{color}]{description}[/{color}]",
+            rows,
+            rate
+        )
+    
+    console.print(issues)
+    scanned_rows = sum(t.get('sampled_rows', t.get('scanned_rows', t['row_count'])) for t in result['tables'].values())
+    console.print(f"\n[bold]Tables scanned:[/bold] {len(result['tables'])}  "
+                  f"[bold]Rows scanned:[/bold] {scanned_rows:,}  "
+                  f"[bold]Issues:[/bold] {len(result['issues'])}")
+    if sample_size:
+        skipped = sorted({rule for t in result['tables'].values() for rule in t['skipped_rules']})
+        if skipped:
+            console.print(f"[dim]Not estimated from a sample: {', '.join(skipped)}[/dim]")
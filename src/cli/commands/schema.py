@@ -0,0 +1,162 @@
+"""Schema and summary of one database"""
+from pathlib import Path
+
+import click
+
+from src.cli.common import COUNT_LABELS, RecordStream, console, count_option, format_option, no_cache_option
+from src.db.sqlite_adapter import SQLiteAdapter
+
+# CSV columns: schema writes one row per column, info one row per table
+SCHEMA_FIELDS = ['database', 'table_name', 'column', 'type', 'nullable', 'primary_key', 'references',
+                 'row_count', 'row_count_kind']
+INFO_FIELDS = ['database', 'table_name', 'row_count', 'row_count_kind', 'column_count']
+
+
+@click.command()
+@click.argument('database')
+@count_option
+@no_cache_option
+@format_option
+def schema(database, counts, no_cache, fmt):
+    """Display database schema"""
+
+    if not Path(database).exists():
+        if fmt != 'table':
+            raise click.BadParameter(f"Database not found: {database}", param_hint='DATABASE')
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+
+    if fmt != 'table':
+        stream = RecordStream(fmt, SCHEMA_FIELDS, {'database': database})
+        with SQLiteAdapter(database) as db:
+            for table_info in db.iter_schema(count_mode=counts, use_cache=not no_cache):
+                for record in (_column_rows(table_info) if fmt == 'csv' else [table_info]):
+                    stream.write(record)
+        stream.close()
+        return
+
+    with console.status("[bold green]Loading schema..."):
+        with SQLiteAdapter(database) as db:
+            schema_data = db.get_full_schema(count_mode=counts, use_cache=not no_cache)
+    _print_schema(schema_data)
+
+
+@click.command()
+@click.argument('database')
+@count_option
+@no_cache_option
+@format_option
+def info(database, counts, no_cache, fmt):
+    """Display database summary"""
+
+    if not Path(database).exists():
+        if fmt != 'table':
+            raise click.BadParameter(f"Database not found: {database}", param_hint='DATABASE')
+        console.print(f"[red]✗ Database not found: {database}[/red]")
+        return
+
+    if fmt != 'table':
+        stream = RecordStream(fmt, INFO_FIELDS, {'database': database})
+        total_rows = tables = 0
+        estimated = False
+        with SQLiteAdapter(database) as db:
+            for table_info in db.iter_schema(count_mode=counts, use_cache=not no_cache):
+                stream.write({
+                    'table_name': table_info['table_name'],
+                    'row_count': table_info['row_count'],
+                    'row_count_kind': table_info['row_count_kind'],
+                    'column_count': len(table_info['columns'])
+                })
+                total_rows += table_info['row_count']
+                tables += 1
+                estimated = estimated or table_info['row_count_kind'] in ('stat1', 'rowid')
+        stream.close({'total_rows': total_rows, 'table_count': tables, 'estimated': estimated})
+        return
+
+    with SQLiteAdapter(database) as db:
+        schema_data = db.get_full_schema(count_mode=counts, use_cache=not no_cache)
+    _print_info(database, schema_data)
+
+
+def _column_rows(table_info):
+    """Flat CSV rows, one per column, with the column's foreign key target if it has one"""
+    references = {}
+    for fk in table_info['foreign_keys']:
+        references.setdefault(fk['column'], []).append(f"{fk['references_table']}.{fk['references_column'] or 'rowid'}")
+    return [
+        {
+            'table_name': table_info['table_name'],
+            'column': col['name'],
+            'type': col['type'],
+            'nullable': col['nullable'],
+            'primary_key': col['primary_key'],
+            'references': ";".join(references.get(col['name'], [])),
+            'row_count': table_info['row_count'],
+            'row_count_kind': table_info['row_count_kind']
+        }
+        for col in table_info['columns']
+    ]
+
+
+# Rich is imported by the renderers only: json/jsonl/csv output never loads it
+
+def _print_schema(schema_data):
+    from rich.panel import Panel
+    from rich.table import Table
+
+    # Display each table
+    for table_name, table_info in schema_data.items():
+        # Create table for columns
+        count_note = "" if table_info['row_count_kind'] == 'exact' else f", {COUNT_LABELS[table_info['row_count_kind']]}"
+        table_display = Table(title=f"Table: {table_name} ({table_info['row_count']} rows{count_note})")
+        table_display.add_column("Column", style="cyan")
+        table_display.add_column("Type", style="magenta")
+        table_display.add_column("Nullable", style="yellow")
+        table_display.add_column("Primary Key", style="green")
+
+        for col in table_info['columns']:
+            table_display.add_row(
+                col['name'],
+                col['type'],
+                "✓" if col['nullable'] else "✗",
+                "✓" if col['primary_key'] else ""
+            )
+
+        console.print(table_display)
+
+        # Display foreign keys if any
+        if table_info['foreign_keys']:
+            fk_text = "\n".join([
+                f"  • {fk['column']} → {fk['references_table']}.{fk['references_column']}"
+                for fk in table_info['foreign_keys']
+            ])
+            console.print(Panel(fk_text, title="Foreign Keys", border_style="blue"))
+
+        console.print()  # Empty line between tables
+
+
+def _print_info(database, schema_data):
+    from rich.table import Table
+
+    # Summary table
+    summary = Table(title=f"Database: {database}")
+    summary.add_column("Table", style="cyan")
+    summary.add_column("Rows", style="magenta", justify="right")
+    summary.add_column("Columns", style="yellow", justify="right")
+    summary.add_column("Count", style="dim")
+
+    total_rows = 0
+    estimated = False
+    for table_name, table_info in schema_data.items():
+        summary.add_row(
+            table_name,
+            str(table_info['row_count']),
+            str(len(table_info['columns'])),
+            COUNT_LABELS[table_info['row_count_kind']]
+        )
+        total_rows += table_info['row_count']
+        estimated = estimated or table_info['row_count_kind'] in ('stat1', 'rowid')
+
+    console.print(summary)
+    console.print(f"\n[bold]Total Records:[/bold] {'~' if estimated else ''}{total_rows:,}")
+    console.print(f"[bold]Total Tables:[/bold] {len(schema_data)}")
@@ -0,0 +1,20 @@
+"""MCP server over stdio"""
+from pathlib import Path
+
+import click
+
+from src.mcp.server import DEFAULT_REQUEST_TIMEOUT, DEFAULT_WORKERS, run_stdio_server
+
+
+@click.command()
+@click.argument('database')
+@click.option('--workers', type=int, default=DEFAULT_WORKERS, show_default=True,
+              help="Tool calls run in parallel, each on its own read-only connection")
+@click.option('--timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT, show_default=True,
+              help="Seconds before a query is interrupted (0 disables)")
+@click.option('--snapshots-dir', default="data/snapshots", show_default=True, type=click.Path(file_okay=False))
+def serve(database, workers, timeout, snapshots_dir):
+    """Serve the database to MCP clients over stdio"""
+    if not Path(database).exists():
+        raise click.BadParameter(f"Database not found: {database}", param_hint='DATABASE')
+    run_stdio_server(database, snapshots_dir=snapshots_dir, workers=workers, request_timeout=timeout or None)
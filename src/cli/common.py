@@ -0,0 +1,108 @@
+"""Console, labels, options and output streams shared by the CLI commands"""
+import csv
+import json
+from typing import Any, Dict, List, Optional
+
+import click
+
+from src.db.sqlite_adapter import COUNT_MODES
+
+# --format choices of the metadata commands: a Rich table, or machine-readable streams
+OUTPUT_FORMATS = ('table', 'json', 'jsonl', 'csv')
+
+
+class _Console:
+    """rich Console created on first use, so machine-readable output never imports rich"""
+
+    def __init__(self):
+        self._console = None
+
+    def get(self):
+        """The Console itself, for rich APIs that take one (e.g. Live)"""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+console = _Console()
+
+# How each row_count_kind is shown next to counts
+COUNT_LABELS = {
+    'exact': 'exact',
+    'cached': 'exact (cached)',
+    'stat1': '~ sqlite_stat1',
+    'rowid': '~ max(rowid)',
+}
+
+count_option = click.option(
+    '--counts', type=click.Choice(COUNT_MODES), default='exact', show_default=True,
+    help="Row count strategy: full COUNT(*), a no-scan estimate, or a cached exact count"
+)
+no_cache_option = click.option(
+    '--no-cache', is_flag=True, help="Re-read the schema instead of using the on-disk schema cache"
+)
+format_option = click.option(
+    '--format', 'fmt', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+    help="Rich table, or json/jsonl/csv written one table at a time as soon as it is read"
+)
+
+
+def short(value, width=24):
+    """Value as text, cut to ``width`` characters"""
+    text = repr(value) if isinstance(value, bytes) else str(value)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+class RecordStream:
+    """
+    Writes records to stdout as they are produced, flushing after each one.
+
+    'jsonl' writes one object per line and 'csv' one row per record with
+    ``fields`` as the header; both repeat the ``header`` fields (e.g. the
+    database) on every record. 'json' writes a single document,
+    {**header, 'tables': {record[key]: record, ...}, **footer}: it is
+    opened before the first record and completed by close().
+    """
+
+    def __init__(self, fmt: str, fields: List[str], header: Dict[str, Any], key: str = 'table_name'):
+        """
+        Args:
+            fmt: 'json', 'jsonl' or 'csv'
+            fields: CSV columns, header fields included
+            header: Fields shared by all records
+            key: Record field the json document is keyed by
+        """
+        self.fmt = fmt
+        self.header = header
+        self.key = key
+        self.out = click.get_text_stream('stdout')
+        self._written = 0
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self.out, fieldnames=fields, lineterminator='\n')
+            self._csv.writeheader()
+        elif fmt == 'json':
+            self.out.write("{" + "".join(f"{json.dumps(name)}: {json.dumps(value)}, "
+                                         for name, value in header.items()) + '"tables": {')
+        self.out.flush()
+
+    def write(self, record: Dict[str, Any]):
+        if self.fmt == 'jsonl':
+            self.out.write(json.dumps({**self.header, **record}, default=str) + "\n")
+        elif self.fmt == 'csv':
+            self._csv.writerow({**self.header, **record})
+        else:
+            separator = ", " if self._written else ""
+            self.out.write(f"{separator}{json.dumps(record[self.key])}: {json.dumps(record, default=str)}")
+        self._written += 1
+        self.out.flush()
+
+    def close(self, footer: Optional[Dict[str, Any]] = None):
+        """Complete the json document with ``footer``; other formats ignore it"""
+        if self.fmt == 'json':
+            self.out.write("}" + "".join(f", {json.dumps(name)}: {json.dumps(value)}"
+                                         for name, value in (footer or {}).items()) + "}\n")
+            self.out.flush()
@@ -1,95 +1,109 @@
 """CLI interface for DB Agent"""
-import click
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from pathlib import Path
+import importlib
 import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script (python src/cli/main.py) rather than the db-agent entry point
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import click
+
+from src.db.instrumentation import DEFAULT_SLOW_MS, QueryProfiler, activate, otel_tracer, setup_otlp_tracing
+
+# Command name -> 'module:attribute'. A command's module (and whatever it imports:
+# numpy, rich, the MCP server...) is only loaded when that command is invoked.
+COMMANDS = {
+    'schema': 'src.cli.commands.schema:schema',
+    'info': 'src.cli.commands.schema:info',
+    'fleet': 'src.cli.commands.fleet:fleet',
+    'scan': 'src.cli.commands.scan:scan',
+    'fk-check': 'src.cli.commands.fk_check:fk_check',
+    'dedupe': 'src.cli.commands.dedupe:dedupe',
+    'fix': 'src.cli.commands.fix:fix',
+    'diff': 'src.cli.commands.diff:diff',
+    'export': 'src.cli.commands.export:export',
+    'profile': 'src.cli.commands.profile:profile',
+    'serve': 'src.cli.commands.serve:serve',
+}
+
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+class LazyGroup(click.Group):
+    """Group that imports a command's module the first time the command is looked up"""
 
-from src.db.sqlite_adapter import SQLiteAdapter
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
 
-console = Console()
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
 
-@click.group()
-def cli():
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module, attribute = self.lazy_commands[cmd_name].split(':')
+            self.add_command(getattr(importlib.import_module(module), attribute), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option('--profile', is_flag=True, help="Time every SQL statement and print a summary (to stderr) on exit")
+@click.option('--slow-ms', type=float, default=DEFAULT_SLOW_MS, show_default=True,
+              help="With --profile: show the query plan of executions at least this slow")
+@click.option('--otel', is_flag=True,
+              help="Emit an OpenTelemetry span per SQL statement over OTLP (OTEL_EXPORTER_OTLP_* variables)")
+@click.pass_context
+def cli(ctx, profile, slow_ms, otel):
     """DB Agent - AI Database Health Agent"""
-    pass
-
-@cli.command()
-@click.argument('database')
-def schema(database):
-    """Display database schema"""
-    
-    if not Path(database).exists():
-        console.print(f"[red]✗ Database not found: {database}[/red]")
+    if not (profile or otel):
         return
-    
-    with console.status("[bold green]Loading schema..."):
-        with SQLiteAdapter(database) as db:
-            schema_data = db.get_full_schema()
-    
-    # Display each table
-    for table_name, table_info in schema_data.items():
-        # Create table for columns
-        table_display = Table(title=f"Table: {table_name} ({table_info['row_count']} rows)")
-        table_display.add_column("Column", style="cyan")
-        table_display.add_column("Type", style="magenta")
-        table_display.add_column("Nullable", style="yellow")
-        table_display.add_column("Primary Key", style="green")
-        
-        for col in table_info['columns']:
-            table_display.add_row(
-                col['name'],
-                col['type'],
-                "✓" if col['nullable'] else "✗",
-                "✓" if col['primary_key'] else ""
-            )
-        
-        console.print(table_display)
-        
-        # Display foreign keys if any
-        if table_info['foreign_keys']:
-            fk_text = "\n".join([
-                f"  • {fk['column']} → {fk['references_table']}.{fk['references_column']}"
-                for fk in table_info['foreign_keys']
-            ])
-            console.print(Panel(fk_text, title="Foreign Keys", border_style="blue"))
-        
-        console.print()  # Empty line between tables
-
-@cli.command()
-@click.argument('database')
-def info(database):
-    """Display database summary"""
-    
-    if not Path(database).exists():
-        console.print(f"[red]✗ Database not found: {database}[/red]")
-        return
-    
-    with SQLiteAdapter(database) as db:
-        schema_data = db.get_full_schema()
-    
-    # Summary table
-    summary = Table(title=f"Database: {database}")
-    summary.add_column("Table", style="cyan")
-    summary.add_column("Rows", style="magenta", justify="right")
-    summary.add_column("Columns", style="yellow", justify="right")
-    
-    total_rows = 0
-    for table_name, table_info in schema_data.items():
+    tracer = None
+    if otel:
+        try:
+            provider = setup_otlp_tracing()
+        except RuntimeError as e:
+            raise click.UsageError(str(e))
+        ctx.call_on_close(provider.shutdown)
+        tracer = otel_tracer()
+    profiler = QueryProfiler(slow_ms=slow_ms, tracer=tracer)
+    activate(profiler)
+    if profile:
+        ctx.call_on_close(lambda: _print_profile(profiler))
+
+
+def _print_profile(profiler: QueryProfiler, top: int = 15):
+    """Rich summary of a profiled run, on stderr so --json output stays parseable"""
+    from rich.console import Console
+    from rich.markup import escape
+    from rich.table import Table
+
+    from src.cli.common import short
+
+    err = Console(stderr=True)
+    report = profiler.report(top=top)
+    summary = Table(title=f"SQL profile: {report['calls']} executions, {report['elapsed_ms']:.1f} ms in SQLite, "
+                          f"{report['rows']} rows, {report['pragma_calls']} PRAGMA calls, "
+                          f"{report['full_scans']} full scans")
+    summary.add_column("ms", justify="right", style="magenta")
+    summary.add_column("Calls", justify="right")
+    summary.add_column("Max ms", justify="right")
+    summary.add_column("Rows", justify="right")
+    summary.add_column("Full scans", style="yellow")
+    summary.add_column("Statement", style="cyan", overflow="fold")
+    for stats in report['statements']:
         summary.add_row(
-            table_name,
-            str(table_info['row_count']),
-            str(len(table_info['columns']))
+            f"{stats['elapsed_ms']:.1f}",
+            str(stats['calls']),
+            f"{stats['max_ms']:.1f}",
+            str(stats['rows']),
+            ", ".join(stats['scanned']) or "-",
+            escape(short(stats['sql'], 120))
         )
-        total_rows += table_info['row_count']
-    
-    console.print(summary)
-    console.print(f"\n[bold]Total Records:[/bold] {total_rows:,}")
-    console.print(f"[bold]Total Tables:[/bold] {len(schema_data)}")
+    err.print(summary)
+    for item in report['slow']:
+        plan = "\n".join(f"  {step}" for step in item['plan'] or ["(no plan)"])
+        err.print(f"[bold red]Slow ({item['elapsed_ms']:.1f} ms, {item['rows']} rows):[/bold red] "
+                  f"{escape(short(item['sql'], 200))}\n[dim]{escape(plan)}[/dim]", highlight=False)
+
 
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
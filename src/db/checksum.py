@@ -0,0 +1,155 @@
+"""Checksum engine for snapshot files"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Supported digests:
+#   'sha256'       - single stream, compatible with snapshots created before this module
+#   'blake2b'      - single stream, faster than SHA-256 on 64-bit CPUs without SHA extensions
+#   'sha256-tree'  - SHA-256 of fixed-size leaves hashed in parallel, combined by a SHA-256 root
+#   'blake2b-tree' - BLAKE2b tree mode; same layout using BLAKE2's native tree parameters
+# SHA-256 wins on CPUs with SHA extensions, BLAKE2b on those without.
+ALGORITHMS = ('sha256', 'blake2b', 'sha256-tree', 'blake2b-tree')
+TREE_ALGORITHMS = ('sha256-tree', 'blake2b-tree')
+
+READ_BUFFER_SIZE = 4 * 1024 * 1024
+TREE_LEAF_SIZE = 64 * 1024 * 1024
+TREE_DIGEST_SIZE = 32
+
+
+def file_digest(file_path: Path, algorithm: str = 'sha256', workers: Optional[int] = None) -> str:
+    """
+    Hash a file with large reads into a reused buffer.
+
+    hashlib releases the GIL while hashing large buffers, so the leaves of
+    the tree algorithms are hashed on several cores at once.
+
+    Args:
+        file_path: File to hash
+        algorithm: One of ALGORITHMS
+        workers: Threads for tree algorithms (defaults to the executor's default)
+
+    Returns:
+        Hexadecimal digest
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown checksum algorithm '{algorithm}', expected one of {ALGORITHMS}")
+
+    if algorithm in TREE_ALGORITHMS:
+        return _tree_digest(Path(file_path), algorithm, workers)
+
+    hasher = hashlib.sha256() if algorithm == 'sha256' else hashlib.blake2b(digest_size=TREE_DIGEST_SIZE)
+    with open(file_path, 'rb', buffering=0) as f:
+        _hash_range(f, hasher, 0, None)
+    return hasher.hexdigest()
+
+
+def _tree_digest(file_path: Path, algorithm: str, workers: Optional[int]) -> str:
+    size = file_path.stat().st_size
+    leaf_count = max(1, -(-size // TREE_LEAF_SIZE))
+    tree_params = dict(
+        digest_size=TREE_DIGEST_SIZE, fanout=0, depth=2,
+        leaf_size=TREE_LEAF_SIZE, inner_size=TREE_DIGEST_SIZE
+    )
+
+    def new_node(index: int, depth: int):
+        if algorithm == 'sha256-tree':
+            # Domain-separate leaves from the root so a leaf digest can't pose as a tree digest
+            return hashlib.sha256(b"leaf\x00" if depth == 0 else b"root\x00" + size.to_bytes(8, 'big'))
+        return hashlib.blake2b(
+            node_offset=index, node_depth=depth, last_node=(depth == 1 or index == leaf_count - 1),
+            **tree_params
+        )
+
+    def hash_leaf(index: int) -> bytes:
+        hasher = new_node(index, 0)
+        with open(file_path, 'rb', buffering=0) as f:
+            _hash_range(f, hasher, index * TREE_LEAF_SIZE, TREE_LEAF_SIZE)
+        return hasher.digest()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        leaves = list(pool.map(hash_leaf, range(leaf_count)))
+
+    root = new_node(0, 1)
+    for leaf in leaves:
+        root.update(leaf)
+    return root.hexdigest()
+
+
+def _hash_range(f, hasher, offset: int, length: Optional[int]):
+    """Feed ``length`` bytes from ``offset`` (or to EOF) into hasher"""
+    buffer = bytearray(READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    f.seek(offset)
+    remaining = length
+    while remaining is None or remaining > 0:
+        want = READ_BUFFER_SIZE if remaining is None else min(READ_BUFFER_SIZE, remaining)
+        read = f.readinto(view[:want])
+        if not read:
+            break
+        hasher.update(view[:read])
+        if remaining is not None:
+            remaining -= read
+
+
+class DigestCache:
+    """
+    Remembers digests of files keyed by (size, mtime, inode).
+
+    A file whose stat key is unchanged is not hashed again. This trusts the
+    filesystem: corruption that leaves size and mtime intact is only caught
+    by a full re-hash (see SnapshotManager.restore_snapshot(full_verify=True)).
+    """
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self._entries: Optional[Dict[str, Any]] = None
+
+    def digest(self, file_path: Path, algorithm: str = 'sha256', workers: Optional[int] = None) -> str:
+        """Return the cached digest if the file is unchanged, else hash and remember it"""
+        key = self._stat_key(file_path, algorithm)
+        entries = self._load()
+        cached = entries.get(str(file_path))
+        if cached and cached['key'] == key:
+            return cached['digest']
+
+        digest = file_digest(file_path, algorithm, workers)
+        entries[str(file_path)] = {'key': key, 'digest': digest}
+        self._save()
+        return digest
+
+    def remember(self, file_path: Path, algorithm: str, digest: str):
+        """Record a digest computed elsewhere (e.g. while the file was written)"""
+        self._load()[str(file_path)] = {'key': self._stat_key(file_path, algorithm), 'digest': digest}
+        self._save()
+
+    def forget(self, file_path: Path):
+        """Drop the entry for a deleted file"""
+        if self._load().pop(str(file_path), None) is not None:
+            self._save()
+
+    @staticmethod
+    def _stat_key(file_path: Path, algorithm: str) -> list:
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino, algorithm]
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            try:
+                with open(self.cache_file) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
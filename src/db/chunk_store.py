@@ -0,0 +1,189 @@
+"""Content-addressed chunk store for incremental snapshots"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Set
+
+# Target chunk size; rounded to a whole number of database pages
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+MANIFEST_VERSION = 1
+
+
+def read_page_size(db_path: Path) -> int:
+    """
+    Read the page size from a SQLite file header (offset 16, big-endian).
+
+    Returns 4096 for files that are not SQLite databases or are too short.
+    """
+    with open(db_path, 'rb') as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        return 4096
+    page_size = int.from_bytes(header[16:18], 'big')
+    return 65536 if page_size == 1 else page_size
+
+
+class ChunkStore:
+    """
+    Stores files as page-aligned chunks named by their SHA-256.
+
+    A snapshot is a manifest listing chunk hashes in order; chunks already in
+    the store are not written again, so a snapshot after the first costs a
+    write proportional to the pages that changed.
+
+    Layout:
+        objects/ab/cdef...   chunk contents
+        <id>.manifest.json   written by the caller via write_file()
+    """
+
+    def __init__(self, objects_dir: Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.objects_dir = Path(objects_dir)
+        self.chunk_size = chunk_size
+
+    def write_file(self, source_path: Path, manifest_path: Path) -> Dict[str, Any]:
+        """
+        Split a file into chunks, store unseen ones and write its manifest.
+
+        Returns:
+            Manifest summary: size_bytes, checksum (SHA-256 of the whole file),
+            chunk_size, chunk_count, new_chunks, new_bytes
+        """
+        page_size = read_page_size(source_path)
+        chunk_size = max(page_size, self.chunk_size // page_size * page_size)
+
+        file_hash = hashlib.sha256()
+        chunks = []
+        size_bytes = new_chunks = new_bytes = 0
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                file_hash.update(chunk)
+                digest = hashlib.sha256(chunk).hexdigest()
+                if self._put(digest, chunk):
+                    new_chunks += 1
+                    new_bytes += len(chunk)
+                chunks.append(digest)
+                size_bytes += len(chunk)
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'size_bytes': size_bytes,
+            'page_size': page_size,
+            'chunk_size': chunk_size,
+            'checksum': file_hash.hexdigest(),
+            'chunks': chunks,
+        }
+        self._atomic_write(manifest_path, json.dumps(manifest).encode())
+
+        return {
+            'size_bytes': size_bytes,
+            'checksum': manifest['checksum'],
+            'chunk_size': chunk_size,
+            'chunk_count': len(chunks),
+            'new_chunks': new_chunks,
+            'new_bytes': new_bytes,
+        }
+
+    def restore_file(self, manifest_path: Path, target_path: Path) -> str:
+        """
+        Rebuild a file from its manifest.
+
+        The file is assembled next to the target and moved into place only
+        after the reassembled content matches the manifest checksum.
+
+        Returns:
+            SHA-256 of the restored file
+
+        Raises:
+            ValueError: If a chunk is missing or the content does not match
+        """
+        manifest = self.read_manifest(manifest_path)
+        target_path = Path(target_path)
+        tmp_path = target_path.with_name(f".{target_path.name}.restore")
+
+        file_hash = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as out:
+                for digest in manifest['chunks']:
+                    chunk = self._get(digest)
+                    file_hash.update(chunk)
+                    out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            if file_hash.hexdigest() != manifest['checksum']:
+                raise ValueError(f"Reassembled file does not match manifest checksum: {manifest_path}")
+            os.replace(tmp_path, target_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return file_hash.hexdigest()
+
+    def read_manifest(self, manifest_path: Path) -> Dict[str, Any]:
+        """Load a manifest written by write_file()"""
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def chunk_hashes(self, manifest_path: Path) -> Set[str]:
+        """Set of chunk hashes referenced by a manifest (empty if it is gone)"""
+        try:
+            return set(self.read_manifest(manifest_path)['chunks'])
+        except FileNotFoundError:
+            return set()
+
+    def remove_unreferenced(self, candidates: Iterable[str], live_manifests: Iterable[Path]) -> int:
+        """
+        Delete candidate chunks that no live manifest references.
+
+        Args:
+            candidates: Chunk hashes that may have become garbage (e.g. those of a deleted manifest)
+            live_manifests: Manifests of the snapshots that remain
+
+        Returns:
+            Number of chunks removed
+        """
+        referenced: Set[str] = set()
+        for manifest_path in live_manifests:
+            referenced |= self.chunk_hashes(manifest_path)
+
+        removed = 0
+        for digest in set(candidates) - referenced:
+            path = self._object_path(digest)
+            if path.exists():
+                path.unlink()
+                removed += 1
+        return removed
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _put(self, digest: str, chunk: bytes) -> bool:
+        """Store a chunk unless present; returns True if it was written"""
+        path = self._object_path(digest)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._atomic_write(path, chunk)
+        return True
+
+    def _get(self, digest: str) -> bytes:
+        try:
+            with open(self._object_path(digest), 'rb') as f:
+                chunk = f.read()
+        except FileNotFoundError:
+            raise ValueError(f"Chunk {digest} is missing from the snapshot store")
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupted")
+        return chunk
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes):
+        # Unique temp name so concurrent writers of the same chunk don't collide
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,357 @@
+"""Columnar query results: typed NumPy arrays with NULL masks, and chunked file export"""
+import json
+import re
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.db.sqlite_adapter import COLUMNAR_CHUNK_ROWS
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Optional: export falls back to .npz
+    pyarrow = None
+
+# Column kinds and the array dtype each is built as
+KINDS = {
+    'integer': np.int64,
+    'real': np.float64,
+    'text': object,
+    'blob': object,
+}
+
+EXPORT_FORMATS = ('parquet', 'feather', 'npz')
+SUFFIXES = {'parquet': '.parquet', 'feather': '.feather', 'npz': '.npz'}
+
+# Rows per exported chunk (one Parquet row group, Feather record batch or .npz chunk)
+DEFAULT_CHUNK_ROWS = COLUMNAR_CHUNK_ROWS
+
+# A batch: column name -> masked array, mask True where the value is NULL
+ColumnBatch = Dict[str, np.ma.MaskedArray]
+
+INT_AFFINITY = re.compile(r'INT', re.IGNORECASE)
+TEXT_AFFINITY = re.compile(r'CHAR|CLOB|TEXT', re.IGNORECASE)
+REAL_AFFINITY = re.compile(r'REAL|FLOA|DOUB', re.IGNORECASE)
+
+
+def declared_kind(declared_type: Optional[str]) -> Optional[str]:
+    """
+    Kind implied by a column's declared type, following SQLite's affinity rules.
+
+    None for BLOB/NUMERIC affinity and untyped columns, which can hold any
+    storage class and are inferred from their values instead.
+    """
+    if not declared_type:
+        return None
+    if INT_AFFINITY.search(declared_type):
+        return 'integer'
+    if TEXT_AFFINITY.search(declared_type):
+        return 'text'
+    if REAL_AFFINITY.search(declared_type):
+        return 'real'
+    return None
+
+
+def merge_kinds(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Narrowest kind holding values of both; integers widen to real, anything else mixed becomes text"""
+    if current is None or current == new:
+        return new or current
+    if new is None:
+        return current
+    if {current, new} == {'integer', 'real'}:
+        return 'real'
+    return 'text'
+
+
+def infer_kind(values: np.ndarray) -> Optional[str]:
+    """Kind of a batch of non-NULL values (None if there are none)"""
+    types = set(map(type, values))
+    if not types:
+        return None
+    if types <= {int}:
+        return 'integer'
+    if types <= {int, float}:
+        return 'real'
+    if types <= {bytes}:
+        return 'blob'
+    return 'text'
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def to_masked(values: np.ndarray, mask: np.ndarray, kind: str) -> np.ma.MaskedArray:
+    """Typed masked array from an object array of one column; NULL slots hold 0 or ''"""
+    if kind in ('integer', 'real'):
+        filled = values.copy()
+        filled[mask] = 0
+        data = filled.astype(KINDS[kind])
+    else:
+        data = values.copy()
+        data[mask] = '' if kind == 'text' else b''
+        present = ~mask
+        if kind == 'text' and set(map(type, data[present])) - {str}:
+            data[present] = [_as_text(value) for value in data[present]]
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+class ColumnBuilder:
+    """
+    Turns row batches from a cursor into typed column batches.
+
+    Each column keeps one kind across batches: its declared kind if known,
+    else the kind of its first non-NULL values. Later values that do not fit
+    widen it (see merge_kinds), and ``kinds`` reports the result.
+    """
+
+    def __init__(self, columns: Sequence[str], kinds: Optional[Dict[str, Optional[str]]] = None):
+        """
+        Args:
+            columns: Result column names, in cursor order
+            kinds: Known kinds per column (e.g. from declared_kind), None to infer
+        """
+        self.columns = list(columns)
+        self.kinds = {name: (kinds or {}).get(name) for name in self.columns}
+
+    def build(self, rows: List[tuple]) -> ColumnBatch:
+        table = np.empty((len(rows), len(self.columns)), dtype=object)
+        table[:] = rows
+        batch = {}
+        for j, name in enumerate(self.columns):
+            array = table[:, j]
+            mask = np.equal(array, None)
+            kind = merge_kinds(self.kinds[name], infer_kind(array[~mask]))
+            self.kinds[name] = kind
+            batch[name] = to_masked(array, mask, kind or 'text')
+        return batch
+
+    def empty(self) -> ColumnBatch:
+        """Zero-row batch, so files for empty results still carry their columns"""
+        return {
+            name: np.ma.MaskedArray(np.empty(0, dtype=KINDS[kind or 'text']), mask=np.zeros(0, dtype=bool))
+            for name, kind in self.kinds.items()
+        }
+
+
+def iter_column_batches(cursor, batch_size: int = DEFAULT_CHUNK_ROWS,
+                        kinds: Optional[Dict[str, Optional[str]]] = None) -> Iterator[ColumnBatch]:
+    """Column batches from an executed cursor whose row_factory is None"""
+    builder = ColumnBuilder([description[0] for description in cursor.description], kinds)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield builder.build(rows)
+
+
+def concat_batches(batches: Iterable[ColumnBatch]) -> ColumnBatch:
+    """One batch holding every row; columns whose kind widened are cast to the final dtype"""
+    parts: Dict[str, List[np.ma.MaskedArray]] = {}
+    for batch in batches:
+        for name, array in batch.items():
+            parts.setdefault(name, []).append(array)
+    result = {}
+    for name, arrays in parts.items():
+        dtype = np.result_type(*(array.dtype for array in arrays))
+        result[name] = np.ma.concatenate([array.astype(dtype) for array in arrays])
+    return result
+
+
+def batch_length(batch: ColumnBatch) -> int:
+    return len(next(iter(batch.values()))) if batch else 0
+
+
+def default_format() -> str:
+    """parquet when pyarrow is installed, npz otherwise"""
+    return 'parquet' if pyarrow is not None else 'npz'
+
+
+def format_for_path(path: str) -> Optional[str]:
+    suffix = Path(path).suffix.lower()
+    return next((fmt for fmt, known in SUFFIXES.items() if known == suffix), None)
+
+
+class NpzWriter:
+    """
+    Writes column batches into one .npz archive, a chunk at a time.
+
+    Members are streamed into the zip, so memory is bounded by one chunk.
+    Chunk i, column j is stored as ``chunk{i:06d}/c{j}.mask.npy`` plus either
+    ``.values.npy`` (integer/real) or Arrow-style ``.offsets.npy`` and
+    ``.utf8.npy`` (text) or ``.data.npy`` (blob). ``schema.json`` names
+    the columns and their kinds; read it back with read_npz.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED,
+                                    allowZip64=True)
+        self.chunks = 0
+        self.kinds: Dict[str, str] = {}
+
+    def write(self, batch: ColumnBatch, kinds: Dict[str, Optional[str]]):
+        prefix = f"chunk{self.chunks:06d}"
+        for j, (name, array) in enumerate(batch.items()):
+            kind = kinds.get(name) or 'text'
+            self.kinds[name] = merge_kinds(self.kinds.get(name), kind)
+            self._write_array(f"{prefix}/c{j}.mask.npy", np.ma.getmaskarray(array))
+            if kind in ('integer', 'real'):
+                self._write_array(f"{prefix}/c{j}.values.npy", array.data.astype(KINDS[kind], copy=False))
+            else:
+                # to_masked leaves only str in text columns and only bytes in blob columns
+                encoded = list(map(str.encode, array.data)) if kind == 'text' else list(array.data)
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+                self._write_array(f"{prefix}/c{j}.offsets.npy", offsets)
+                self._write_array(f"{prefix}/c{j}.{'utf8' if kind == 'text' else 'data'}.npy",
+                                  np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        self.chunks += 1
+
+    def _write_array(self, name: str, array: np.ndarray):
+        with self._zip.open(name, 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, array, allow_pickle=False)
+
+    def close(self):
+        schema = {'columns': [{'name': name, 'kind': kind} for name, kind in self.kinds.items()],
+                  'chunks': self.chunks}
+        self._zip.writestr('schema.json', json.dumps(schema))
+        self._zip.close()
+
+
+def read_npz(path: str) -> Iterator[ColumnBatch]:
+    """Batches of an archive written by NpzWriter, one per chunk"""
+    with zipfile.ZipFile(path) as archive:
+        schema = json.loads(archive.read('schema.json'))
+        members = set(archive.namelist())
+
+        def load(name):
+            with archive.open(name) as member:
+                return np.lib.format.read_array(member, allow_pickle=False)
+
+        for i in range(schema['chunks']):
+            batch = {}
+            for j, column in enumerate(schema['columns']):
+                prefix = f"chunk{i:06d}/c{j}"
+                mask = load(f"{prefix}.mask.npy")
+                if f"{prefix}.values.npy" in members:
+                    data = load(f"{prefix}.values.npy")
+                else:
+                    offsets = load(f"{prefix}.offsets.npy")
+                    is_text = f"{prefix}.utf8.npy" in members
+                    raw = load(f"{prefix}.{'utf8' if is_text else 'data'}.npy").tobytes()
+                    data = np.empty(len(mask), dtype=object)
+                    data[:] = [raw[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+                    if is_text:
+                        data[:] = [value.decode('utf-8') for value in data]
+                batch[column['name']] = np.ma.MaskedArray(data, mask=mask)
+            yield batch
+
+
+class ArrowWriter:
+    """Writes column batches as Parquet row groups or Feather (Arrow IPC) record batches"""
+
+    TYPES = {
+        'integer': 'int64',
+        'real': 'float64',
+        'text': 'string',
+        'blob': 'binary',
+    }
+
+    def __init__(self, path: str, fmt: str):
+        if pyarrow is None:
+            raise ValueError(f"{fmt} export requires the 'pyarrow' package; use format 'npz'")
+        self.path = path
+        self.format = fmt
+        self.chunks = 0
+        self._schema = None
+        self._writer = None
+
+    def write(self, batch: ColumnBatch, kinds: Dict[str, Optional[str]]):
+        arrays = [
+            pyarrow.array(array.data, type=getattr(pyarrow, self.TYPES[kinds.get(name) or 'text'])(),
+                          mask=np.ma.getmaskarray(array))
+            for name, array in batch.items()
+        ]
+        table = pyarrow.Table.from_arrays(arrays, names=list(batch))
+        if self._writer is None:
+            self._schema = table.schema
+            if self.format == 'parquet':
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pyarrow.ipc.new_file(self.path, self._schema)
+        elif table.schema != self._schema:
+            changed = [field.name for field in table.schema if field != self._schema.field(field.name)]
+            raise ValueError(
+                f"Column(s) {', '.join(changed)} changed type after {self.chunks} chunk(s); "
+                f"a {self.format} file has one schema, export to npz or CAST in SQL instead"
+            )
+        if self.format == 'parquet':
+            self._writer.write_table(table)
+        else:
+            for record_batch in table.to_batches():
+                self._writer.write_batch(record_batch)
+        self.chunks += 1
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path: str, fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+    return NpzWriter(path) if fmt == 'npz' else ArrowWriter(path, fmt)
+
+
+def write_batches(cursor, path: str, fmt: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  kinds: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Stream an executed cursor (row_factory None) into a columnar file.
+
+    Args:
+        cursor: Executed cursor
+        path: Output file
+        fmt: One of EXPORT_FORMATS (default: from the path suffix, else default_format())
+        chunk_rows: Rows per chunk
+        kinds: Known column kinds, e.g. from declared_kind
+
+    Returns:
+        {'path', 'format', 'rows', 'chunks', 'columns': {name: kind}, 'bytes'}
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+    fmt = fmt or format_for_path(path) or default_format()
+    builder = ColumnBuilder([description[0] for description in cursor.description], kinds)
+    writer = open_writer(path, fmt)
+    rows = 0
+    try:
+        while True:
+            batch_rows = cursor.fetchmany(chunk_rows)
+            if not batch_rows:
+                break
+            writer.write(builder.build(batch_rows), builder.kinds)
+            rows += len(batch_rows)
+        if not rows:
+            writer.write(builder.empty(), builder.kinds)
+    except BaseException:
+        writer.close()
+        Path(path).unlink(missing_ok=True)
+        raise
+    writer.close()
+    return {
+        'path': str(path),
+        'format': fmt,
+        'rows': rows,
+        'chunks': writer.chunks,
+        'columns': builder.kinds,
+        'bytes': Path(path).stat().st_size
+    }
@@ -0,0 +1,129 @@
+"""Streaming compression for snapshot files"""
+import gzip
+import hashlib
+import lzma
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # Optional: fall back to the stdlib codecs
+    zstandard = None
+
+CODECS = ('zstd', 'gzip', 'lzma')
+
+# Default level per codec and the file suffix it is stored under
+DEFAULT_LEVELS = {'zstd': 3, 'gzip': 6, 'lzma': 6}
+SUFFIXES = {'zstd': '.zst', 'gzip': '.gz', 'lzma': '.xz'}
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# What the codecs raise on damaged input (gzip.BadGzipFile is an OSError)
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error, lzma.LZMAError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def default_codec() -> str:
+    """zstd when the zstandard package is installed, gzip otherwise"""
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def _check_codec(codec: str):
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec '{codec}', expected one of {CODECS}")
+    if codec == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+
+
+def _open_writer(codec: str, raw, level: int):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=level)
+    return lzma.LZMAFile(raw, mode='wb', preset=level)
+
+
+def _open_reader(codec: str, raw):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    return lzma.LZMAFile(raw, mode='rb')
+
+
+def _read_chunks(reader, source_path: Path) -> Iterator[bytes]:
+    while True:
+        try:
+            chunk = reader.read(STREAM_CHUNK_SIZE)
+        except DECOMPRESSION_ERRORS as e:
+            raise ValueError(f"Compressed snapshot is corrupted: {source_path} ({e})") from e
+        if not chunk:
+            return
+        yield chunk
+
+
+def compress_file(source_path: Path, target_path: Path, codec: str, level: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compress a file chunk by chunk, hashing the uncompressed bytes in the same pass.
+
+    Returns:
+        size_bytes (uncompressed), compressed_bytes, checksum (SHA-256 of the
+        uncompressed content), compression, compression_level
+    """
+    _check_codec(codec)
+    level = DEFAULT_LEVELS[codec] if level is None else level
+
+    sha256 = hashlib.sha256()
+    size_bytes = 0
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as raw:
+        with _open_writer(codec, raw, level) as writer:
+            for chunk in iter(lambda: src.read(STREAM_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                writer.write(chunk)
+                size_bytes += len(chunk)
+
+    return {
+        'size_bytes': size_bytes,
+        'compressed_bytes': Path(target_path).stat().st_size,
+        'checksum': sha256.hexdigest(),
+        'compression': codec,
+        'compression_level': level,
+    }
+
+
+def decompress_file(source_path: Path, target_path: Path, codec: str, expected_checksum: str) -> str:
+    """
+    Decompress straight into the target, verifying the content on the way.
+
+    The output is written next to the target and moved into place only if
+    its SHA-256 matches ``expected_checksum``.
+
+    Returns:
+        SHA-256 of the decompressed content
+
+    Raises:
+        ValueError: If the compressed file is damaged or its content does not match
+    """
+    _check_codec(codec)
+    target_path = Path(target_path)
+    tmp_path = target_path.with_name(f".{target_path.name}.restore")
+
+    sha256 = hashlib.sha256()
+    try:
+        with open(source_path, 'rb') as raw, open(tmp_path, 'wb') as out:
+            with _open_reader(codec, raw) as reader:
+                for chunk in _read_chunks(reader, source_path):
+                    sha256.update(chunk)
+                    out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        if sha256.hexdigest() != expected_checksum:
+            raise ValueError(f"Decompressed snapshot does not match its checksum: {source_path}")
+        os.replace(tmp_path, target_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    return sha256.hexdigest()
@@ -0,0 +1,166 @@
+"""Thread-safe pool of SQLiteAdapter connections"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.db.sqlite_adapter import DEFAULT_CACHED_STATEMENTS, SQLiteAdapter, validate_pragmas
+
+DEFAULT_POOL_SIZE = 4
+
+# Seconds acquire() waits for a connection before raising TimeoutError
+DEFAULT_ACQUIRE_TIMEOUT = 30.0
+
+# Inspection defaults: 64 MiB page cache, 256 MiB memory map, temp b-trees in RAM
+INSPECTION_PRAGMAS = {'cache_size': -64 * 1024, 'mmap_size': 256 * 1024 * 1024, 'temp_store': 'memory'}
+
+
+class ConnectionPool:
+    """
+    Reuses connected SQLiteAdapters across threads.
+
+    Connections are opened lazily up to ``size`` and handed out one thread
+    at a time; idle ones are reused most-recently-returned first so their
+    page and statement caches stay warm. Pools default to mode='ro', which
+    never takes a write lock on the database.
+
+    Usage:
+        pool = ConnectionPool("data/app.db")
+        with pool.connection() as db:
+            db.get_full_schema()
+    """
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE, mode: str = 'ro',
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS, cache_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: Database file
+            size: Maximum number of open connections
+            mode: Open mode for every connection (see sqlite_adapter.OPEN_MODES)
+            pragmas: Per-connection PRAGMAs (default: INSPECTION_PRAGMAS)
+            cached_statements: Prepared statements cached per connection
+            cache_dir: Metadata cache directory passed to each adapter
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.mode = mode
+        self.pragmas = validate_pragmas(INSPECTION_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self.cache_dir = cache_dir
+        self._idle: List[SQLiteAdapter] = []
+        self._open = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT) -> SQLiteAdapter:
+        """
+        Take a connection, opening one if the pool is below its size.
+
+        Raises:
+            TimeoutError: If no connection becomes free within ``timeout`` seconds
+            RuntimeError: If the pool is closed
+        """
+        with self._available:
+            if not self._available.wait_for(lambda: self._closed or self._idle or self._open < self.size,
+                                            timeout):
+                raise TimeoutError(f"No connection to {self.db_path} available within {timeout}s")
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+
+        # Connect outside the lock so slow opens do not block releases
+        try:
+            return SQLiteAdapter(
+                self.db_path, cache_dir=self.cache_dir, mode=self.mode, pragmas=self.pragmas,
+                cached_statements=self.cached_statements, check_same_thread=False
+            ).connect()
+        except BaseException:
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise
+
+    def release(self, adapter: SQLiteAdapter, discard: bool = False):
+        """Return a connection; discard it instead if it may be unusable"""
+        if not discard and adapter.conn.in_transaction:
+            try:
+                adapter.conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        with self._available:
+            if discard or self._closed:
+                self._open -= 1
+            else:
+                self._idle.append(adapter)
+            self._available.notify()
+        if discard or self._closed:
+            adapter.close()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT) -> Iterator[SQLiteAdapter]:
+        """Borrow a connection for the duration of a with block"""
+        adapter = self.acquire(timeout)
+        try:
+            yield adapter
+        except sqlite3.DatabaseError as e:
+            # Errors like a corrupt or vanished file leave the connection in doubt
+            self.release(adapter, discard=not isinstance(e, sqlite3.OperationalError))
+            raise
+        except BaseException:
+            self.release(adapter)
+            raise
+        self.release(adapter)
+
+    def stats(self) -> Dict[str, int]:
+        """Open, idle and in-use connection counts"""
+        with self._available:
+            return {'open': self._open, 'idle': len(self._idle), 'in_use': self._open - len(self._idle)}
+
+    def close(self):
+        """Close idle connections; connections in use are closed when released"""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._available.notify_all()
+        for adapter in idle:
+            adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_shared_pools: Dict[Tuple, ConnectionPool] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_pool(db_path: str, **options) -> ConnectionPool:
+    """
+    Process-wide pool for a database, created on first use.
+
+    Pools are keyed by the database path and options, so callers asking for
+    the same configuration share connections.
+    """
+    key = (db_path, tuple(sorted((name, repr(value)) for name, value in options.items())))
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None or pool._closed:
+            pool = _shared_pools[key] = ConnectionPool(db_path, **options)
+        return pool
+
+
+def close_shared_pools():
+    """Close every pool created by shared_pool()"""
+    with _shared_lock:
+        pools = list(_shared_pools.values())
+        _shared_pools.clear()
+    for pool in pools:
+        pool.close()
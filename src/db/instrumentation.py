@@ -0,0 +1,309 @@
+"""Opt-in timing of the SQL run through SQLiteAdapter connections"""
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Executions at least this slow are listed with their EXPLAIN QUERY PLAN
+DEFAULT_SLOW_MS = 100.0
+
+# Slow executions kept for the report (the slowest ones)
+MAX_SLOW_STATEMENTS = 20
+
+# Statements with a query plan; the rest (PRAGMA, BEGIN, DDL) are only timed
+_PLANNED = re.compile(r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE|VALUES)\b", re.IGNORECASE)
+_PRAGMA = re.compile(r"^\s*PRAGMA\b|\bpragma_\w+\s*\(", re.IGNORECASE)
+# A plan step reading every row of a table: "SCAN users" / "SCAN TABLE users" (SQLite < 3.36),
+# but not index, virtual table, subquery or constant-row scans
+_TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW|\()(\S+)(?!.*\b(?:INDEX|VIRTUAL TABLE)\b)")
+
+_active: Optional['QueryProfiler'] = None
+
+
+def activate(profiler: Optional['QueryProfiler']):
+    """Instrument every SQLiteAdapter connected from now on (None turns it off again)"""
+    global _active
+    _active = profiler
+
+
+def active_profiler() -> Optional['QueryProfiler']:
+    return _active
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tables (or their aliases) a query plan reads in full"""
+    return [match.group(1) for match in map(_TABLE_SCAN.match, plan) if match]
+
+
+class QueryProfiler:
+    """
+    Collects per-statement timings from instrumented connections.
+
+    Connections from connect() hand out cursors that time execute() and
+    every fetch, so a statement's time includes stepping through its rows,
+    not only preparing it. Statements are grouped by their text
+    (whitespace collapsed); parameters are never recorded.
+
+    The first time a SELECT/DML statement is seen its EXPLAIN QUERY PLAN is
+    read (a prepare, no rows are touched) to count full table scans; plans
+    are shown for executions slower than ``slow_ms``. With a ``tracer``
+    each execution is also reported as an OpenTelemetry span.
+
+    One profiler can be shared by the connections of a pool.
+    """
+
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_MS, explain: bool = True, tracer: Any = None):
+        """
+        Args:
+            slow_ms: Executions at least this slow are kept with their plan
+            explain: Read query plans (needed for scan counts and slow plans)
+            tracer: OpenTelemetry tracer to emit a span per execution, e.g. from otel_tracer()
+        """
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.tracer = tracer
+        self.statements: Dict[str, Dict[str, Any]] = {}
+        self.slow: List[Dict[str, Any]] = []
+        self.pragma_calls = 0
+        self.full_scans = 0
+        self._plans: Dict[str, Optional[List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def connect(self, *args, **kwargs) -> sqlite3.Connection:
+        """sqlite3.connect() returning an instrumented connection"""
+        conn = sqlite3.connect(*args, factory=InstrumentedConnection, **kwargs)
+        conn.profiler = self
+        return conn
+
+    def report(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Totals and per-statement timings, slowest first.
+
+        Returns:
+            {'statements': [{'sql', 'calls', 'elapsed_ms', 'max_ms', 'rows', 'full_scans', 'scanned'}],
+             'slow': [{'sql', 'elapsed_ms', 'rows', 'plan'}],
+             'calls', 'elapsed_ms', 'rows', 'pragma_calls', 'full_scans'}
+        """
+        with self._lock:
+            statements = sorted((dict(stats) for stats in self.statements.values()),
+                                key=lambda stats: stats['elapsed'], reverse=True)
+            slow = sorted(self.slow, key=lambda item: item['elapsed_ms'], reverse=True)[:MAX_SLOW_STATEMENTS]
+            pragma_calls, scans = self.pragma_calls, self.full_scans
+        for stats in statements:
+            stats['elapsed_ms'] = round(stats.pop('elapsed') * 1000, 2)
+            stats['max_ms'] = round(stats.pop('max') * 1000, 2)
+        return {
+            'statements': statements[:top] if top else statements,
+            'slow': slow,
+            'calls': sum(stats['calls'] for stats in statements),
+            'elapsed_ms': round(sum(stats['elapsed_ms'] for stats in statements), 2),
+            'rows': sum(stats['rows'] for stats in statements),
+            'pragma_calls': pragma_calls,
+            'full_scans': scans
+        }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.slow.clear()
+            self.pragma_calls = self.full_scans = 0
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _begin(self, conn: sqlite3.Connection, sql: str, parameters: Any) -> '_Execution':
+        key = " ".join(sql.split())
+        with self._lock:
+            known = key in self._plans
+        if not known:
+            plan = self._explain(conn, sql, parameters) if self.explain and _PLANNED.match(sql) else None
+            with self._lock:
+                self._plans[key] = plan
+        return _Execution(key)
+
+    def _explain(self, conn: sqlite3.Connection, sql: str, parameters: Any) -> Optional[List[str]]:
+        if parameters is None:
+            return None
+        try:
+            # A plain cursor, so reading the plan is not itself profiled
+            return [row[3] for row in sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+        except sqlite3.Error:
+            return None
+
+    def _finish(self, execution: '_Execution'):
+        key = execution.sql
+        with self._lock:
+            plan = self._plans.get(key)
+            stats = self.statements.get(key)
+            if stats is None:
+                scanned = full_scans(plan or [])
+                stats = self.statements[key] = {'sql': key, 'calls': 0, 'elapsed': 0.0, 'max': 0.0, 'rows': 0,
+                                                'full_scans': 0, 'scanned': scanned}
+            stats['calls'] += 1
+            stats['elapsed'] += execution.elapsed
+            stats['max'] = max(stats['max'], execution.elapsed)
+            stats['rows'] += execution.rows
+            stats['full_scans'] += len(stats['scanned'])
+            self.full_scans += len(stats['scanned'])
+            if _PRAGMA.search(key):
+                self.pragma_calls += 1
+            elapsed_ms = execution.elapsed * 1000
+            if elapsed_ms >= self.slow_ms:
+                self.slow.append({'sql': key, 'elapsed_ms': round(elapsed_ms, 2), 'rows': execution.rows,
+                                  'plan': plan})
+                if len(self.slow) > 2 * MAX_SLOW_STATEMENTS:
+                    self.slow.sort(key=lambda item: item['elapsed_ms'], reverse=True)
+                    del self.slow[MAX_SLOW_STATEMENTS:]
+        if self.tracer is not None:
+            self._span(execution, stats['scanned'])
+
+    def _span(self, execution: '_Execution', scanned: List[str]):
+        # The span covers the time spent inside SQLite, not the caller's work between fetches
+        operation = execution.sql.split(" ", 1)[0].upper()
+        span = self.tracer.start_span(f"sqlite {operation}", start_time=execution.started_ns, attributes={
+            'db.system.name': 'sqlite',
+            'db.operation.name': operation,
+            'db.query.text': execution.sql,
+            'db.response.returned_rows': execution.rows,
+            'db.sqlite.full_scans': len(scanned),
+        })
+        span.end(end_time=execution.started_ns + int(execution.elapsed * 1e9))
+
+
+class _Execution:
+    """Time and rows of one execute() until its cursor is exhausted, re-executed or closed"""
+    __slots__ = ('sql', 'started_ns', 'elapsed', 'rows', 'done')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.started_ns = time.time_ns()
+        self.elapsed = 0.0
+        self.rows = 0
+        self.done = False
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor reporting each execution and the rows fetched from it to the connection's profiler"""
+    _execution = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self._execution = self.connection.profiler._begin(self.connection, sql, parameters)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        self._execution = self.connection.profiler._begin(self.connection, sql, None)
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self._finish()
+        self._execution = self.connection.profiler._begin(self.connection, sql_script, None)
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._fetched(0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._fetched(len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._fetched(len(rows), True)
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._fetched(0, True)
+            raise
+        self._fetched(1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._execution is not None:
+                self._execution.elapsed += time.perf_counter() - started
+
+    def _fetched(self, rows: int, exhausted: bool):
+        if self._execution is not None:
+            self._execution.rows += rows
+            if exhausted:
+                self._finish()
+
+    def _finish(self):
+        execution = self._execution
+        if execution is not None and not execution.done:
+            execution.done = True
+            self.connection.profiler._finish(execution)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are InstrumentedCursors"""
+    profiler: Optional[QueryProfiler] = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def otel_tracer(name: str = "db-agent.sqlite"):
+    """
+    Tracer from the global OpenTelemetry provider.
+
+    Spans go wherever the provider exports them; see setup_otlp_tracing,
+    or run under ``opentelemetry-instrument``.
+    """
+    try:
+        # Imported on demand: the adapter imports this module, and OpenTelemetry is slow to import
+        from opentelemetry import trace
+    except ImportError as e:  # Optional: only needed for spans
+        raise RuntimeError("OpenTelemetry is not installed (pip install opentelemetry-sdk)") from e
+    return trace.get_tracer(name)
+
+
+def setup_otlp_tracing(service_name: str = "db-agent"):
+    """
+    Install an SDK tracer provider exporting over OTLP/gRPC.
+
+    The endpoint and headers come from the standard OTEL_EXPORTER_OTLP_*
+    environment variables. Call shutdown() on the returned provider to
+    flush pending spans before exiting.
+    """
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as e:
+        raise RuntimeError(f"OpenTelemetry SDK or OTLP exporter is not installed: {e}") from e
+    provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return provider
@@ -0,0 +1,98 @@
+"""On-disk cache for database introspection results"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Per-user default under $XDG_CACHE_HOME (or ~/.cache), so commands run from any
+# directory share one cache and leave nothing behind; override with DB_AGENT_CACHE_DIR
+CACHE_DIR_NAME = "db-agent"
+
+
+def default_cache_dir() -> Path:
+    """Resolve the cache directory from the environment or the per-user default"""
+    if os.environ.get("DB_AGENT_CACHE_DIR"):
+        return Path(os.environ["DB_AGENT_CACHE_DIR"])
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / CACHE_DIR_NAME
+
+
+def file_fingerprint(db_path: str) -> Optional[List[int]]:
+    """
+    Cheap change detector for a database file.
+
+    Combines size and mtime of the main file and its WAL, since in WAL mode
+    commits only touch the -wal file until the next checkpoint.
+
+    Returns:
+        List of stat values, or None if the file does not exist (e.g. ':memory:')
+    """
+    fingerprint = []
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            stat = path.stat()
+        except OSError:
+            if not fingerprint:
+                return None
+            fingerprint.extend([0, 0])
+            continue
+        fingerprint.extend([stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def cache_path(db_path: str, suffix: str, cache_dir: Optional[str] = None) -> Path:
+    """Per-database file in the cache directory, named after the resolved database path"""
+    db_path = Path(db_path).resolve()
+    digest = hashlib.sha1(str(db_path).encode()).hexdigest()[:16]
+    return (Path(cache_dir) if cache_dir else default_cache_dir()) / f"{db_path.stem}-{digest}{suffix}"
+
+
+class MetadataCache:
+    """
+    JSON cache of introspection results, one file per database.
+
+    Each section (e.g. 'row_counts') is stored together with the key it was
+    computed under; a lookup with a different key is a miss. The cache is
+    best-effort: unreadable or unwritable cache files are ignored.
+    """
+
+    def __init__(self, db_path: str, cache_dir: Optional[str] = None):
+        self.db_path = Path(db_path).resolve()
+        self.cache_file = cache_path(self.db_path, ".json", cache_dir)
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty = False
+
+    def get(self, section: str, key: Any) -> Optional[Any]:
+        """Return the cached value for a section if it was stored under ``key``"""
+        entry = self._load().get(section)
+        if entry is None or entry.get('key') != key:
+            return None
+        return entry.get('value')
+
+    def set(self, section: str, key: Any, value: Any):
+        """Store a value for a section; written to disk on flush()"""
+        self._load()[section] = {'key': key, 'value': value}
+        self._dirty = True
+
+    def flush(self):
+        """Write pending changes atomically"""
+        if not self._dirty:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(self._data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            return
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(self.cache_file) as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
@@ -0,0 +1,197 @@
+"""Indexed snapshot metadata catalog"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Seconds to wait for another process holding a lock before giving up
+LOCK_TIMEOUT = 60.0
+
+CATALOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id TEXT PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        pinned INTEGER NOT NULL DEFAULT 0,
+        storage TEXT NOT NULL DEFAULT 'file',
+        snapshot_path TEXT NOT NULL,
+        metadata TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_snapshots_pinned ON snapshots(pinned, timestamp);
+"""
+
+
+@contextmanager
+def exclusive_lock(lock_path: Path, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    Cross-process exclusive lock built on a SQLite write transaction.
+
+    Portable (no fcntl/msvcrt) and released by the OS if the holder dies.
+    """
+    conn = sqlite3.connect(lock_path, timeout=timeout, isolation_level=None)
+    try:
+        conn.execute("BEGIN EXCLUSIVE")
+        yield
+    finally:
+        conn.close()  # Rolls back the empty transaction, releasing the lock
+
+
+class SnapshotCatalog:
+    """
+    Snapshot metadata kept in a small SQLite database.
+
+    Lookups by id, timestamp ordering and retention queries use indexes, and
+    every write is a single transaction, so several agents can share one
+    snapshots directory. The full metadata dict is stored as JSON; the
+    indexed columns mirror the fields that are queried.
+    """
+
+    def __init__(self, catalog_path: Path, legacy_json: Optional[Path] = None):
+        """
+        Args:
+            catalog_path: SQLite file holding the catalog
+            legacy_json: snapshots.json from older versions, imported once if present
+        """
+        self.catalog_path = Path(catalog_path)
+        self.conn = sqlite3.connect(self.catalog_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self._enable_wal()
+        self.conn.executescript(CATALOG_SCHEMA)
+        if legacy_json is not None:
+            self._import_legacy(Path(legacy_json))
+
+    def close(self):
+        """Close connection"""
+        self.conn.close()
+
+    def add(self, metadata: Dict[str, Any]):
+        """Insert metadata for a new snapshot"""
+        with self._write() as conn:
+            self._insert(conn, metadata)
+
+    def get(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata for one snapshot, or None"""
+        row = self.conn.execute(
+            "SELECT metadata, pinned FROM snapshots WHERE id = ?", (snapshot_id,)
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All snapshots, newest first"""
+        rows = self.conn.execute("SELECT metadata, pinned FROM snapshots ORDER BY timestamp DESC")
+        return [self._decode(row) for row in rows]
+
+    def set_pinned(self, snapshot_id: str, pinned: bool) -> bool:
+        """Pin or unpin; returns False if the snapshot does not exist"""
+        with self._write() as conn:
+            cursor = conn.execute("UPDATE snapshots SET pinned = ? WHERE id = ?", (int(pinned), snapshot_id))
+            return cursor.rowcount > 0
+
+    def delete_many(self, snapshot_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Remove several snapshots in one transaction.
+
+        Returns:
+            Metadata of the snapshots that were removed
+        """
+        with self._write() as conn:
+            removed = []
+            for snapshot_id in snapshot_ids:
+                row = conn.execute(
+                    "SELECT metadata, pinned FROM snapshots WHERE id = ?", (snapshot_id,)
+                ).fetchone()
+                if row:
+                    removed.append(self._decode(row))
+            conn.executemany("DELETE FROM snapshots WHERE id = ?", [(s['id'],) for s in removed])
+            return removed
+
+    def pop_unpinned_beyond(self, keep: int) -> List[Dict[str, Any]]:
+        """
+        Remove all but the newest ``keep`` unpinned snapshots in one transaction.
+
+        Returns:
+            Metadata of the snapshots that were removed, oldest first
+        """
+        with self._write() as conn:
+            rows = conn.execute("""
+                SELECT metadata, pinned FROM snapshots
+                WHERE pinned = 0
+                ORDER BY timestamp DESC
+                LIMIT -1 OFFSET ?
+            """, (max(keep, 0),)).fetchall()
+            removed = [self._decode(row) for row in reversed(rows)]
+            conn.executemany("DELETE FROM snapshots WHERE id = ?", [(s['id'],) for s in removed])
+            return removed
+
+    def manifest_paths(self) -> List[Path]:
+        """Manifests of all chunked snapshots, i.e. everything the chunk store must keep"""
+        rows = self.conn.execute("SELECT snapshot_path FROM snapshots WHERE storage = 'chunked'")
+        return [Path(row[0]) for row in rows]
+
+    def store_lock(self) -> Iterator[None]:
+        """Exclusive lock for operations on shared snapshot storage (chunk writes vs. garbage collection)"""
+        return exclusive_lock(self.catalog_path.with_name("store.lock"))
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Immediate write transaction: takes the write lock up front so read-modify-write is atomic"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, metadata: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO snapshots (id, timestamp, pinned, storage, snapshot_path, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                metadata['id'],
+                metadata['timestamp'],
+                int(metadata.get('pinned', False)),
+                metadata.get('storage', 'file'),
+                metadata['snapshot_path'],
+                json.dumps(metadata),
+            )
+        )
+
+    @staticmethod
+    def _decode(row) -> Dict[str, Any]:
+        metadata = json.loads(row[0])
+        metadata['pinned'] = bool(row[1])  # The column is authoritative; the JSON copy is not updated
+        return metadata
+
+    def _enable_wal(self):
+        """WAL lets readers run alongside a writer; the mode switch ignores the busy timeout, so retry it"""
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                if self.conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+                    self.conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _import_legacy(self, legacy_json: Path):
+        """Move snapshots.json into the catalog once, then rename it out of the way"""
+        if not legacy_json.exists():
+            return
+        with self._write() as conn:
+            if not legacy_json.exists():
+                return  # Another process migrated it while we waited for the lock
+            with open(legacy_json) as f:
+                snapshots = json.load(f).get('snapshots', [])
+            for metadata in snapshots:
+                if not conn.execute("SELECT 1 FROM snapshots WHERE id = ?", (metadata['id'],)).fetchone():
+                    self._insert(conn, metadata)
+            os.replace(legacy_json, legacy_json.with_suffix('.json.migrated'))
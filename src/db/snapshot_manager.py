@@ -1,17 +1,42 @@
 """Snapshot Manager - Git-inspired database backups"""
+import os
 import shutil
-import hashlib
-import json
+import sqlite3
+import time
 import uuid
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
+
+from src.db.checksum import ALGORITHMS, DigestCache, file_digest
+from src.db.chunk_store import ChunkStore
+from src.db.compression import SUFFIXES, compress_file, decompress_file, default_codec
+from src.db.snapshot_catalog import SnapshotCatalog
+from src.db.snapshot_diff import DEFAULT_MAX_ROWS, SnapshotDiffer
+from src.db.sqlite_adapter import SQLiteAdapter
+
+# How snapshot contents are stored:
+#   'file'       - full copy of the database file per snapshot
+#   'chunked'    - page-aligned chunks in a content-addressed store, shared between snapshots
+#   'compressed' - one compressed file per snapshot (zstd if installed, else gzip/lzma)
+STORAGE_FORMATS = ('file', 'chunked', 'compressed')
+
+# How the database is read when snapshotting:
+#   'backup' - SQLite online backup API, N pages per step, writers proceed between steps
+#   'copy'   - raw file copy; fast, but not safe against concurrent writers. A non-empty
+#              -wal file is checkpointed into the database first, or the copy is refused
+SNAPSHOT_METHODS = ('copy', 'backup')
+
+# Defaults for the online backup: 1024 pages is 4 MiB per step at the default page size
+DEFAULT_PAGES_PER_STEP = 1024
+DEFAULT_STEP_SLEEP = 0.0
 
 
 class SnapshotManager:
     """
     Manages database snapshots (backups) with Git-inspired functionality.
-    
+
     Responsibilities:
     - Create snapshots (backups) of databases
     - Store metadata about each snapshot
@@ -19,356 +44,488 @@ class SnapshotManager:
     - Verify snapshot integrity using checksums
     - List and manage snapshot lifecycle
     """
-    
-    def __init__(self, db_path: str, snapshots_dir: str = "data/snapshots"):
+
+    def __init__(self, db_path: str, snapshots_dir: str = "data/snapshots", storage: str = 'file',
+                 method: str = 'backup', checksum_algorithm: str = 'sha256-tree',
+                 compression: Optional[str] = None, compression_level: Optional[int] = None):
         """
         Initialize the snapshot manager.
-        
+
         Args:
             db_path: Path to the database file to snapshot
             snapshots_dir: Directory where snapshots will be stored
+            storage: Default storage format for new snapshots (see STORAGE_FORMATS)
+            method: Default way of reading the database ('backup' or 'copy')
+            checksum_algorithm: Digest for new 'file' snapshots (see checksum.ALGORITHMS);
+                                chunked and compressed snapshots always use SHA-256, computed
+                                in the same pass that writes them
+            compression: Codec for compressed snapshots ('zstd', 'gzip', 'lzma'; default: best available)
+            compression_level: Codec level (default: the codec's own default)
         """
+        if storage not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown storage format '{storage}', expected one of {STORAGE_FORMATS}")
+        if method not in SNAPSHOT_METHODS:
+            raise ValueError(f"Unknown snapshot method '{method}', expected one of {SNAPSHOT_METHODS}")
+        if checksum_algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown checksum algorithm '{checksum_algorithm}', expected one of {ALGORITHMS}")
+
         self.db_path = Path(db_path)
         self.snapshots_dir = Path(snapshots_dir)
+        # Pre-catalog metadata file, imported into the catalog on first use
         self.metadata_file = self.snapshots_dir / "snapshots.json"
-        
-        # TODO: Create snapshots directory if it doesn't exist
-        Path.mkdir()
-        # HINT: Use Path.mkdir() with appropriate parameters
-        # Remember: You want to create parent directories and not error if it exists
-        
-    
-    def create_snapshot(self, description: str) -> str:
+        self.storage = storage
+        self.method = method
+        self.checksum_algorithm = checksum_algorithm
+        self.compression = compression or default_codec()
+        self.compression_level = compression_level
+        self.chunk_store = ChunkStore(self.snapshots_dir / "objects")
+        self.digests = DigestCache(self.snapshots_dir / "digests.json")
+
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = SnapshotCatalog(self.snapshots_dir / "catalog.db", legacy_json=self.metadata_file)
+
+    def create_snapshot(self, description: str, storage: Optional[str] = None, method: Optional[str] = None,
+                        pages_per_step: int = DEFAULT_PAGES_PER_STEP, step_sleep: float = DEFAULT_STEP_SLEEP,
+                        progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
         """
         Create a snapshot (backup) of the database.
-        
+
         This is like 'git commit' - it saves the current state.
-        
+
         Args:
             description: Human-readable description (like a commit message)
-            
+            storage: Storage format for this snapshot (defaults to the manager's)
+            method: 'backup' or 'copy' (defaults to the manager's)
+            pages_per_step: Backup only - pages copied per step (-1 copies everything in one step)
+            step_sleep: Backup only - seconds to pause between steps so writers can commit
+            progress: Backup only - called after each step with copied_pages, total_pages,
+                      elapsed_seconds and bytes_per_second
+
         Returns:
             snapshot_id: Unique identifier for this snapshot
-            
+
         Steps:
         1. Generate unique snapshot ID
-        2. Copy database file to snapshots directory
+        2. Copy database file to snapshots directory (or chunk it into the store)
         3. Calculate checksum for integrity verification
-        4. Capture metadata (row counts, size, etc.)
-        5. Save metadata to snapshots.json
-        """
-        # TODO: Generate unique snapshot ID
-        # HINT: Use format "snap_{timestamp}_{short_uuid}"
-        # timestamp format: "%Y%m%d_%H%M%S"
-        # short_uuid: first 8 characters of uuid.uuid4()
-        snapshot_id = None  # Replace with your implementation
-        
-        # TODO: Create the snapshot file path
-        # HINT: snapshots_dir / f"{snapshot_id}.db"
-        snapshot_path = None  # Replace with your implementation
-        
-        # TODO: Copy the database file to snapshot location
-        # HINT: Use shutil.copy2() for copying with metadata preservation
-        # HINT: Wrap in try/except to handle disk full or permission errors
-        # If copy fails, clean up partial file and raise exception
-        
-        
-        # TODO: Calculate checksum of the snapshot file
-        # HINT: Call self._calculate_checksum(snapshot_path)
-        checksum = None  # Replace with your implementation
-        
-        # TODO: Get row counts for each table
-        # HINT: You'll need to import and use SQLiteAdapter
-        # HINT: Connect to the ORIGINAL db_path, get all tables, get row count for each
-        # Store as: {"users": 1100, "orders": 530, "products": 100}
-        table_row_counts = {}  # Replace with your implementation
-        
-        # TODO: Build metadata dictionary
-        # Include: id, timestamp (ISO format), description, db_path, snapshot_path,
-        #          size_bytes, checksum, table_row_counts, pinned (default False)
-        metadata = {
-            # Fill this in
-        }
-        
-        # TODO: Save metadata to snapshots.json
-        # HINT: Call self._save_metadata(metadata)
-        
-        
+        4. Capture metadata (row counts of the copy, size, etc.)
+        5. Save metadata to the snapshot catalog
+        """
+        storage = storage or self.storage
+        method = method or self.method
+        if storage not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown storage format '{storage}', expected one of {STORAGE_FORMATS}")
+        if method not in SNAPSHOT_METHODS:
+            raise ValueError(f"Unknown snapshot method '{method}', expected one of {SNAPSHOT_METHODS}")
+        if not self.db_path.exists():
+            raise ValueError(f"Database not found: {self.db_path}")
+
+        snapshot_id = self._generate_snapshot_id()
+        storage_info: Dict[str, Any] = {}
+        if storage == 'chunked':
+            snapshot_path = self.snapshots_dir / f"{snapshot_id}.manifest.json"
+        elif storage == 'compressed':
+            snapshot_path = self.snapshots_dir / f"{snapshot_id}.db{SUFFIXES[self.compression]}"
+        else:
+            snapshot_path = self.snapshots_dir / f"{snapshot_id}.db"
+
+        # The database is copied straight to the snapshot file, or to a scratch file that is then chunked/compressed
+        copy_path = snapshot_path if storage == 'file' else self.snapshots_dir / f".{snapshot_id}.copy.db"
+
+        try:
+            if method == 'backup':
+                storage_info['backup_stats'] = self._backup_database(copy_path, pages_per_step, step_sleep, progress)
+            else:
+                self._copy_database(copy_path)
+            # Count the copy itself: the live database may have moved on since, and its
+            # counts would include WAL frames a raw copy does not have
+            table_row_counts = self._get_row_counts(copy_path)
+            self._discard_sidecar_files(copy_path)
+
+            # Chunk writes and registering the manifest happen under the store lock, so garbage
+            # collection in another process can't remove a chunk this snapshot found already stored
+            with self.catalog.store_lock() if storage == 'chunked' else nullcontext():
+                if storage == 'chunked':
+                    # Only chunks not already in the store are written
+                    storage_info.update(self.chunk_store.write_file(copy_path, snapshot_path))
+                    checksum = storage_info.pop('checksum')
+                    checksum_algorithm = 'sha256'
+                    size_bytes = storage_info.pop('size_bytes')
+                elif storage == 'compressed':
+                    # Streamed through the compressor; checksum of the raw bytes is taken on the way
+                    storage_info.update(compress_file(
+                        copy_path, snapshot_path, self.compression, self.compression_level
+                    ))
+                    checksum = storage_info.pop('checksum')
+                    checksum_algorithm = 'sha256'
+                    size_bytes = storage_info.pop('size_bytes')
+                else:
+                    checksum_algorithm = self.checksum_algorithm
+                    # Goes through the digest cache so the restore-time check is free while the file is untouched
+                    checksum = self.digests.digest(snapshot_path, checksum_algorithm)
+                    size_bytes = snapshot_path.stat().st_size
+
+                metadata = {
+                    'id': snapshot_id,
+                    'timestamp': datetime.now().isoformat(),
+                    'description': description,
+                    'db_path': str(self.db_path),
+                    'snapshot_path': str(snapshot_path),
+                    'storage': storage,
+                    'method': method,
+                    'size_bytes': size_bytes,
+                    'checksum': checksum,
+                    'checksum_algorithm': checksum_algorithm,
+                    'table_row_counts': table_row_counts,
+                    'pinned': False,
+                    **storage_info
+                }
+
+                self._save_metadata(metadata)
+        except Exception:
+            snapshot_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if copy_path != snapshot_path:
+                copy_path.unlink(missing_ok=True)
+
         return snapshot_id
-    
-    
-    def restore_snapshot(self, snapshot_id: str) -> Dict[str, Any]:
+
+
+    def restore_snapshot(self, snapshot_id: str, snapshot_current: bool = True,
+                         full_verify: bool = False) -> Dict[str, Any]:
         """
         Restore database from a snapshot.
-        
+
         This is like 'git revert' - it goes back to a previous state.
-        
+
         Args:
             snapshot_id: ID of the snapshot to restore
-            
+            snapshot_current: Snapshot the current state first so the restore can be undone
+            full_verify: Re-hash the snapshot even if its cached digest is still valid
+
         Returns:
             metadata: Information about the restored snapshot
-            
+
         Steps:
         1. Get snapshot metadata
         2. Verify snapshot file exists
         3. Verify checksum (ensure not corrupted)
         4. Optionally: Create snapshot of current state (snapshot-before-restore)
-        5. Replace current database with snapshot
-        6. Verify restoration worked (check row counts)
-        """
-        # TODO: Get metadata for this snapshot
-        # HINT: Call self._get_metadata(snapshot_id)
-        # This should raise an error if snapshot doesn't exist
-        metadata = None  # Replace with your implementation
-        
-        # TODO: Get snapshot path from metadata
-        snapshot_path = None  # Replace with your implementation
-        
-        # TODO: Verify snapshot file exists
-        # HINT: Use Path.exists()
-        # If not, raise ValueError with helpful message
-        
-        
-        # TODO: Verify checksum to ensure snapshot isn't corrupted
-        # HINT: Calculate current checksum of snapshot file
-        # HINT: Compare with metadata['checksum']
-        # If they don't match, raise ValueError - DO NOT RESTORE CORRUPTED DATA!
-        
-        
-        # OPTIONAL (but recommended): Create snapshot of current state before restoring
-        # This way user can undo the restore if they made a mistake
-        # TODO: Uncomment and implement if you want this safety feature
-        # current_snapshot_id = self.create_snapshot(f"before-restore-to-{snapshot_id}")
-        
-        # TODO: Replace current database with snapshot
-        # HINT: Use shutil.copy2(snapshot_path, self.db_path)
-        # HINT: Wrap in try/except for PermissionError (file might be locked)
-        # If locked, raise helpful error telling user to close other connections
-        
-        
-        # TODO: Verify restoration worked by checking row counts
-        # HINT: Import SQLiteAdapter, connect to restored db, get row counts
-        # HINT: Compare with metadata['table_row_counts']
-        # If counts don't match, something went wrong!
-        # (Optional: Could restore the pre-restore snapshot here if verification fails)
-        
-        
+        5. Write the snapshot to a file next to the database
+        6. Verify that file (checksum and row counts)
+        7. Move it over the current database
+        """
+        metadata = self._get_metadata(snapshot_id)
+        snapshot_path = Path(metadata['snapshot_path'])
+        storage = metadata.get('storage', 'file')
+
+        if not snapshot_path.exists():
+            raise ValueError(f"Snapshot file missing for {snapshot_id}: {snapshot_path}")
+
+        # Chunked and compressed snapshots are verified while they are written back
+        if storage == 'file':
+            algorithm = metadata.get('checksum_algorithm', 'sha256')
+            if full_verify:
+                checksum = self._calculate_checksum(snapshot_path, algorithm)
+            else:
+                checksum = self.digests.digest(snapshot_path, algorithm)
+            if checksum != metadata['checksum']:
+                raise ValueError(f"Checksum mismatch for {snapshot_id}, refusing to restore corrupted snapshot")
+
+        if snapshot_current and self.db_path.exists():
+            self.create_snapshot(f"before-restore-to-{snapshot_id}", storage=storage)
+
+        # Rebuilt and checked next to the database; the live file is only replaced by a verified copy
+        staged_path = self.db_path.with_name(f".{self.db_path.name}.{snapshot_id}.restoring")
+        try:
+            if storage == 'chunked':
+                self.chunk_store.restore_file(snapshot_path, staged_path)
+            elif storage == 'compressed':
+                decompress_file(snapshot_path, staged_path, metadata['compression'], metadata['checksum'])
+            else:
+                shutil.copyfile(snapshot_path, staged_path)
+                if self._calculate_checksum(staged_path, metadata.get('checksum_algorithm', 'sha256')) != \
+                        metadata['checksum']:
+                    raise ValueError(f"Checksum mismatch for {snapshot_id}, refusing to restore corrupted snapshot")
+
+            restored_counts = self._get_row_counts(staged_path)
+            self._discard_sidecar_files(staged_path)
+            if restored_counts != metadata['table_row_counts']:
+                raise ValueError(
+                    f"Restored database row counts {restored_counts} do not match "
+                    f"snapshot {snapshot_id} {metadata['table_row_counts']}"
+                )
+
+            try:
+                os.replace(staged_path, self.db_path)
+            except PermissionError:
+                raise PermissionError(
+                    f"Cannot overwrite {self.db_path}; close other connections to the database and retry"
+                )
+        finally:
+            staged_path.unlink(missing_ok=True)
+            self._discard_sidecar_files(staged_path)
+        # The old database's WAL and shared memory must not be applied to the restored file
+        self._discard_sidecar_files(self.db_path)
+
         return metadata
-    
-    
+
+
     def list_snapshots(self) -> List[Dict[str, Any]]:
         """
         List all available snapshots.
-        
+
         Returns:
             List of snapshot metadata dictionaries, sorted by timestamp (newest first)
         """
-        # TODO: Check if metadata file exists
-        # HINT: Use self.metadata_file.exists()
-        # If it doesn't exist, return empty list (no snapshots yet)
-        
-        
-        # TODO: Read and parse JSON file
-        # HINT: Use json.load()
-        # Return the 'snapshots' list from the JSON
-        # Sort by timestamp descending (newest first) before returning
-        
-        pass  # Replace with your implementation
-    
-    
+        return self.catalog.list()
+
+
     def get_snapshot(self, snapshot_id: str) -> Dict[str, Any]:
         """
         Get metadata for a specific snapshot.
-        
+
         Args:
             snapshot_id: ID of the snapshot
-            
+
         Returns:
             Snapshot metadata dictionary
         """
-        # TODO: This is just a convenience method
-        # HINT: Call self._get_metadata(snapshot_id)
-        pass  # Replace with your implementation
-    
-    
+        return self._get_metadata(snapshot_id)
+
+
     def delete_snapshot(self, snapshot_id: str):
         """
         Delete a snapshot (both file and metadata).
-        
+
+        Chunks of a chunked snapshot are removed once no other snapshot uses them.
+
         Args:
             snapshot_id: ID of snapshot to delete
         """
-        # TODO: Get snapshot metadata
-        metadata = None  # Replace
-        
-        # TODO: Delete the snapshot file
-        # HINT: Get path from metadata, use Path.unlink()
-        # HINT: Use missing_ok=True so it doesn't error if file already gone
-        
-        
-        # TODO: Remove from metadata JSON
-        # HINT: Load all snapshots, filter out this one, save back
-        # You'll need to implement this logic
-        
-        pass  # Replace with your implementation
-    
-    
+        removed = self.catalog.delete_many([snapshot_id])
+        if not removed:
+            raise ValueError(f"Snapshot {snapshot_id} not found")
+        self._remove_snapshot_files(removed)
+
+
+    def diff_snapshots(self, old_id: str, new_id: str, tables: Optional[List[str]] = None,
+                       max_rows: int = DEFAULT_MAX_ROWS) -> Dict[str, Any]:
+        """
+        Row-level differences between two snapshots, table by table.
+
+        Unchanged tables are recognized from their pages and changed ones are
+        narrowed down by rowid-range summaries, so the cost follows the size
+        of the differences. See src.db.snapshot_diff.SnapshotDiffer.
+
+        Args:
+            old_id: Snapshot to compare from
+            new_id: Snapshot to compare to
+            tables: Only these tables (default: all)
+            max_rows: Changed rows returned per table and kind of change (all are counted)
+        """
+        return SnapshotDiffer(self, max_rows=max_rows).diff(old_id, new_id, tables)
+
+
     def pin_snapshot(self, snapshot_id: str):
         """
         Pin a snapshot to prevent it from being auto-deleted.
-        
+
         Args:
             snapshot_id: ID of snapshot to pin
         """
-        # TODO: Get all snapshots
-        # Find the one with matching ID
-        # Set its 'pinned' field to True
-        # Save back to JSON
-        # HINT: Similar to delete, but modify instead of remove
-        
-        pass  # Replace with your implementation
-    
-    
+        if not self.catalog.set_pinned(snapshot_id, True):
+            raise ValueError(f"Snapshot {snapshot_id} not found")
+
+
     def unpin_snapshot(self, snapshot_id: str):
         """
         Unpin a snapshot (allow it to be auto-deleted).
-        
+
         Args:
             snapshot_id: ID of snapshot to unpin
         """
-        # TODO: Same as pin_snapshot but set 'pinned' to False
-        pass  # Replace with your implementation
-    
-    
+        if not self.catalog.set_pinned(snapshot_id, False):
+            raise ValueError(f"Snapshot {snapshot_id} not found")
+
+
     def cleanup_old_snapshots(self, max_unpinned: int = 20):
         """
         Delete old unpinned snapshots, keeping only the most recent ones.
-        
+
         Pinned snapshots are NEVER deleted.
-        
+
         Args:
             max_unpinned: Maximum number of unpinned snapshots to keep
         """
-        # TODO: Get all snapshots
-        snapshots = self.list_snapshots()
-        
-        # TODO: Separate into pinned and unpinned lists
-        # HINT: Use list comprehension with snapshot.get('pinned', False)
-        unpinned = []  # Replace
-        pinned = []    # Replace
-        
-        # TODO: Sort unpinned by timestamp (oldest first)
-        # HINT: Use sorted() with key=lambda s: s['timestamp']
-        
-        
-        # TODO: Identify snapshots to delete
-        # HINT: If len(unpinned) > max_unpinned, delete the oldest ones
-        # Keep only the last max_unpinned
-        to_delete = []  # Replace with list of snapshots to delete
-        
-        # TODO: Delete each old snapshot
-        # HINT: Loop through to_delete and call self.delete_snapshot()
-        
-        pass  # Replace with your implementation
-    
-    
+        # Selected and removed from the catalog in one transaction, then files go in one pass
+        to_delete = self.catalog.pop_unpinned_beyond(max_unpinned)
+        self._remove_snapshot_files(to_delete)
+
+
     # ========================================
     # PRIVATE HELPER METHODS
     # ========================================
-    
-    def _calculate_checksum(self, file_path: Path) -> str:
+
+    def _calculate_checksum(self, file_path: Path, algorithm: str = 'sha256') -> str:
         """
-        Calculate SHA-256 checksum of a file.
-        
+        Calculate the checksum of a file, bypassing the digest cache.
+
         This creates a "fingerprint" of the file to detect corruption.
-        
+
         Args:
             file_path: Path to file to checksum
-            
+            algorithm: One of checksum.ALGORITHMS
+
         Returns:
-            Hexadecimal string of SHA-256 hash
-        """
-        # TODO: Create SHA-256 hasher
-        # HINT: sha256 = hashlib.sha256()
-        
-        
-        # TODO: Read file in chunks and update hash
-        # HINT: Open file in binary mode ('rb')
-        # HINT: Read 4096 bytes at a time (don't load entire DB into memory!)
-        # HINT: Use: for chunk in iter(lambda: f.read(4096), b''):
-        # HINT: Update hash with each chunk: sha256.update(chunk)
-        
-        
-        # TODO: Return hexadecimal digest
-        # HINT: return sha256.hexdigest()
-        
-        pass  # Replace with your implementation
-    
-    
+            Hexadecimal digest
+        """
+        return file_digest(file_path, algorithm)
+
+
     def _save_metadata(self, metadata: Dict[str, Any]):
         """
-        Append new snapshot metadata to snapshots.json.
-        
+        Add new snapshot metadata to the catalog.
+
         Args:
             metadata: Snapshot metadata dictionary to save
         """
-        # TODO: Load existing snapshots (if file exists)
-        # HINT: If file doesn't exist, start with empty list
-        snapshots = []
-        if self.metadata_file.exists():
-            # Load existing
-            pass  # Replace with json.load()
-        
-        # TODO: Append new metadata to list
-        
-        
-        # TODO: Write back to file
-        # HINT: Use json.dump() with indent=2 for readability
-        
-        pass  # Replace with your implementation
-    
-    
+        self.catalog.add(metadata)
+
+
     def _get_metadata(self, snapshot_id: str) -> Dict[str, Any]:
         """
         Get metadata for a specific snapshot.
-        
+
         Args:
             snapshot_id: ID of snapshot to find
-            
+
         Returns:
             Snapshot metadata dictionary
-            
+
         Raises:
             ValueError: If snapshot not found
         """
-        # TODO: Get all snapshots
-        snapshots = self.list_snapshots()
-        
-        # TODO: Find the one with matching ID
-        # HINT: Loop through or use next() with generator
-        # If not found, raise ValueError(f"Snapshot {snapshot_id} not found")
-        
-        pass  # Replace with your implementation
-    
-    
+        metadata = self.catalog.get(snapshot_id)
+        if metadata is None:
+            raise ValueError(f"Snapshot {snapshot_id} not found")
+        return metadata
+
+
+    def _remove_snapshot_files(self, snapshots: List[Dict[str, Any]]):
+        """Delete files of snapshots already removed from the catalog, then collect unused chunks once"""
+        candidates = set()
+        for metadata in snapshots:
+            snapshot_path = Path(metadata['snapshot_path'])
+            if metadata.get('storage') == 'chunked':
+                candidates |= self.chunk_store.chunk_hashes(snapshot_path)
+            snapshot_path.unlink(missing_ok=True)
+            self.digests.forget(snapshot_path)
+
+        if candidates:
+            with self.catalog.store_lock():
+                self.chunk_store.remove_unreferenced(candidates, self.catalog.manifest_paths())
+
+
+    def _get_row_counts(self, db_path: Path) -> Dict[str, int]:
+        """Exact row count per table, e.g. {"users": 1100, "orders": 530}"""
+        with SQLiteAdapter(str(db_path)) as db:
+            return {
+                table: info['row_count']
+                for table, info in db.get_full_schema().items()
+            }
+
+
+    def _backup_database(self, target_path: Path, pages_per_step: int, step_sleep: float,
+                         progress: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+        """
+        Copy the live database with the SQLite online backup API.
+
+        The source read lock is held only while a step runs, so writers can
+        commit between steps; a write from another connection restarts the
+        backup at the next step. In WAL mode readers never block writers, so
+        pages_per_step=-1 (one step) is also non-blocking there.
+
+        Returns:
+            Backup stats: pages, page_size, seconds, bytes_per_second
+        """
+        started = time.perf_counter()
+        stats = {'pages': 0, 'page_size': 0, 'seconds': 0.0, 'bytes_per_second': 0.0}
+
+        def on_step(status, remaining, total):
+            elapsed = time.perf_counter() - started
+            copied = total - remaining
+            stats.update(
+                pages=total,
+                seconds=round(elapsed, 3),
+                bytes_per_second=round(copied * stats['page_size'] / elapsed, 1) if elapsed else 0.0
+            )
+            if progress:
+                progress({
+                    'copied_pages': copied,
+                    'total_pages': total,
+                    'elapsed_seconds': stats['seconds'],
+                    'bytes_per_second': stats['bytes_per_second']
+                })
+            if step_sleep and remaining:
+                time.sleep(step_sleep)
+
+        # Read-only source connection: the snapshot must never take a write lock
+        source = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        target = sqlite3.connect(target_path)
+        try:
+            stats['page_size'] = source.execute("PRAGMA page_size").fetchone()[0]
+            source.backup(target, pages=pages_per_step, progress=on_step)
+        finally:
+            target.close()
+            source.close()
+
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        if stats['seconds']:
+            stats['bytes_per_second'] = round(stats['pages'] * stats['page_size'] / stats['seconds'], 1)
+        return stats
+
+
+    def _copy_database(self, target_path: Path):
+        """
+        Raw copy of the database file.
+
+        Committed transactions still in a non-empty -wal file are not in the
+        database file yet, so they are checkpointed into it first; if that is
+        blocked by another connection the copy is refused.
+        """
+        wal_path = Path(f"{self.db_path}-wal")
+        if wal_path.exists() and wal_path.stat().st_size:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+            finally:
+                conn.close()
+            if busy or (wal_path.exists() and wal_path.stat().st_size):
+                raise ValueError(
+                    f"Cannot checkpoint the -wal file of {self.db_path} while it is in use; "
+                    "snapshot it with method='backup'"
+                )
+        shutil.copy2(self.db_path, target_path)
+
+
+    def _discard_sidecar_files(self, db_path: Path):
+        """Remove journal/WAL files left next to a database file"""
+        for suffix in ('-wal', '-shm', '-journal'):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+
     def _generate_snapshot_id(self) -> str:
         """
         Generate unique snapshot ID in format: snap_YYYYMMDD_HHMMSS_xxxxxxxx
-        
+
         Returns:
             Unique snapshot ID string
         """
-        # TODO: Get current timestamp
-        # HINT: datetime.now().strftime("%Y%m%d_%H%M%S")
-        timestamp = None  # Replace
-        
-        # TODO: Generate short UUID (first 8 characters)
-        # HINT: str(uuid.uuid4())[:8]
-        short_uuid = None  # Replace
-        
-        # TODO: Combine into format: snap_{timestamp}_{short_uuid}
-        return None  # Replace with formatted string
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        short_uuid = str(uuid.uuid4())[:8]
+        return f"snap_{timestamp}_{short_uuid}"
 
 
 # ========================================
@@ -378,23 +535,25 @@ class SnapshotManager:
 if __name__ == "__main__":
     """
     Quick test of SnapshotManager functionality.
-    Run with: python src/db/snapshot_manager.py
+    Run with: python -m src.db.snapshot_manager
     """
-    
+
     # Test with your messy demo database
     manager = SnapshotManager("data/messy_demo.db")
-    
+
     # Create a snapshot
     print("Creating snapshot...")
     snapshot_id = manager.create_snapshot("test snapshot from main")
     print(f"✅ Created: {snapshot_id}")
-    
+
     # List snapshots
     print("\nAll snapshots:")
     for snap in manager.list_snapshots():
         print(f"  {snap['id']}: {snap['description']}")
-    
-    # TODO: Add more tests here as you implement methods
-    # - Try restoring a snapshot
-    # - Try pinning/unpinning
-    # - Try cleanup
\ No newline at end of file
+
+    # Pin it so cleanup keeps it, then restore it
+    manager.pin_snapshot(snapshot_id)
+    manager.restore_snapshot(snapshot_id)
+    print(f"\n✅ Restored: {snapshot_id}")
+
+    manager.cleanup_old_snapshots()
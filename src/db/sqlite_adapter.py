@@ -1,23 +1,112 @@
 """SQLite database adapter"""
+import hashlib
 import sqlite3
-from typing import List, Dict, Any
+from collections import namedtuple
+from itertools import groupby
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 
+from src.db.instrumentation import QueryProfiler, active_profiler
+from src.db.metadata_cache import MetadataCache, file_fingerprint
+
+# Output shapes supported by iter_query / execute_query_batches
+ROW_FORMATS = ('tuple', 'named', 'dict', 'columns')
+
+# Row count strategies for get_schema / get_full_schema:
+#   'exact'    - SELECT COUNT(*), a full scan per table
+#   'estimate' - sqlite_stat1 (from ANALYZE) or max(rowid), no scan
+#   'cached'   - exact count, reused until the database file changes
+COUNT_MODES = ('exact', 'estimate', 'cached')
+
+# How connect() opens the database:
+#   'rw'        - default read/write connection
+#   'ro'        - URI mode=ro: SQLite refuses writes, so no write locks or journals are taken
+#   'immutable' - URI immutable=1: no locking or change detection at all; only for files
+#                 nothing else writes to while the connection is open (e.g. snapshots)
+OPEN_MODES = ('rw', 'ro', 'immutable')
+
+# PRAGMAs that can be set per connection, with the values each accepts
+TUNABLE_PRAGMAS = {
+    'cache_size': int,      # Pages if positive, KiB if negative
+    'mmap_size': int,       # Bytes of the file to memory-map (0 disables)
+    'temp_store': ('default', 'file', 'memory', 0, 1, 2),
+}
+
+# Prepared statements kept per connection by the sqlite3 module (its default is 128)
+DEFAULT_CACHED_STATEMENTS = 256
+
+# Rows per columnar batch (iter_query_columns) and per exported chunk (export_table)
+COLUMNAR_CHUNK_ROWS = 65536
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for interpolation into SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def validate_pragmas(pragmas: Dict[str, Any]) -> Dict[str, Any]:
+    """Check names and values against TUNABLE_PRAGMAS (they are interpolated into SQL)"""
+    for name, value in pragmas.items():
+        allowed = TUNABLE_PRAGMAS.get(name)
+        if allowed is None:
+            raise ValueError(f"Unsupported PRAGMA '{name}', expected one of {tuple(TUNABLE_PRAGMAS)}")
+        valid = isinstance(value, int) and not isinstance(value, bool) if allowed is int else value in allowed
+        if not valid:
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+    return dict(pragmas)
+
+
 class SQLiteAdapter:
     """Adapter for SQLite databases"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_dir: Optional[str] = None, mode: str = 'rw',
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS, check_same_thread: bool = True,
+                 profiler: Optional[QueryProfiler] = None):
+        """
+        Args:
+            db_path: Database file
+            cache_dir: Directory for the on-disk metadata cache
+            mode: One of OPEN_MODES
+            pragmas: Connection PRAGMAs from TUNABLE_PRAGMAS, e.g. {'mmap_size': 268435456}
+            cached_statements: Size of the per-connection prepared statement cache
+            check_same_thread: Passed to sqlite3.connect; False lets a pool hand the
+                connection to other threads (one at a time)
+            profiler: Time every statement on this connection; defaults to the
+                profiler set with src.db.instrumentation.activate, if any
+        """
+        if mode not in OPEN_MODES:
+            raise ValueError(f"Unknown open mode '{mode}', expected one of {OPEN_MODES}")
         self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.pragmas = validate_pragmas(pragmas or {})
+        self.cached_statements = cached_statements
+        self.check_same_thread = check_same_thread
+        self.profiler = profiler
         self.conn = None
+        self._cache = None
     
     def connect(self):
         """Connect to database"""
-        self.conn = sqlite3.connect(self.db_path)
+        if self.mode == 'rw':
+            target, uri = self.db_path, False
+        else:
+            query = "mode=ro&immutable=1" if self.mode == 'immutable' else "mode=ro"
+            target, uri = f"{Path(self.db_path).resolve().as_uri()}?{query}", True
+        profiler = self.profiler or active_profiler()
+        self.conn = (profiler.connect if profiler else sqlite3.connect)(
+            target, uri=uri, cached_statements=self.cached_statements, check_same_thread=self.check_same_thread
+        )
         self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        for name, value in self.pragmas.items():
+            self.conn.execute(f"PRAGMA {name} = {value}")
         return self
     
     def close(self):
         """Close connection"""
+        if self._cache:
+            self._cache.flush()
         if self.conn:
             self.conn.close()
     
@@ -31,12 +120,12 @@ class SQLiteAdapter:
         """)
         return [row[0] for row in cursor.fetchall()]
     
-    def get_schema(self, table_name: str) -> Dict[str, Any]:
+    def get_schema(self, table_name: str, count_mode: str = 'exact') -> Dict[str, Any]:
         """Get schema for a specific table"""
         cursor = self.conn.cursor()
         
         # Get columns
-        cursor.execute(f"PRAGMA table_info({table_name})")
+        cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
         columns = []
         for row in cursor.fetchall():
             columns.append({
@@ -47,7 +136,7 @@ class SQLiteAdapter:
             })
         
         # Get foreign keys
-        cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+        cursor.execute(f"PRAGMA foreign_key_list({quote_identifier(table_name)})")
         foreign_keys = []
         for row in cursor.fetchall():
             foreign_keys.append({
@@ -57,23 +146,204 @@ class SQLiteAdapter:
             })
         
         # Get row count
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        row_count = cursor.fetchone()[0]
+        row_count, row_count_kind = self.get_row_count(table_name, count_mode)
         
         return {
             'table_name': table_name,
             'columns': columns,
             'foreign_keys': foreign_keys,
-            'row_count': row_count
+            'row_count': row_count,
+            'row_count_kind': row_count_kind
         }
     
-    def get_full_schema(self) -> Dict[str, Any]:
+    def get_full_schema(self, count_mode: str = 'exact', use_cache: bool = False) -> Dict[str, Any]:
         """Get schema for all tables"""
-        tables = self.get_tables()
-        return {
-            table: self.get_schema(table)
-            for table in tables
+        schema = {
+            table_info['table_name']: table_info
+            for table_info in self.iter_schema(count_mode, use_cache)
         }
+        if self._cache:
+            self._cache.flush()
+        return schema
+    
+    def iter_schema(self, count_mode: str = 'exact', use_cache: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each table's schema (same shape as get_schema) as soon as it is introspected.
+
+        Columns and foreign keys for every table come from two queries over the
+        pragma table-valued functions instead of two PRAGMAs per table. With
+        use_cache, that structure is stored on disk keyed by PRAGMA schema_version
+        and a digest of sqlite_master, so later runs skip introspection until the
+        schema changes. schema_version alone is a per-file counter: a different
+        file at the same path (regenerated, restored, swapped in) can repeat it.
+        """
+        cache_key = None
+        structure = None
+        if use_cache:
+            table_names, digest = self._schema_digest()
+            cache_key = [self.conn.execute("PRAGMA schema_version").fetchone()[0], digest]
+            structure = self._get_cache().get('schema', cache_key)
+            if structure is not None and set(structure) != table_names:
+                structure = None  # A cached table is gone (or a new one is missing): re-introspect
+        
+        if structure is not None:
+            tables = ((name, info['columns'], info['foreign_keys']) for name, info in structure.items())
+        else:
+            tables = self._introspect_tables()
+            structure = {}
+        
+        for table_name, columns, foreign_keys in tables:
+            if cache_key is not None:
+                structure[table_name] = {'columns': columns, 'foreign_keys': foreign_keys}
+            row_count, row_count_kind = self.get_row_count(table_name, count_mode)
+            yield {
+                'table_name': table_name,
+                'columns': columns,
+                'foreign_keys': foreign_keys,
+                'row_count': row_count,
+                'row_count_kind': row_count_kind
+            }
+        
+        if cache_key is not None:
+            self._get_cache().set('schema', cache_key, structure)
+    
+    def _schema_digest(self) -> Tuple[set, str]:
+        """User table names, and a digest of every schema object's SQL (sqlite_master is small and in memory)"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=16).hexdigest()
+        tables = {name for kind, name, _, _ in rows if kind == 'table' and not name.startswith('sqlite_')}
+        return tables, digest
+    
+    def _introspect_tables(self) -> Iterator[Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Walk columns and foreign keys of all tables in lockstep, both ordered by table name"""
+        column_cursor = self.conn.cursor()
+        column_cursor.row_factory = None
+        column_cursor.execute("""
+            SELECT m.name, p.name, p.type, p."notnull", p.pk
+            FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p
+            WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%'
+            ORDER BY m.name, p.cid
+        """)
+        fk_cursor = self.conn.cursor()
+        fk_cursor.row_factory = None
+        fk_cursor.execute("""
+            SELECT m.name, f."from", f."table", f."to"
+            FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS f
+            WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%'
+            ORDER BY m.name, f.id, f.seq
+        """)
+        
+        try:
+            fk_row = fk_cursor.fetchone()
+            for table_name, rows in groupby(column_cursor, key=lambda row: row[0]):
+                columns = [
+                    {
+                        'name': row[1],
+                        'type': row[2],
+                        'nullable': not row[3],
+                        'primary_key': bool(row[4])
+                    }
+                    for row in rows
+                ]
+                foreign_keys = []
+                while fk_row is not None and fk_row[0] == table_name:
+                    foreign_keys.append({
+                        'column': fk_row[1],
+                        'references_table': fk_row[2],
+                        'references_column': fk_row[3]
+                    })
+                    fk_row = fk_cursor.fetchone()
+                yield table_name, columns, foreign_keys
+        finally:
+            column_cursor.close()
+            fk_cursor.close()
+    
+    def get_indexes(self, table_name: str) -> List[Dict[str, Any]]:
+        """
+        Indexes on a table, with their key columns in index order.
+
+        origin is 'c' (CREATE INDEX), 'u' (UNIQUE constraint) or 'pk' (PRIMARY
+        KEY of a WITHOUT ROWID or non-integer key table); expression columns
+        are listed as None.
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("""
+            SELECT l.name, l."unique", l.origin, l.partial, i.name
+            FROM pragma_index_list(?) AS l JOIN pragma_index_info(l.name) AS i
+            ORDER BY l.seq, i.seqno
+        """, (table_name,))
+        indexes = []
+        for name, rows in groupby(cursor, key=lambda row: row[0]):
+            rows = list(rows)
+            indexes.append({
+                'name': name,
+                'unique': bool(rows[0][1]),
+                'origin': rows[0][2],
+                'partial': bool(rows[0][3]),
+                'columns': [row[4] for row in rows]
+            })
+        return indexes
+    
+    def get_row_count(self, table_name: str, mode: str = 'exact') -> Tuple[int, str]:
+        """
+        Count rows in a table using the requested strategy.
+
+        Returns:
+            (row_count, kind) where kind is 'exact', 'cached', 'stat1' or 'rowid';
+            'stat1' and 'rowid' are estimates
+        """
+        if mode not in COUNT_MODES:
+            raise ValueError(f"Unknown count mode '{mode}', expected one of {COUNT_MODES}")
+        
+        if mode == 'estimate':
+            estimate = self._estimate_row_count(table_name)
+            if estimate is not None:
+                return estimate
+        elif mode == 'cached':
+            # Fingerprint is taken before counting so a concurrent write invalidates the entry
+            fingerprint = file_fingerprint(self.db_path)
+            if fingerprint is not None:
+                cache = self._get_cache()
+                counts = cache.get('row_counts', fingerprint) or {}
+                if table_name in counts:
+                    return counts[table_name], 'cached'
+                counts[table_name] = self._count_rows(table_name)
+                cache.set('row_counts', fingerprint, counts)
+                return counts[table_name], 'exact'
+        
+        return self._count_rows(table_name), 'exact'
+    
+    def _count_rows(self, table_name: str) -> int:
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)}")
+        return cursor.fetchone()[0]
+    
+    def _estimate_row_count(self, table_name: str) -> Optional[Tuple[int, str]]:
+        """Estimate without scanning; None if no estimate is available (WITHOUT ROWID, no stats)"""
+        cursor = self.conn.cursor()
+        
+        # ANALYZE results: first integer of the stat column is the table's row count
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+        if cursor.fetchone():
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table_name,))
+            row = cursor.fetchone()
+            if row and row[0]:
+                return int(row[0].split()[0]), 'stat1'
+        
+        # max(rowid) is a b-tree seek; it over-counts by the number of deleted rows
+        try:
+            cursor.execute(f"SELECT max(rowid) FROM {quote_identifier(table_name)}")
+        except sqlite3.OperationalError:
+            return None  # WITHOUT ROWID table
+        return cursor.fetchone()[0] or 0, 'rowid'
+    
+    def _get_cache(self) -> MetadataCache:
+        if self._cache is None:
+            self._cache = MetadataCache(self.db_path, self.cache_dir)
+        return self._cache
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results"""
@@ -88,6 +358,153 @@ class SQLiteAdapter:
         
         return results
     
+    def execute_query_batches(self, query: str, params: tuple = (), batch_size: int = 1000,
+                              row_format: str = 'tuple') -> Iterator[Any]:
+        """Execute a SELECT query and yield results in batches of ``batch_size`` rows.
+
+        Rows are pulled with ``fetchmany`` so memory use is bounded by one batch,
+        regardless of the size of the result set.
+
+        row_format:
+            'tuple'   - list of plain tuples (cheapest)
+            'named'   - list of namedtuples keyed by column name
+            'dict'    - list of dicts, same shape as execute_query
+            'columns' - dict mapping column name to a list of values
+        """
+        if row_format not in ROW_FORMATS:
+            raise ValueError(f"Unknown row_format '{row_format}', expected one of {ROW_FORMATS}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # Plain tuples; shaping happens per batch below
+        try:
+            cursor.execute(query, params)
+            if cursor.description is None:
+                return
+            columns = [description[0] for description in cursor.description]
+            named_row = namedtuple('Row', columns, rename=True) if row_format == 'named' else None
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if row_format == 'tuple':
+                    yield rows
+                elif row_format == 'named':
+                    yield [named_row._make(row) for row in rows]
+                elif row_format == 'dict':
+                    yield [dict(zip(columns, row)) for row in rows]
+                else:
+                    yield dict(zip(columns, (list(values) for values in zip(*rows))))
+        finally:
+            cursor.close()
+    
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = 1000,
+                   row_format: str = 'tuple') -> Iterator[Any]:
+        """Execute a SELECT query and yield results one row at a time.
+
+        Same as execute_query_batches but flattened; 'columns' is not a per-row
+        shape and is rejected.
+        """
+        if row_format == 'columns':
+            raise ValueError("row_format 'columns' is only supported by execute_query_batches")
+        for batch in self.execute_query_batches(query, params, batch_size, row_format):
+            yield from batch
+    
+    def iter_query_columns(self, query: str, params: tuple = (), batch_size: int = COLUMNAR_CHUNK_ROWS,
+                           kinds: Optional[Dict[str, Optional[str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Execute a SELECT query and yield columnar batches.
+
+        Each batch maps column name to a NumPy masked array (int64, float64, or
+        object for text/blob) whose mask marks NULLs, built straight from the
+        fetched tuples without per-row dicts. See src.db.columnar.
+        """
+        # numpy is only imported by callers that want columnar results
+        from src.db.columnar import iter_column_batches
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(query, params)
+            if cursor.description is not None:
+                yield from iter_column_batches(cursor, batch_size, kinds)
+        finally:
+            cursor.close()
+
+    def execute_query_columnar(self, query: str, params: tuple = ()) -> Dict[str, Any]:
+        """Execute a SELECT query and return all rows as one columnar batch"""
+        from src.db.columnar import concat_batches
+        return concat_batches(self.iter_query_columns(query, params))
+
+    def export_table(self, table_name: str, path: str, format: Optional[str] = None,
+                     chunk_rows: int = COLUMNAR_CHUNK_ROWS, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Write a table to a columnar file, streaming it in chunks of ``chunk_rows``.
+
+        Args:
+            table_name: Table to export
+            path: Output file
+            format: 'parquet' or 'feather' (need pyarrow) or 'npz'; default from the suffix
+            chunk_rows: Rows per Parquet row group / Feather batch / npz chunk
+            columns: Only these columns (default: all)
+
+        Returns:
+            {'path', 'format', 'rows', 'chunks', 'columns': {name: kind}, 'bytes'}
+        """
+        from src.db.columnar import declared_kind, write_batches
+        declared = {
+            row[1]: row[2] for row in self.conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+        }
+        if not declared:
+            raise ValueError(f"Unknown table: {table_name}")
+        columns = list(columns or declared)
+        missing = [name for name in columns if name not in declared]
+        if missing:
+            raise ValueError(f"Unknown columns in {table_name}: {', '.join(missing)}")
+
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(quote_identifier(name) for name in columns)} "
+                f"FROM {quote_identifier(table_name)}"
+            )
+            return write_batches(cursor, path, format, chunk_rows,
+                                 kinds={name: declared_kind(declared[name]) for name in columns})
+        finally:
+            cursor.close()
+
+    def profile_table(self, table_name: str, columns: Optional[List[str]] = None,
+                      sample_size: Optional[int] = None, seed: Optional[int] = None,
+                      top_k: int = 10) -> Dict[str, Any]:
+        """
+        Per-column null rate, approximate distinct count, top values, min/max and
+        quantiles, from one streaming pass (or a rowid sample of ``sample_size`` rows).
+
+        See src.utils.profiler.TableProfiler.
+        """
+        from src.utils.profiler import TableProfiler
+        return TableProfiler(self, top_k=top_k).profile_table(table_name, columns, sample_size, seed)
+
+    def sample(self, table_name: str, size: int, method: str = 'rowid', seed: Optional[int] = None,
+               stratify_by: Optional[str] = None, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Random sample of ``size`` rows as dicts.
+
+        Args:
+            table_name: Table to sample
+            size: Rows to return (fewer if the table is smaller)
+            method: 'rowid' (random rowid probes, reads only the sampled rows) or
+                'reservoir' (one streamed pass); WITHOUT ROWID tables always use 'reservoir'
+            seed: Seed for a repeatable sample
+            stratify_by: Sample each value of this column in proportion to its row count
+            columns: Only these columns (default: all)
+
+        See src.utils.sampling.
+        """
+        from src.utils.sampling import sample_rows
+        return sample_rows(self, table_name, size, method, seed, stratify_by, columns)
+
     #allows for with statement to be called automatically
     def __enter__(self):
         return self.connect()
@@ -0,0 +1,358 @@
+"""
+Asyncio MCP server over stdio.
+
+Speaks the Model Context Protocol's JSON-RPC 2.0 framing (one message per
+line on stdin/stdout) directly, so it runs without the MCP SDK. Every
+request is handled in its own task: blocking sqlite3 work runs on a bounded
+thread pool with one pooled read-only connection per worker, so parallel
+tool calls from an agent proceed side by side. A call that times out or is
+cancelled by the client interrupts its connection with
+sqlite3.Connection.interrupt.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from src.db.connection_pool import ConnectionPool
+from src.db.snapshot_manager import SnapshotManager
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.mcp.tools import TOOLS, Tool, ToolError, get_tool
+
+PROTOCOL_VERSION = '2024-11-05'
+SERVER_INFO = {'name': 'db-agent', 'version': '0.1.0'}
+
+DEFAULT_WORKERS = 4
+DEFAULT_REQUEST_TIMEOUT = 30.0
+
+# Largest accepted request line
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# How often a timed-out or cancelled call is re-interrupted until its worker lets go
+INTERRUPT_INTERVAL = 0.05
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+class _CallContext:
+    """Connection a tool call is running on, so another thread can interrupt it"""
+
+    def __init__(self):
+        self.cancelled = False
+        self.adapter: Optional[SQLiteAdapter] = None
+        self._lock = threading.Lock()
+
+    def attach(self, adapter: SQLiteAdapter):
+        with self._lock:
+            if self.cancelled:
+                raise RequestTimeout("Request cancelled before it started")
+            self.adapter = adapter
+
+    def detach(self):
+        with self._lock:
+            self.adapter = None
+
+    def interrupt(self):
+        with self._lock:
+            self.cancelled = True
+            if self.adapter is not None:
+                self.adapter.conn.interrupt()
+
+
+class _ReadWriteGate:
+    """Lets any number of shared holders in at once, or one exclusive holder"""
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, exclusive: bool):
+        async with self._changed:
+            if exclusive:
+                await self._changed.wait_for(lambda: not self._writer)
+                self._writer = True
+                await self._changed.wait_for(lambda: self._readers == 0)
+            else:
+                await self._changed.wait_for(lambda: not self._writer)
+                self._readers += 1
+
+    async def release(self, exclusive: bool):
+        async with self._changed:
+            if exclusive:
+                self._writer = False
+            else:
+                self._readers -= 1
+            self._changed.notify_all()
+
+
+class MCPServer:
+    """
+    Serves TOOLS for one database.
+
+    Usage:
+        server = MCPServer("data/app.db")
+        asyncio.run(server.serve_stdio())
+    """
+
+    def __init__(self, db_path: str, snapshots_dir: str = "data/snapshots", workers: int = DEFAULT_WORKERS,
+                 request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT, tools: Optional[List[Tool]] = None):
+        """
+        Args:
+            db_path: Database file
+            snapshots_dir: Where snapshot tools keep their snapshots
+            workers: Threads (and read-only connections) running query tools
+            request_timeout: Seconds before a query tool call is interrupted (None: no limit)
+            tools: Tools to serve (default: TOOLS)
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.db_path = db_path
+        self.snapshots_dir = snapshots_dir
+        self.workers = workers
+        self.request_timeout = request_timeout
+        self.tools = TOOLS if tools is None else tools
+        self.pool = ConnectionPool(db_path, size=workers, mode='ro')
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mcp-query')
+        # SnapshotManager holds a sqlite3 connection, so all snapshot calls share one thread
+        self._snapshot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mcp-snapshot')
+        self._snapshots: Optional[SnapshotManager] = None
+        self._gate: Optional[_ReadWriteGate] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+
+    async def serve(self, reader: asyncio.StreamReader, writer: Any):
+        """Handle messages from ``reader`` until EOF, writing responses to ``writer``"""
+        self._gate = _ReadWriteGate()
+        self._write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the reader's limit; the rest of it is unusable
+                    await self._send(writer, _error(None, PARSE_ERROR, "Message too large"))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._dispatch(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            self.close()
+
+    async def serve_stdio(self):
+        """Serve on this process's stdin and stdout"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_MESSAGE_BYTES)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        await self.serve(reader, _StdoutWriter())
+
+    def close(self):
+        for task in self._in_flight.values():
+            task.cancel()
+        self._executor.shutdown(wait=True)
+        if self._snapshots is not None:
+            self._snapshot_executor.submit(self._snapshots.catalog.close).result()
+        self._snapshot_executor.shutdown(wait=True)
+        self.pool.close()
+
+    async def _send(self, writer: Any, message: Dict[str, Any]):
+        data = json.dumps(message, default=str).encode('utf-8') + b'\n'
+        async with self._write_lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def _dispatch(self, line: bytes, writer: Any):
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            await self._send(writer, _error(None, PARSE_ERROR, f"Invalid JSON: {e}"))
+            return
+        if not isinstance(message, dict) or not isinstance(message.get('method'), str):
+            await self._send(writer, _error(message.get('id') if isinstance(message, dict) else None,
+                                            INVALID_REQUEST, "Expected a JSON-RPC request object"))
+            return
+
+        request_id = message.get('id')
+        is_notification = 'id' not in message
+        if not is_notification:
+            self._in_flight[request_id] = asyncio.current_task()
+        try:
+            result = await self._handle(message['method'], message.get('params') or {})
+        except _ProtocolError as e:
+            response = _error(request_id, e.code, str(e))
+        except asyncio.CancelledError:
+            # Cancelled by the client (notifications/cancelled), which expects no response
+            return
+        except Exception as e:
+            logger.exception("Request %r failed", message['method'])
+            response = _error(request_id, INTERNAL_ERROR, str(e))
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        finally:
+            if not is_notification:
+                self._in_flight.pop(request_id, None)
+        if not is_notification:
+            await self._send(writer, response)
+
+    async def _handle(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == 'initialize':
+            return {
+                'protocolVersion': PROTOCOL_VERSION,
+                'capabilities': {'tools': {'listChanged': False}},
+                'serverInfo': SERVER_INFO
+            }
+        if method == 'ping':
+            return {}
+        if method == 'tools/list':
+            return {'tools': [tool.listing() for tool in self.tools]}
+        if method == 'tools/call':
+            return await self.call_tool(params.get('name'), params.get('arguments') or {})
+        if method == 'notifications/cancelled':
+            task = self._in_flight.get(params.get('requestId'))
+            if task is not None:
+                task.cancel()
+            return None
+        if method.startswith('notifications/'):
+            return None
+        raise _ProtocolError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a tool and wrap its outcome as an MCP tool result.
+
+        Failures caused by the call itself (bad arguments, SQL errors,
+        timeouts) come back as a result with isError set, as MCP expects.
+        """
+        tool = get_tool(name, self.tools)
+        if tool is None:
+            raise _ProtocolError(INVALID_PARAMS, f"Unknown tool: {name}")
+        if not isinstance(arguments, dict):
+            raise _ProtocolError(INVALID_PARAMS, "arguments must be an object")
+
+        await self._gate.acquire(tool.exclusive)
+        try:
+            if tool.kind == 'snapshot':
+                output = await self._run_snapshot_tool(tool, arguments)
+            else:
+                output = await self._run_query_tool(tool, arguments)
+        except (ToolError, RequestTimeout, TimeoutError) as e:
+            return _tool_result(str(e), is_error=True)
+        except (sqlite3.Error, ValueError, OSError) as e:
+            return _tool_result(f"{type(e).__name__}: {e}", is_error=True)
+        finally:
+            await self._gate.release(tool.exclusive)
+        return _tool_result(json.dumps(output, default=str))
+
+    async def _run_query_tool(self, tool: Tool, arguments: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        context = _CallContext()
+        future = loop.run_in_executor(self._executor, self._run_on_connection, tool, arguments, context)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            await self._interrupt(future, context)
+            raise RequestTimeout(f"{tool.name} timed out after {self.request_timeout}s")
+        except asyncio.CancelledError:
+            await self._interrupt(future, context)
+            raise
+
+    async def _interrupt(self, future: asyncio.Future, context: _CallContext):
+        """Interrupt the call's connection until its worker has returned it to the pool"""
+        # An interrupt that lands between two statements is lost, so keep interrupting
+        while not future.done():
+            context.interrupt()
+            await asyncio.wait({future}, timeout=INTERRUPT_INTERVAL)
+        if not future.cancelled():
+            future.exception()
+
+    def _run_on_connection(self, tool: Tool, arguments: Dict[str, Any], context: _CallContext) -> Any:
+        with self.pool.connection(timeout=self.request_timeout) as adapter:
+            context.attach(adapter)
+            try:
+                return tool.handler(adapter, arguments)
+            finally:
+                context.detach()
+
+    async def _run_snapshot_tool(self, tool: Tool, arguments: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        # Snapshot work cannot be interrupted safely, so it has no timeout
+        future = loop.run_in_executor(self._snapshot_executor, partial(self._run_on_snapshots, tool, arguments))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The caller releases the gate once this returns: a restore must have finished writing by then
+            await _wait_through_cancellation(future)
+            raise
+        finally:
+            if tool.exclusive:
+                # Pooled connections still see the replaced file's old pages; start fresh
+                self.pool.close()
+                self.pool = ConnectionPool(self.db_path, size=self.workers, mode='ro')
+
+    def _run_on_snapshots(self, tool: Tool, arguments: Dict[str, Any]) -> Any:
+        if self._snapshots is None:
+            self._snapshots = SnapshotManager(self.db_path, self.snapshots_dir)
+        return tool.handler(self._snapshots, arguments)
+
+
+class _ProtocolError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class _StdoutWriter:
+    """Blocking writes to stdout, shaped like an asyncio StreamWriter"""
+
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+
+async def _wait_through_cancellation(future: asyncio.Future):
+    """Wait for an executor job to finish, even if the waiting task is cancelled again meanwhile"""
+    while not future.done():
+        try:
+            await asyncio.wait({future})
+        except asyncio.CancelledError:
+            continue
+    if not future.cancelled():
+        future.exception()
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _tool_result(text: str, is_error: bool = False) -> Dict[str, Any]:
+    return {'content': [{'type': 'text', 'text': text}], 'isError': is_error}
+
+
+def run_stdio_server(db_path: str, **options):
+    """Serve a database over stdio until stdin closes; logs go to stderr"""
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(MCPServer(db_path, **options).serve_stdio())
@@ -0,0 +1,209 @@
+"""Tools exposed by the MCP server"""
+import base64
+import re
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional
+
+from src.db.snapshot_manager import SnapshotManager
+from src.db.sqlite_adapter import COUNT_MODES, SQLiteAdapter
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Authorizer actions allowed while running a client query; everything else
+# (writes, ATTACH, PRAGMA, schema changes, transactions) is denied
+READ_ONLY_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+# Statements that can be wrapped in a paging subquery
+QUERY_STATEMENT = re.compile(r'^\s*(\(\s*)*(SELECT|WITH|VALUES)\b', re.IGNORECASE)
+
+
+class ToolError(Exception):
+    """A tool call that failed because of its arguments; reported to the client as a tool result"""
+
+
+class Tool:
+    """
+    One callable tool: its MCP listing plus the function that runs it.
+
+    kind='query' tools run on a pooled read-only connection and can be
+    interrupted; kind='snapshot' tools run on the snapshot manager's own
+    thread and always run to completion. Exclusive tools replace the
+    database file and wait until no query is running.
+    """
+
+    def __init__(self, name: str, description: str, input_schema: Dict[str, Any],
+                 handler: Callable[..., Any], kind: str = 'query', exclusive: bool = False):
+        """
+        Args:
+            name: Tool name used in tools/call
+            description: Shown to the client in tools/list
+            input_schema: JSON Schema of the arguments object
+            handler: Called with (adapter or SnapshotManager, arguments dict)
+            kind: 'query' or 'snapshot'
+            exclusive: Block all other tool calls while this one runs
+        """
+        self.name = name
+        self.description = description
+        self.input_schema = input_schema
+        self.handler = handler
+        self.kind = kind
+        self.exclusive = exclusive
+
+    def listing(self) -> Dict[str, Any]:
+        return {'name': self.name, 'description': self.description, 'inputSchema': self.input_schema}
+
+
+def _read_only_authorizer(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {'base64': base64.b64encode(value).decode('ascii')}
+    return value
+
+
+def _page_bounds(arguments: Dict[str, Any]) -> tuple:
+    page_size = arguments.get('page_size', DEFAULT_PAGE_SIZE)
+    if not isinstance(page_size, int) or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ToolError(f"page_size must be an integer between 1 and {MAX_PAGE_SIZE}")
+    cursor = str(arguments.get('cursor') or '0')
+    if not cursor.isdigit():
+        raise ToolError(f"Invalid cursor {cursor!r}")
+    return page_size, int(cursor)
+
+
+def get_full_schema(adapter: SQLiteAdapter, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    count_mode = arguments.get('count_mode', 'estimate')
+    if count_mode not in COUNT_MODES:
+        raise ToolError(f"count_mode must be one of {COUNT_MODES}")
+    return adapter.get_full_schema(count_mode=count_mode)
+
+
+def execute_query(adapter: SQLiteAdapter, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one read-only statement and return a page of its rows.
+
+    Pages are cut with LIMIT/OFFSET around the client's statement, so the
+    cursor is just the offset of the next page. One extra row is fetched to
+    tell whether another page exists.
+    """
+    sql = arguments.get('sql')
+    if not isinstance(sql, str) or not sql.strip():
+        raise ToolError("sql is required")
+    params = arguments.get('params') or []
+    if not isinstance(params, (list, dict)):
+        raise ToolError("params must be a list or an object")
+    page_size, offset = _page_bounds(arguments)
+
+    if not QUERY_STATEMENT.match(sql):
+        raise ToolError("Only read-only SELECT statements are allowed")
+    statement = sql.strip().rstrip(';')
+    conn = adapter.conn
+    conn.set_authorizer(_read_only_authorizer)
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        try:
+            # The closing parenthesis goes on its own line, so a trailing -- comment cannot swallow it
+            if isinstance(params, dict):
+                cursor.execute(f"SELECT * FROM ({statement}\n) LIMIT :_page_limit OFFSET :_page_offset",
+                               {**params, '_page_limit': page_size + 1, '_page_offset': offset})
+            else:
+                cursor.execute(f"SELECT * FROM ({statement}\n) LIMIT ? OFFSET ?",
+                               (*params, page_size + 1, offset))
+        except sqlite3.DatabaseError as e:
+            if 'not authorized' in str(e):
+                raise ToolError("Only read-only SELECT statements are allowed") from e
+            raise
+        columns = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.set_authorizer(None)
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        'columns': columns,
+        'rows': [[_json_value(value) for value in row] for row in rows],
+        'row_count': len(rows),
+        'offset': offset,
+        'next_cursor': str(offset + page_size) if has_more else None
+    }
+
+
+def list_snapshots(manager: SnapshotManager, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return manager.list_snapshots()
+
+
+def create_snapshot(manager: SnapshotManager, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    description = arguments.get('description')
+    if not isinstance(description, str) or not description:
+        raise ToolError("description is required")
+    return manager.get_snapshot(manager.create_snapshot(description))
+
+
+def restore_snapshot(manager: SnapshotManager, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return manager.restore_snapshot(arguments.get('snapshot_id', ''))
+    except ValueError as e:
+        raise ToolError(str(e)) from e
+
+
+def delete_snapshot(manager: SnapshotManager, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot_id = arguments.get('snapshot_id', '')
+    try:
+        manager.delete_snapshot(snapshot_id)
+    except ValueError as e:
+        raise ToolError(str(e)) from e
+    return {'deleted': snapshot_id}
+
+
+_SNAPSHOT_ID = {
+    'type': 'object',
+    'properties': {'snapshot_id': {'type': 'string'}},
+    'required': ['snapshot_id']
+}
+
+TOOLS = [
+    Tool('get_full_schema', "Tables of the database with their columns, foreign keys and row counts",
+         {
+             'type': 'object',
+             'properties': {
+                 'count_mode': {'type': 'string', 'enum': list(COUNT_MODES), 'default': 'estimate'}
+             }
+         },
+         get_full_schema),
+    Tool('execute_query', "Run a read-only SQL query and return one page of rows; "
+                          "pass next_cursor back as cursor to get the next page",
+         {
+             'type': 'object',
+             'properties': {
+                 'sql': {'type': 'string'},
+                 'params': {'type': ['array', 'object']},
+                 'page_size': {'type': 'integer', 'minimum': 1, 'maximum': MAX_PAGE_SIZE,
+                               'default': DEFAULT_PAGE_SIZE},
+                 'cursor': {'type': 'string'}
+             },
+             'required': ['sql']
+         },
+         execute_query),
+    Tool('list_snapshots', "Snapshots of the database, newest first",
+         {'type': 'object', 'properties': {}}, list_snapshots, kind='snapshot'),
+    Tool('create_snapshot', "Save the current state of the database as a snapshot",
+         {
+             'type': 'object',
+             'properties': {'description': {'type': 'string'}},
+             'required': ['description']
+         },
+         create_snapshot, kind='snapshot'),
+    Tool('restore_snapshot', "Replace the database with a snapshot; the current state is snapshotted first",
+         _SNAPSHOT_ID, restore_snapshot, kind='snapshot', exclusive=True),
+    Tool('delete_snapshot', "Delete a snapshot", _SNAPSHOT_ID, delete_snapshot, kind='snapshot'),
+]
+
+
+def get_tool(name: str, tools: Optional[List[Tool]] = None) -> Optional[Tool]:
+    return next((tool for tool in (TOOLS if tools is None else tools) if tool.name == name), None)
@@ -0,0 +1,528 @@
+"""Memory-bounded exact and fuzzy duplicate detection"""
+import os
+import re
+import sqlite3
+import tempfile
+import unicodedata
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import mmh3
+import numpy as np
+
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+
+# Bytes of (hash, rowid) pairs kept in memory before they are spilled to disk
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Spill fan-out bounds; each partition must fit the budget when read back
+MIN_PARTITION_BITS = 4
+MAX_PARTITION_BITS = 8
+
+SCAN_BATCH_SIZE = 10000
+
+# MinHash/LSH defaults: 16 bands of 8 rows put the LSH threshold near 0.7 Jaccard;
+# a pair at 0.8 shares a bucket with ~95% probability, one at 0.5 with ~6%
+NUM_PERM = 128
+BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+
+# Rows per vectorized MinHash step; small steps keep the NUM_PERM x shingles matrix in cache
+MINHASH_BATCH_ROWS = 128
+
+# LSH buckets larger than this are linked as a star instead of compared pairwise
+MAX_BUCKET_SIZE = 100
+
+VERIFY_BATCH_PAIRS = 50000
+
+# MinHash permutations are multiply-shift hashes: ((a*x + b) mod 2**64) >> 32, a odd
+_SHIFT32 = np.uint64(32)
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# Shingle boundaries: values are wrapped in _EDGE and separated by NUL
+_EDGE = b'\x02'
+_SEPARATOR = b'\x00'
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+WHITESPACE = re.compile(r'\s+')
+FUZZY_COLUMN = re.compile(r'name|phone|mobile|e-?mail', re.IGNORECASE)
+EMAIL_COLUMN = re.compile(r'e-?mail', re.IGNORECASE)
+
+
+def normalize_text(value: Any) -> str:
+    """Case-folded, accent-stripped text with whitespace collapsed"""
+    if value is None:
+        return ''
+    text = str(value)
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return WHITESPACE.sub(' ', text.casefold()).strip().replace('\x00', '')
+
+
+def normalize_email(value: Any) -> str:
+    """Emails compare case-insensitively and without surrounding whitespace"""
+    return normalize_text(value).replace(' ', '')
+
+
+def normalize_phone(value: Any) -> str:
+    """Digits only, keeping the last 10 so country prefixes do not matter"""
+    return ''.join(ch for ch in str(value or '') if ch.isdigit())[-10:]
+
+
+def normalizer_for(column: str) -> Callable[[Any], str]:
+    """Pick a normalizer from the column name"""
+    if EMAIL_COLUMN.search(column):
+        return normalize_email
+    if re.search(r'phone|mobile|fax', column, re.IGNORECASE):
+        return normalize_phone
+    return normalize_text
+
+
+def default_columns(table_info: Dict[str, Any], fuzzy: bool) -> List[str]:
+    """Email columns for exact matching; name, phone and email columns for fuzzy matching"""
+    pattern = FUZZY_COLUMN if fuzzy else EMAIL_COLUMN
+    return [c['name'] for c in table_info['columns'] if pattern.search(c['name'])]
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as '512M' or '2G'"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*', text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def shingle_batch(rows: Sequence[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Character 3-gram codes for a batch of rows of normalized field values.
+
+    All values are packed into one byte buffer so the grams are computed
+    with array operations instead of per-row Python loops. Each code holds
+    the three UTF-8 bytes plus the field index, so equal text in different
+    columns does not match.
+
+    Returns:
+        (codes, row_index): uint64 gram codes and the batch row each came from,
+        in row order
+    """
+    parts, field_ids, row_ids = [], [], []
+    for row_index, values in enumerate(rows):
+        for field, value in enumerate(values):
+            if not value:
+                continue
+            chunk = _EDGE + value.encode('utf-8', 'surrogatepass') + _EDGE + _SEPARATOR
+            parts.append(chunk)
+            field_ids.append((field, len(chunk)))
+            row_ids.append(row_index)
+    if not parts:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    data = np.frombuffer(b''.join(parts), dtype=np.uint8).astype(np.uint64)
+    lengths = np.fromiter((length for _, length in field_ids), dtype=np.int64, count=len(field_ids))
+    fields = np.repeat(np.fromiter((f for f, _ in field_ids), dtype=np.uint64, count=len(field_ids)), lengths)
+    owners = np.repeat(np.asarray(row_ids, dtype=np.int64), lengths)
+
+    first, second, third = data[:-2], data[1:-1], data[2:]
+    valid = (first != 0) & (second != 0) & (third != 0)
+    codes = (first << np.uint64(16)) | (second << np.uint64(8)) | third | (fields[:-2] << np.uint64(24))
+    return codes[valid], owners[:-2][valid]
+
+
+class MinHasher:
+    """MinHash signatures and LSH band keys, vectorized over batches of rows"""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2 ** 64, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 64, size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, codes: np.ndarray, row_index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (rows, signatures): batch rows that had shingles and their
+            (n, num_perm) signatures
+        """
+        if not len(codes):
+            return np.empty(0, dtype=np.int64), np.empty((0, self.num_perm), dtype=np.uint64)
+        rows, offsets = np.unique(row_index, return_index=True)
+        permuted = ((self.a * codes + self.b) >> _SHIFT32).astype(np.uint32)
+        return rows, np.minimum.reduceat(permuted, offsets, axis=1).T.astype(np.uint64)
+
+    def band_keys(self, signatures: np.ndarray, salt: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        One 64-bit bucket key per row and band, shape (n, bands).
+
+        ``salt`` (one value per row) is mixed into every key, which restricts
+        candidates to rows with the same salt (blocking).
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows_per_band)
+        keys = np.zeros(banded.shape[:2], dtype=np.uint64)
+        for j in range(self.rows_per_band):
+            keys = keys * _BAND_MULTIPLIER + banded[:, :, j]
+        keys ^= np.arange(self.bands, dtype=np.uint64) * _BAND_MULTIPLIER
+        if salt is not None:
+            keys ^= salt.astype(np.uint64)[:, None]
+        return _fmix64(keys)
+
+
+def _fmix64(h: np.ndarray) -> np.ndarray:
+    """MurmurHash3 finalizer: spreads entropy to the top bits used for partitioning"""
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xFF51AFD7ED558CCD)
+    h = h ^ (h >> np.uint64(33))
+    h = h * np.uint64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> np.uint64(33))
+
+
+class HashPartitioner:
+    """
+    Multimap from 64-bit hash to rowid that spills to disk past a memory budget.
+
+    Pairs are buffered in memory. Once the buffer exceeds the budget it is
+    split into 2**partition_bits files by the top bits of the hash (grace
+    hash partitioning); groups() then loads one partition at a time, so
+    memory stays bounded by the budget plus one partition.
+    """
+
+    ENTRY_BYTES = 16
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, spill_dir: Optional[str] = None,
+                 expected_entries: int = 0):
+        """
+        Args:
+            memory_budget: Bytes of buffered pairs before spilling
+            spill_dir: Parent directory for spill files (default: system temp dir)
+            expected_entries: Estimated total pairs, used to size the fan-out
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        expected_partitions = max(expected_entries * self.ENTRY_BYTES // max(memory_budget, 1), 1)
+        self.partition_bits = min(max(int(expected_partitions).bit_length() + 1, MIN_PARTITION_BITS),
+                                  MAX_PARTITION_BITS)
+        self._buffer: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._buffered_bytes = 0
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        self._files = None
+        self.spilled_bytes = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self._tmpdir is not None
+
+    def add(self, hashes: np.ndarray, rowids: np.ndarray):
+        """Add pairs; both arrays have the same length"""
+        self._buffer.append((hashes.astype(np.uint64, copy=False), rowids.astype(np.int64, copy=False)))
+        self._buffered_bytes += len(hashes) * self.ENTRY_BYTES
+        if self._buffered_bytes > self.memory_budget:
+            self._spill()
+
+    def groups(self) -> Iterator[np.ndarray]:
+        """Rowids sharing a hash, for every hash seen more than once"""
+        if not self.spilled:
+            yield from self._groups_in(*self._drain())
+            return
+        self._spill()
+        for handle in self._files:
+            handle.close()
+        for path in self._partition_paths():
+            pairs = np.fromfile(path, dtype=np.uint64).reshape(-1, 2)
+            os.unlink(path)
+            yield from self._groups_in(pairs[:, 0], pairs[:, 1].view(np.int64))
+
+    def close(self):
+        """Remove spill files"""
+        if self._files:
+            for handle in self._files:
+                handle.close()
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+        self._buffer = []
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _drain(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self._buffer:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+        hashes = np.concatenate([h for h, _ in self._buffer])
+        rowids = np.concatenate([r for _, r in self._buffer])
+        self._buffer = []
+        self._buffered_bytes = 0
+        return hashes, rowids
+
+    def _spill(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="dedupe-", dir=self.spill_dir)
+            self._files = [open(path, 'wb') for path in self._partition_paths()]
+        hashes, rowids = self._drain()
+        if not len(hashes):
+            return
+        partitions = (hashes >> np.uint64(64 - self.partition_bits)).astype(np.int64)
+        order = np.argsort(partitions, kind='stable')
+        pairs = np.column_stack([hashes[order], rowids[order].view(np.uint64)])
+        bounds = np.searchsorted(partitions[order], np.arange(len(self._files) + 1))
+        for handle, start, end in zip(self._files, bounds[:-1], bounds[1:]):
+            if end > start:
+                pairs[start:end].tofile(handle)
+        self.spilled_bytes += pairs.nbytes
+
+    def _partition_paths(self) -> List[str]:
+        return [os.path.join(self._tmpdir.name, f"part-{i:04d}.bin") for i in range(2 ** self.partition_bits)]
+
+    @staticmethod
+    def _groups_in(hashes: np.ndarray, rowids: np.ndarray) -> Iterator[np.ndarray]:
+        if len(hashes) < 2:
+            return
+        order = np.argsort(hashes, kind='stable')
+        hashes, rowids = hashes[order], rowids[order]
+        starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        ends = np.r_[starts[1:], len(hashes)]
+        repeated = ends - starts > 1
+        for start, end in zip(starts[repeated], ends[repeated]):
+            yield np.sort(rowids[start:end])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+    def clusters(self) -> List[List[int]]:
+        members: Dict[int, List[int]] = {}
+        for x in self.parent:
+            members.setdefault(self.find(x), []).append(x)
+        return sorted((sorted(group) for group in members.values() if len(group) > 1), key=lambda g: g[0])
+
+
+class DuplicateFinder:
+    """
+    Finds duplicate rows of a table by rowid, in bounded memory.
+
+    Exact mode hashes the normalized key columns of every row (mmh3, 64 bit)
+    and groups equal hashes. Fuzzy mode computes MinHash signatures over
+    character 3-grams of the normalized columns and buckets rows by LSH
+    bands, which is the blocking step: only rows sharing a bucket (and the
+    optional block_on value) become candidate pairs. Candidates are then
+    verified with the exact Jaccard similarity of their shingles and
+    clustered with union-find.
+
+    In both modes the (hash, rowid) pairs go through a HashPartitioner,
+    which spills to disk once they exceed the memory budget, so the table
+    size is limited by disk rather than RAM. Tables must have a rowid.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 spill_dir: Optional[str] = None):
+        self.adapter = adapter
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+
+    def exact_duplicates(self, table: str, columns: List[str], max_examples: int = 10) -> Dict[str, Any]:
+        """
+        Rows whose normalized key columns are equal.
+
+        Rows where every key column is NULL or empty are ignored. Groups are
+        identified by a 64-bit hash, so a false match needs a hash collision:
+        the chance of any is about n**2 / 2**65 for n distinct keys, which is
+        3 in 10**8 at a million and about 3% at a billion.
+
+        Returns:
+            Summary with group/row counts and up to ``max_examples`` groups of rowids
+        """
+        stats = {}
+        groups = self.iter_exact_groups(table, columns, stats)
+        return self._summary(table, columns, 'exact', groups, max_examples, stats)
+
+    def near_duplicates(self, table: str, columns: List[str], threshold: float = DEFAULT_THRESHOLD,
+                        block_on: Optional[str] = None, num_perm: int = NUM_PERM, bands: int = BANDS,
+                        max_examples: int = 10) -> Dict[str, Any]:
+        """
+        Clusters of rows whose shingle sets have Jaccard similarity >= threshold.
+
+        Args:
+            threshold: Minimum Jaccard similarity of a verified pair
+            block_on: Optional column that must match (normalized) for rows to be compared
+            num_perm, bands: MinHash signature length and LSH band count
+
+        Returns:
+            Summary with cluster/row counts, candidate and matched pair counts,
+            and up to ``max_examples`` clusters of rowids
+        """
+        stats = {}
+        groups = self.iter_near_groups(table, columns, threshold, block_on, num_perm, bands, stats)
+        summary = self._summary(table, columns, 'fuzzy', groups, max_examples, stats)
+        summary['threshold'] = threshold
+        return summary
+
+    def iter_exact_groups(self, table: str, columns: List[str],
+                          stats: Optional[Dict[str, Any]] = None) -> Iterator[List[int]]:
+        """Yield rowid groups of exact (normalized) duplicates"""
+        stats = {} if stats is None else stats
+        self._check_rowid(table)
+        normalizers = [normalizer_for(column) for column in columns]
+        with self._partitioner(table) as partitioner:
+            rows_scanned = 0
+            for rows in self._stream(table, columns):
+                rows_scanned += len(rows)
+                rowids, hashes = [], []
+                for row in rows:
+                    key = '\x1f'.join(normalize(value) for normalize, value in zip(normalizers, row[1:]))
+                    if key.strip('\x1f'):
+                        rowids.append(row[0])
+                        hashes.append(mmh3.hash64(key, signed=False)[0])
+                partitioner.add(np.asarray(hashes, dtype=np.uint64), np.asarray(rowids, dtype=np.int64))
+            stats.update(rows_scanned=rows_scanned)
+            for group in partitioner.groups():
+                yield group.tolist()
+            stats.update(spilled=partitioner.spilled, spilled_bytes=partitioner.spilled_bytes)
+
+    def iter_near_groups(self, table: str, columns: List[str], threshold: float = DEFAULT_THRESHOLD,
+                         block_on: Optional[str] = None, num_perm: int = NUM_PERM, bands: int = BANDS,
+                         stats: Optional[Dict[str, Any]] = None) -> Iterator[List[int]]:
+        """Yield rowid clusters of near-duplicates"""
+        stats = {} if stats is None else stats
+        self._check_rowid(table)
+        hasher = MinHasher(num_perm, bands)
+        normalizers = [normalizer_for(column) for column in columns]
+        block_normalize = normalizer_for(block_on) if block_on else None
+        selected = columns + ([block_on] if block_on else [])
+
+        clusters = _UnionFind()
+        with self._partitioner(table, entries_per_row=bands) as partitioner:
+            rows_scanned = 0
+            for rows in self._stream(table, selected):
+                rows_scanned += len(rows)
+                for start in range(0, len(rows), MINHASH_BATCH_ROWS):
+                    batch = rows[start:start + MINHASH_BATCH_ROWS]
+                    values = [[normalize(v) for normalize, v in zip(normalizers, row[1:])] for row in batch]
+                    batch_rows, signatures = hasher.signatures(*shingle_batch(values))
+                    salt = None
+                    if block_normalize:
+                        salt = np.fromiter(
+                            (mmh3.hash64(block_normalize(batch[i][-1]), signed=False)[0] for i in batch_rows),
+                            dtype=np.uint64, count=len(batch_rows)
+                        )
+                    rowids = np.fromiter((batch[i][0] for i in batch_rows), dtype=np.int64, count=len(batch_rows))
+                    partitioner.add(hasher.band_keys(signatures, salt).ravel(), np.repeat(rowids, bands))
+
+            # Verify bucket by bucket in bounded chunks; a pair that shares several
+            # bands is skipped once its rows are already in one cluster
+            candidates, compared, matched = set(), 0, 0
+            for bucket in partitioner.groups():
+                bucket = bucket.tolist()
+                if len(bucket) <= MAX_BUCKET_SIZE:
+                    candidates.update(combinations(bucket, 2))
+                else:
+                    candidates.update((bucket[0], rowid) for rowid in bucket[1:])
+                if len(candidates) >= VERIFY_BATCH_PAIRS:
+                    compared, matched = self._verify(table, columns, normalizers, candidates, threshold,
+                                                     clusters, compared, matched)
+                    candidates = set()
+            compared, matched = self._verify(table, columns, normalizers, candidates, threshold,
+                                             clusters, compared, matched)
+            stats.update(rows_scanned=rows_scanned, spilled=partitioner.spilled,
+                         spilled_bytes=partitioner.spilled_bytes, compared_pairs=compared, matched_pairs=matched)
+
+        yield from clusters.clusters()
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _check_rowid(self, table: str):
+        """Groups are lists of rowids, so WITHOUT ROWID tables cannot be searched"""
+        try:
+            self.adapter.conn.execute(f"SELECT rowid FROM {quote_identifier(table)} LIMIT 0")
+        except sqlite3.OperationalError as e:
+            if 'no such column' not in str(e):
+                raise
+            raise ValueError(f"{table} is a WITHOUT ROWID table; duplicate detection needs a rowid") from e
+
+    def _stream(self, table: str, columns: List[str], batch_size: int = SCAN_BATCH_SIZE) -> Iterator[List[tuple]]:
+        select = ", ".join(["rowid"] + [quote_identifier(column) for column in columns])
+        yield from self.adapter.execute_query_batches(
+            f"SELECT {select} FROM {quote_identifier(table)}", batch_size=batch_size
+        )
+
+    def _partitioner(self, table: str, entries_per_row: int = 1) -> HashPartitioner:
+        estimate, _ = self.adapter.get_row_count(table, mode='estimate')
+        return HashPartitioner(self.memory_budget, self.spill_dir, expected_entries=estimate * entries_per_row)
+
+    def _verify(self, table: str, columns: List[str], normalizers: List[Callable[[Any], str]],
+                candidates: set, threshold: float, clusters: '_UnionFind', compared: int,
+                matched: int) -> Tuple[int, int]:
+        """Union candidate pairs whose shingle sets reach the Jaccard threshold"""
+        pairs = [(left, right) for left, right in candidates if clusters.find(left) != clusters.find(right)]
+        if not pairs:
+            return compared, matched
+        shingles = self._shingle_sets(table, columns, normalizers, {rowid for pair in pairs for rowid in pair})
+        for left, right in sorted(pairs):
+            a, b = shingles.get(left), shingles.get(right)
+            if a and b and len(a & b) >= threshold * len(a | b):
+                clusters.union(left, right)
+                matched += 1
+        return compared + len(pairs), matched
+
+    def _shingle_sets(self, table: str, columns: List[str], normalizers: List[Callable[[Any], str]],
+                      rowids: set) -> Dict[int, set]:
+        """Shingle code sets for the given rows, fetched by rowid"""
+        select = ", ".join(["rowid"] + [quote_identifier(column) for column in columns])
+        wanted = sorted(rowids)
+        sets = {}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(wanted), 500):
+            ids = wanted[start:start + 500]
+            rows = self.adapter.conn.execute(
+                f"SELECT {select} FROM {quote_identifier(table)} WHERE rowid IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            values = [[normalize(v) for normalize, v in zip(normalizers, row[1:])] for row in rows]
+            codes, owners = shingle_batch(values)
+            bounds = np.searchsorted(owners, np.arange(len(rows) + 1))
+            for i, row in enumerate(rows):
+                sets[row[0]] = set(codes[bounds[i]:bounds[i + 1]].tolist())
+        return sets
+
+    @staticmethod
+    def _summary(table: str, columns: List[str], mode: str, groups: Iterator[List[int]],
+                 max_examples: int, stats: Dict[str, Any]) -> Dict[str, Any]:
+        group_count = duplicate_rows = 0
+        examples = []
+        for group in groups:
+            group_count += 1
+            duplicate_rows += len(group) - 1
+            if len(examples) < max_examples:
+                examples.append(group)
+        return {
+            'table': table,
+            'columns': columns,
+            'mode': mode,
+            'groups': group_count,
+            'duplicate_rows': duplicate_rows,
+            'examples': examples,
+            **stats
+        }
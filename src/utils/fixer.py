@@ -0,0 +1,338 @@
+"""Repairs for health-check issues, applied in batched transactions"""
+import math
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.db.snapshot_manager import SnapshotManager
+from src.db.metadata_cache import cache_path
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+from src.utils.health_check import DUPLICATE_ROWS_RULE, HealthScanner
+from src.utils.incremental_scan import IncrementalScanner
+
+# Repairs available per health-check rule; the first one is the default
+FIX_ACTIONS = {
+    'duplicate_values': ('delete',),
+    'case_duplicates': ('delete',),
+    'duplicate_rows': ('delete',),
+    'orphaned_references': ('null', 'delete'),
+    'negative_values': ('clamp', 'null', 'delete'),
+}
+
+# Duplicates go first (deleting them can orphan child rows), then references, then values
+FIX_ORDER = ('duplicate_rows', 'duplicate_values', 'case_duplicates', 'orphaned_references', 'negative_values')
+
+# Repairs deleting all but the lowest rowid of each group of equal keys
+DUPLICATE_RULES = ('duplicate_rows', 'duplicate_values', 'case_duplicates')
+
+# Rows changed per transaction; small enough that the WAL can be checkpointed between batches
+DEFAULT_FIX_BATCH_SIZE = 10000
+
+
+class FixEngine:
+    """
+    Turns health-check issues into repairs and applies them.
+
+    Each repair is a SELECT of the rowids to change and a one-row
+    statement (``... WHERE rowid = ?``). The rowids are selected once, in
+    one set-based query, and the statement runs with executemany in
+    transactions of ``batch_size`` rows, so every commit is small: the WAL
+    can be checkpointed between batches and readers wait at most one
+    batch. Duplicates keep their lowest rowid.
+
+    Before the first batch the database is snapshotted once with
+    SnapshotManager (online backup), so a whole run can be undone with
+    restore_snapshot.
+    Tables without a rowid cannot be repaired.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, snapshot_manager: Optional[SnapshotManager] = None,
+                 batch_size: int = DEFAULT_FIX_BATCH_SIZE):
+        """
+        Args:
+            adapter: Connected read-write adapter for the database to fix
+            snapshot_manager: Takes the pre-fix snapshot; None skips it
+            batch_size: Rows changed per transaction
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.adapter = adapter
+        self.scanner = HealthScanner(adapter)
+        self.snapshot_manager = snapshot_manager
+        self.batch_size = batch_size
+
+    def plan(self, issues: List[Dict[str, Any]], actions: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Repairs for a list of issues (as returned by HealthScanner.scan).
+
+        Args:
+            issues: Issues to repair
+            actions: Repair per rule name, overriding the defaults in FIX_ACTIONS
+
+        Returns:
+            {'repairs': [{'table', 'column', 'rule', 'action', 'select', 'apply'}],
+             'skipped': [issues with no repair]}
+        """
+        actions = actions or {}
+        unknown = {rule: action for rule, action in actions.items() if action not in FIX_ACTIONS.get(rule, ())}
+        if unknown:
+            raise ValueError("Unsupported repairs: " + ", ".join(
+                f"{rule}={action} (expected one of {FIX_ACTIONS.get(rule, ())})" for rule, action in unknown.items()
+            ))
+
+        schema = self.adapter.get_full_schema(count_mode='estimate', use_cache=True)
+        repairs, skipped = [], []
+        for issue in issues:
+            table_info = schema.get(issue['table'])
+            if issue['rule'] not in FIX_ACTIONS or table_info is None or not self._has_rowid(issue['table']):
+                skipped.append(issue)
+                continue
+            action = actions.get(issue['rule'], FIX_ACTIONS[issue['rule']][0])
+            repairs.append(self._repair(table_info, issue, action))
+        repairs.sort(key=lambda repair: FIX_ORDER.index(repair['rule']))
+        return {'repairs': repairs, 'skipped': skipped}
+
+    def estimate(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Dry run: what applying the plan would change, without writing.
+
+        Rows come from running each repair's SELECT. Repairs on a table an
+        earlier repair deletes from are counted as apply() would run them:
+        rows already deleted are not counted again, and duplicate groups are
+        formed from the remaining rows only (see _simulate). Pages per batch
+        is an upper bound (one table page plus one page per index for every
+        row), and WAL bytes per batch follow from it. Orphans left by
+        deleting their parent rows are counted against the current data.
+
+        Returns:
+            {'repairs': [... with 'rows', 'batches', 'pages_per_batch', 'wal_bytes_per_batch'],
+             'rows': total, 'batches': total, 'dry_run': True}
+        """
+        page_size = self.adapter.conn.execute("PRAGMA page_size").fetchone()[0]
+        simulated = self._simulate(plan['repairs'])
+        estimates = []
+        for i, repair in enumerate(plan['repairs']):
+            if i in simulated:
+                rows = simulated[i]
+            else:
+                rows = self.adapter.conn.execute(f"SELECT COUNT(*) FROM ({repair['select']})").fetchone()[0]
+            touched = 1 + (len(self.adapter.get_indexes(repair['table'])) if repair['action'] != 'clamp' else 0)
+            pages = min(rows, self.batch_size) * touched
+            estimates.append({
+                **repair,
+                'rows': rows,
+                'batches': math.ceil(rows / self.batch_size),
+                'pages_per_batch': pages,
+                'wal_bytes_per_batch': pages * page_size
+            })
+        return {
+            'repairs': estimates,
+            'rows': sum(item['rows'] for item in estimates),
+            'batches': sum(item['batches'] for item in estimates),
+            'dry_run': True
+        }
+
+    def apply(self, plan: Dict[str, Any], description: str = "before fix",
+              progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Apply the repairs in batched transactions.
+
+        A failed batch is rolled back; batches committed before it stay
+        applied, and the pre-fix snapshot restores the state before the run.
+        The incremental scan state of every changed table is dropped, since
+        that scan cannot see updated rows.
+
+        Args:
+            plan: Result of plan()
+            description: Description of the pre-fix snapshot
+            progress: Called after each batch with {'table', 'rule', 'rows_done', 'rows'}
+
+        Returns:
+            {'snapshot_id', 'repairs': [... with 'rows', 'batches', 'elapsed_ms'], 'rows', 'elapsed_ms'}
+        """
+        started = time.perf_counter()
+        snapshot_id = None
+        results = []
+        changed = set()
+        try:
+            for repair in plan['repairs']:
+                repair_started = time.perf_counter()
+                cursor = self.adapter.conn.cursor()
+                cursor.row_factory = None
+                rowids = [row[0] for row in cursor.execute(repair['select'])]
+                if rowids:
+                    changed.add(repair['table'])
+                if rowids and snapshot_id is None and self.snapshot_manager is not None:
+                    # The online backup includes transactions still in the -wal file of a live database
+                    snapshot_id = self.snapshot_manager.create_snapshot(description, method='backup')
+                batches = 0
+                for start in range(0, len(rowids), self.batch_size):
+                    self._apply_batch(repair['apply'], rowids[start:start + self.batch_size])
+                    batches += 1
+                    if progress:
+                        progress({'table': repair['table'], 'rule': repair['rule'],
+                                  'rows_done': min(start + self.batch_size, len(rowids)), 'rows': len(rowids)})
+                results.append({
+                    **repair,
+                    'rows': len(rowids),
+                    'batches': batches,
+                    'elapsed_ms': round((time.perf_counter() - repair_started) * 1000, 1)
+                })
+        finally:
+            if changed:
+                self._forget_scan_state(changed)
+        return {
+            'snapshot_id': snapshot_id,
+            'repairs': results,
+            'rows': sum(item['rows'] for item in results),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _forget_scan_state(self, tables: set):
+        """Make the next incremental scan read the changed tables in full"""
+        state_path = cache_path(self.adapter.db_path, ".scan.db", self.adapter.cache_dir)
+        if state_path.exists():
+            with IncrementalScanner(self.adapter, str(state_path)) as scanner:
+                scanner.forget(sorted(tables))
+
+    def _apply_batch(self, statement: str, rowids: List[int]):
+        conn = self.adapter.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(statement, ((rowid,) for rowid in rowids))
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _repair(self, table_info: Dict[str, Any], issue: Dict[str, Any], action: str) -> Dict[str, Any]:
+        """SELECT of the rowids to change and the statement applied to each"""
+        table_name = table_info['table_name']
+        table = quote_identifier(table_name)
+        rule = issue['rule']
+        column = quote_identifier(issue['column']) if issue['column'] else None
+
+        if rule in DUPLICATE_RULES:
+            step = self._duplicate_step(table_info, rule, issue['column'])
+            select = f"""
+                SELECT target FROM (
+                    SELECT rowid AS target, row_number() OVER (PARTITION BY {step['sql']} ORDER BY rowid) AS n
+                    FROM {table} {self._present(step, issue['column'])}
+                ) WHERE n > 1 ORDER BY target
+            """
+        elif rule == 'orphaned_references':
+            fk = next(fk for fk in table_info['foreign_keys'] if fk['column'] == issue['column'])
+            select = self._orphan_select(table, fk)
+        else:
+            select = f"SELECT rowid FROM {table} WHERE {column} < 0 ORDER BY rowid"
+
+        if action == 'null':
+            nullable = next(c['nullable'] for c in table_info['columns'] if c['name'] == issue['column'])
+            if not nullable:
+                raise ValueError(f"{table_name}.{issue['column']} is NOT NULL; use the 'delete' repair")
+            apply = f"UPDATE {table} SET {column} = NULL WHERE rowid = ?"
+        elif action == 'clamp':
+            apply = f"UPDATE {table} SET {column} = 0 WHERE rowid = ?"
+        else:
+            apply = f"DELETE FROM {table} WHERE rowid = ?"
+
+        return {
+            'table': table_name,
+            'column': issue['column'],
+            'rule': rule,
+            'action': action,
+            'select': " ".join(select.split()),
+            'apply': apply
+        }
+
+    def _simulate(self, repairs: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        Rows of the repairs that overlap an earlier delete on the same table, by plan index.
+
+        Counting each SELECT on its own would count a row deleted by
+        duplicate_rows again under duplicate_values, and a duplicate group
+        whose kept row an earlier repair deletes keeps another one when
+        apply() gets to it. For those tables the rowids are selected
+        (duplicates with their group, partitioned in SQL so collations apply)
+        and the deletes replayed in plan order.
+        """
+        overlapping = {
+            repair['table'] for i, repair in enumerate(repairs)
+            if repair['action'] == 'delete' and any(later['table'] == repair['table'] for later in repairs[i + 1:])
+        }
+        if not overlapping:
+            return {}
+        schema = self.adapter.get_full_schema(count_mode='estimate', use_cache=True)
+        deleted = {table: set() for table in overlapping}
+        counts = {}
+        cursor = self.adapter.conn.cursor()
+        cursor.row_factory = None
+        for i, repair in enumerate(repairs):
+            table = repair['table']
+            if table not in overlapping:
+                continue
+            gone = deleted[table]
+            if repair['rule'] in DUPLICATE_RULES and gone:
+                # The window of the repair's SELECT, replayed over the rows still there. Only
+                # groups of two or more rows can have duplicates; a group is named by its first rowid.
+                step = self._duplicate_step(schema[table], repair['rule'], repair['column'])
+                seen, targets = set(), []
+                for rowid, group in cursor.execute(f"""
+                    SELECT target, head FROM (
+                        SELECT rowid AS target, min(rowid) OVER w AS head, count(*) OVER w AS size
+                        FROM {quote_identifier(table)} {self._present(step, repair['column'])}
+                        WINDOW w AS (PARTITION BY {step['sql']})
+                    ) WHERE size > 1 ORDER BY target
+                """):
+                    if rowid in gone:
+                        continue
+                    if group in seen:
+                        targets.append(rowid)
+                    else:
+                        seen.add(group)
+            else:
+                targets = [row[0] for row in cursor.execute(repair['select']) if row[0] not in gone]
+            counts[i] = len(targets)
+            if repair['action'] == 'delete':
+                gone.update(targets)
+        return counts
+
+    def _duplicate_step(self, table_info: Dict[str, Any], rule: str, column: Optional[str]) -> Dict[str, Any]:
+        """The scanner's plan step a duplicate repair partitions by"""
+        step = next((
+            step for step in self.scanner.plan_table(table_info)
+            if step['rule'].name == rule and step['column'] == column
+        ), None)
+        if step is None:
+            raise ValueError(f"No {rule} check on {table_info['table_name']}.{column}")
+        return step
+
+    @staticmethod
+    def _present(step: Dict[str, Any], column: Optional[str]) -> str:
+        """Rows a duplicate repair considers: NULLs are not duplicates of each other, except in whole rows"""
+        return "" if step['rule'] is DUPLICATE_ROWS_RULE else f"WHERE {quote_identifier(column)} IS NOT NULL"
+
+    def _orphan_select(self, table: str, fk: Dict[str, Any]) -> str:
+        column = quote_identifier(fk['column'])
+        if fk['references_table'] not in self.adapter.get_tables():
+            # Parent table missing entirely: every non-NULL reference is dangling
+            return f"SELECT rowid FROM {table} WHERE {column} IS NOT NULL ORDER BY rowid"
+        parent = quote_identifier(fk['references_table'])
+        parent_column = quote_identifier(fk['references_column']) if fk['references_column'] else 'rowid'
+        return f"""
+            SELECT c.rowid FROM {table} AS c
+            WHERE c.{column} IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM {parent} AS p WHERE p.{parent_column} = c.{column})
+            ORDER BY c.rowid
+        """
+
+    def _has_rowid(self, table_name: str) -> bool:
+        try:
+            self.adapter.conn.execute(f"SELECT rowid FROM {quote_identifier(table_name)} LIMIT 0")
+        except sqlite3.OperationalError:
+            return False
+        return True
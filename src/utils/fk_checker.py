@@ -0,0 +1,296 @@
+"""Foreign key integrity checks with index-aware strategies and a missing-index advisor"""
+import math
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+
+DEFAULT_SAMPLE_SIZE = 5
+
+# How orphans are found for one foreign key, depending on the parent key:
+#   'foreign_key_check'      - parent key is the rowid or has a UNIQUE index; SQLite's own
+#                              checker probes that index per child row (all FKs of the table at once)
+#   'indexed_anti_join'      - parent column has a non-unique index; NOT EXISTS probes it
+#   'materialized_anti_join' - parent column has no index; NOT IN builds a transient index
+#                              over the parent keys once instead of scanning the parent per child row
+#   'missing_parent'         - parent table does not exist; every non-NULL reference is orphaned
+STRATEGIES = ('foreign_key_check', 'indexed_anti_join', 'materialized_anti_join', 'missing_parent')
+
+
+class ForeignKeyChecker:
+    """
+    Walks every foreign key in the schema, counts orphaned child rows and
+    advises on missing indexes.
+
+    The orphan query for each foreign key is chosen from the indexes on the
+    parent key (see STRATEGIES), so no check degrades into a parent scan per
+    child row. Independently, every foreign key column without an index on
+    the child side is flagged: SQLite does not index it automatically, so
+    joins from the parent and ON DELETE/ON UPDATE enforcement scan the whole
+    child table. The advice carries the table's size and the query plan of a
+    lookup by that column to show what the scan costs.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.adapter = adapter
+        self.sample_size = sample_size
+        self._indexes: Dict[str, List[Dict[str, Any]]] = {}
+        self._page_stats: Optional[Dict[str, Tuple[int, int]]] = None
+
+    def check(self, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Check the foreign keys of all tables (or the given child tables).
+
+        Returns:
+            {'foreign_keys': [per-FK result], 'missing_indexes': [advice],
+             'orphans': total orphaned rows}
+        """
+        schema = self.adapter.get_full_schema(count_mode='estimate', use_cache=True)
+        if tables:
+            missing = set(tables) - set(schema)
+            if missing:
+                raise ValueError(f"Unknown tables: {', '.join(sorted(missing))}")
+
+        results, advice = [], []
+        for table_name in tables or list(schema):
+            table_info = schema[table_name]
+            if not table_info['foreign_keys']:
+                continue
+            plans = [self.plan_foreign_key(table_info, fk, schema) for fk in table_info['foreign_keys']]
+            results.extend(self._check_table(table_name, plans))
+            advice.extend(self._advise(table_info, plans))
+
+        return {
+            'foreign_keys': results,
+            'missing_indexes': advice,
+            'orphans': sum(result['orphans'] for result in results)
+        }
+
+    def plan_foreign_key(self, table_info: Dict[str, Any], fk: Dict[str, Any],
+                         schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Indexes available on both sides of a foreign key and the strategy they allow"""
+        parent_info = schema.get(fk['references_table'])
+        parent_column = fk['references_column'] or self._primary_key(parent_info)
+        if parent_info is None:
+            parent_key, strategy = None, 'missing_parent'
+        else:
+            parent_key = self._key_kind(parent_info, parent_column)
+            strategy = {
+                'rowid': 'foreign_key_check',
+                'unique': 'foreign_key_check',
+                'index': 'indexed_anti_join',
+            }.get(parent_key, 'materialized_anti_join')
+
+        return {
+            'fk': fk,
+            'table': table_info['table_name'],
+            'column': fk['column'],
+            'parent_table': fk['references_table'],
+            'parent_column': parent_column,
+            'parent_key': parent_key,
+            'child_index': self._key_kind(table_info, fk['column']),
+            'strategy': strategy
+        }
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def _check_table(self, table_name: str, plans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # PRAGMA foreign_key_check fails with "foreign key mismatch" if any FK of
+        # the table lacks a unique parent key, so it is only used when all qualify;
+        # it reports rows by rowid, so WITHOUT ROWID children use the anti-join
+        if all(plan['strategy'] == 'foreign_key_check' for plan in plans) and self._has_rowid(table_name):
+            started = time.perf_counter()
+            found = self._foreign_key_check(table_name, plans)
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            return [self._result(plan, count, samples, elapsed_ms) for plan, (count, samples) in zip(plans, found)]
+
+        results = []
+        for plan in plans:
+            if plan['strategy'] == 'foreign_key_check':
+                plan = dict(plan, strategy='indexed_anti_join')
+            started = time.perf_counter()
+            count, samples = self._anti_join(plan)
+            results.append(self._result(plan, count, samples, round((time.perf_counter() - started) * 1000, 1)))
+        return results
+
+    def _foreign_key_check(self, table_name: str, plans: List[Dict[str, Any]]) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """Run SQLite's checker once for the table and split its findings by foreign key"""
+        cursor = self.adapter.conn.cursor()
+        cursor.row_factory = None
+        # Map PRAGMA fkid to our plans; a composite key reports once under its first column
+        fk_ids = {}
+        for fk_id, parent, column, parent_column in cursor.execute(
+                'SELECT id, "table", "from", "to" FROM pragma_foreign_key_list(?)', (table_name,)):
+            for i, plan in enumerate(plans):
+                if (plan['column'], plan['parent_table'], plan['fk']['references_column']) == (column, parent, parent_column):
+                    fk_ids.setdefault(fk_id, i)
+
+        counts = [0] * len(plans)
+        sample_rowids: List[List[int]] = [[] for _ in plans]
+        for _, rowid, _, fk_id in cursor.execute(f"PRAGMA foreign_key_check({quote_identifier(table_name)})"):
+            i = fk_ids.get(fk_id)
+            if i is None:
+                continue
+            counts[i] += 1
+            if len(sample_rowids[i]) < self.sample_size:
+                sample_rowids[i].append(rowid)
+
+        return [
+            (count, self._sample_values(table_name, plan['column'], rowids))
+            for plan, count, rowids in zip(plans, counts, sample_rowids)
+        ]
+
+    def _anti_join(self, plan: Dict[str, Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        child = quote_identifier(plan['table'])
+        column = quote_identifier(plan['column'])
+        rowid = "c.rowid" if self._has_rowid(plan['table']) else "NULL"
+        if plan['strategy'] == 'missing_parent':
+            condition = ""
+        else:
+            parent = quote_identifier(plan['parent_table'])
+            parent_column = quote_identifier(plan['parent_column']) if plan['parent_column'] else 'rowid'
+            if plan['strategy'] == 'indexed_anti_join':
+                condition = f"AND NOT EXISTS (SELECT 1 FROM {parent} AS p WHERE p.{parent_column} = c.{column})"
+            else:
+                condition = f"AND c.{column} NOT IN (SELECT {parent_column} FROM {parent} WHERE {parent_column} IS NOT NULL)"
+
+        cursor = self.adapter.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f"SELECT {rowid}, c.{column} FROM {child} AS c WHERE c.{column} IS NOT NULL {condition}")
+        count, samples = 0, []
+        for row_id, value in cursor:
+            count += 1
+            if len(samples) < self.sample_size:
+                samples.append({'rowid': row_id, 'value': value})
+        return count, samples
+
+    def _sample_values(self, table_name: str, column: str, rowids: List[int]) -> List[Dict[str, Any]]:
+        if not rowids:
+            return []
+        cursor = self.adapter.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            f"SELECT rowid, {quote_identifier(column)} FROM {quote_identifier(table_name)} "
+            f"WHERE rowid IN ({', '.join('?' * len(rowids))}) ORDER BY rowid", rowids
+        )
+        return [{'rowid': row_id, 'value': value} for row_id, value in cursor]
+
+    def _advise(self, table_info: Dict[str, Any], plans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flag foreign key columns without an index and parent keys without a unique index"""
+        advice = []
+        for plan in plans:
+            if plan['child_index'] is None:
+                table, column = plan['table'], plan['column']
+                advice.append(self._index_advice(
+                    'child', table, column, plan,
+                    f"CREATE INDEX {quote_identifier(f'idx_{table}_{column}')} "
+                    f"ON {quote_identifier(table)} ({quote_identifier(column)})"
+                ))
+            if plan['strategy'] != 'missing_parent' and plan['parent_key'] not in ('rowid', 'unique'):
+                table, column = plan['parent_table'], plan['parent_column']
+                advice.append(self._index_advice(
+                    'parent', table, column, plan,
+                    f"CREATE UNIQUE INDEX {quote_identifier(f'idx_{table}_{column}')} "
+                    f"ON {quote_identifier(table)} ({quote_identifier(column)})"
+                ))
+        return advice
+
+    def _index_advice(self, side: str, table: str, column: str, plan: Dict[str, Any],
+                      suggestion: str) -> Dict[str, Any]:
+        """
+        Cost of looking up rows by an unindexed column: a full scan of the table.
+
+        The parent side needs a UNIQUE index: SQLite reports "foreign key
+        mismatch" on enforcement without one.
+        """
+        rows, _ = self.adapter.get_row_count(table, 'estimate')
+        pages, size_bytes = self._table_pages(table)
+        plan_rows = self.adapter.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT 1 FROM {quote_identifier(table)} WHERE {quote_identifier(column)} = ?",
+            (None,)
+        ).fetchall()
+        return {
+            'side': side,
+            'table': table,
+            'column': column,
+            'foreign_key': f"{plan['table']}.{plan['column']} -> {plan['parent_table']}.{plan['parent_column'] or 'rowid'}",
+            'suggestion': suggestion,
+            'estimated_rows': rows,
+            'estimated_pages': pages,
+            'estimated_bytes': size_bytes,
+            # With the index a lookup reads about log2(rows) entries instead of every row
+            'indexed_lookup_rows': max(math.ceil(math.log2(rows)), 1) if rows else 0,
+            'query_plan': "; ".join(row[3] for row in plan_rows)
+        }
+
+    def _table_pages(self, table_name: str) -> Tuple[Optional[int], Optional[int]]:
+        """Pages and bytes of a table's b-tree from dbstat; (None, None) if dbstat is unavailable"""
+        if self._page_stats is None:
+            try:
+                self._page_stats = {
+                    name: (pages, size) for name, pages, size in self.adapter.conn.execute(
+                        "SELECT name, COUNT(*), SUM(pgsize) FROM dbstat GROUP BY name"
+                    )
+                }
+            except sqlite3.OperationalError:
+                self._page_stats = {}  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        return self._page_stats.get(table_name, (None, None))
+
+    def _key_kind(self, table_info: Dict[str, Any], column: Optional[str]) -> Optional[str]:
+        """
+        How lookups by ``column`` are served:
+        'rowid' (INTEGER PRIMARY KEY), 'unique' (UNIQUE index on exactly this
+        column), 'index' (leading column of another index) or None (scan).
+        """
+        if column is None:
+            return 'rowid'
+        pk_columns = [c for c in table_info['columns'] if c['primary_key']]
+        if (len(pk_columns) == 1 and pk_columns[0]['name'] == column
+                and (pk_columns[0]['type'] or '').upper() == 'INTEGER' and self._has_rowid(table_info['table_name'])):
+            return 'rowid'
+
+        kind = None
+        for index in self._get_indexes(table_info['table_name']):
+            if index['partial'] or not index['columns'] or index['columns'][0] != column:
+                continue
+            if index['unique'] and len(index['columns']) == 1:
+                return 'unique'
+            kind = 'index'
+        return kind
+
+    @staticmethod
+    def _primary_key(table_info: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Column an FK without an explicit parent column refers to (None: the rowid)"""
+        if table_info is None:
+            return None
+        pk_columns = [c['name'] for c in table_info['columns'] if c['primary_key']]
+        return pk_columns[0] if len(pk_columns) == 1 else None
+
+    def _get_indexes(self, table_name: str) -> List[Dict[str, Any]]:
+        if table_name not in self._indexes:
+            self._indexes[table_name] = self.adapter.get_indexes(table_name)
+        return self._indexes[table_name]
+
+    def _has_rowid(self, table_name: str) -> bool:
+        try:
+            self.adapter.conn.execute(f"SELECT rowid FROM {quote_identifier(table_name)} LIMIT 0")
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    @staticmethod
+    def _result(plan: Dict[str, Any], count: int, samples: Iterable[Dict[str, Any]], elapsed_ms: float) -> Dict[str, Any]:
+        return {
+            'table': plan['table'],
+            'column': plan['column'],
+            'references': f"{plan['parent_table']}.{plan['parent_column'] or 'rowid'}",
+            'strategy': plan['strategy'],
+            'parent_key': plan['parent_key'],
+            'child_indexed': plan['child_index'] is not None,
+            'orphans': count,
+            'samples': list(samples),
+            'elapsed_ms': elapsed_ms
+        }
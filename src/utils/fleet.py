@@ -0,0 +1,98 @@
+"""Concurrent inspection of many SQLite databases"""
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.db.sqlite_adapter import SQLiteAdapter
+
+# File suffixes picked up when a directory is given
+DATABASE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+EXECUTORS = ('thread', 'process')
+
+
+def discover_databases(patterns: Iterable[str], recursive: bool = False) -> List[str]:
+    """
+    Expand glob patterns and directories into a sorted list of database paths.
+
+    Args:
+        patterns: File paths, glob patterns (e.g. 'tenants/*.db') or directories
+        recursive: Descend into subdirectories of directories and allow '**' globs
+
+    Returns:
+        Unique database paths, sorted
+    """
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.rglob('*') if recursive else path.iterdir()
+            found.update(
+                str(candidate) for candidate in candidates
+                if candidate.is_file() and candidate.suffix in DATABASE_SUFFIXES
+            )
+        elif path.is_file():
+            found.add(str(path))
+        else:
+            found.update(
+                match for match in glob.glob(pattern, recursive=recursive)
+                if Path(match).is_file()
+            )
+    return sorted(found)
+
+
+def inspect_database(db_path: str, count_mode: str = 'exact', include_schema: bool = False,
+                     use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Summarize one database; runs inside a pool worker with its own connection.
+
+    Errors are returned in the result rather than raised, so one corrupt file
+    does not abort a fleet scan.
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {'database': db_path, 'error': None}
+    try:
+        # Read-only: inspecting a fleet of live databases must never take a write lock
+        with SQLiteAdapter(db_path, mode='ro') as db:
+            schema_data = db.get_full_schema(count_mode=count_mode, use_cache=use_cache)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    else:
+        result['tables'] = len(schema_data)
+        result['total_rows'] = sum(t['row_count'] for t in schema_data.values())
+        result['estimated'] = any(t['row_count_kind'] in ('stat1', 'rowid') for t in schema_data.values())
+        if include_schema:
+            result['schema'] = schema_data
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def scan_fleet(db_paths: Iterable[str], workers: Optional[int] = None, executor: str = 'thread',
+               **inspect_kwargs) -> Iterator[Dict[str, Any]]:
+    """
+    Inspect databases concurrently, yielding each result as soon as it finishes.
+
+    Threads are usually enough because sqlite3 releases the GIL while a
+    statement runs; processes help when result shaping dominates.
+
+    Args:
+        db_paths: Databases to inspect
+        workers: Pool size (defaults to the executor's own default)
+        executor: 'thread' or 'process'
+        **inspect_kwargs: Passed through to inspect_database
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+
+    with pool_class(max_workers=workers) as pool:
+        futures = [pool.submit(inspect_database, path, **inspect_kwargs) for path in db_paths]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Consumer stopped early: drop work that has not started
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,311 @@
+"""Data-quality health checks over SQLite tables"""
+import hashlib
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+
+# Column name/type heuristics used to pick candidate columns from the schema
+EMAIL_COLUMN = re.compile(r'e-?mail', re.IGNORECASE)
+DATE_COLUMN = re.compile(r'(_at|_on|date|time)$', re.IGNORECASE)
+DATE_TYPE = re.compile(r'DATE|TIME', re.IGNORECASE)
+NUMERIC_TYPE = re.compile(r'INT|REAL|FLOA|DOUB|NUM|DEC', re.IGNORECASE)
+NON_NEGATIVE_COLUMN = re.compile(r'price|amount|cost|total|stock|qty|quantity|balance', re.IGNORECASE)
+
+
+class Rule:
+    """
+    A check over one column, expressed in SQL and evaluated in a single table pass.
+
+    kind='count' rules are a per-row predicate; the finding is the number of
+    rows where it is true. kind='distinct' rules are a per-row key; the
+    finding is the number of non-NULL rows that repeat an earlier key.
+    """
+
+    def __init__(self, name: str, description: str, applies: Callable[[Dict[str, Any]], bool],
+                 expression: Callable[[str], str], kind: str = 'count', severity: str = 'warning'):
+        """
+        Args:
+            name: Rule identifier, e.g. 'null_values'
+            description: Human-readable summary of a finding
+            applies: Predicate on a column dict from get_schema
+            expression: Builds the predicate (or key) SQL for a quoted column name
+            kind: 'count' or 'distinct'
+            severity: 'warning' or 'error'
+        """
+        self.name = name
+        self.description = description
+        self.applies = applies
+        self.expression = expression
+        self.kind = kind
+        self.severity = severity
+
+
+def _is_nullable(column):
+    return column['nullable'] and not column['primary_key']
+
+
+def _is_email(column):
+    return bool(EMAIL_COLUMN.search(column['name']))
+
+
+def _is_date(column):
+    return bool(DATE_COLUMN.search(column['name']) or DATE_TYPE.search(column['type'] or ''))
+
+
+def _is_non_negative(column):
+    return bool(NON_NEGATIVE_COLUMN.search(column['name'])) and (
+        not column['type'] or bool(NUMERIC_TYPE.search(column['type']))
+    )
+
+
+COLUMN_RULES = [
+    Rule('null_values', "NULL values", _is_nullable,
+         lambda col: f"{col} IS NULL"),
+    Rule('duplicate_values', "duplicate values", _is_email,
+         lambda col: col, kind='distinct', severity='error'),
+    Rule('case_duplicates', "duplicates ignoring case", _is_email,
+         lambda col: f"LOWER({col})", kind='distinct', severity='error'),
+    Rule('negative_values', "negative values", _is_non_negative,
+         lambda col: f"{col} < 0", severity='error'),
+    # datetime() normalizes 'T'/' ' separators and yields NULL for unparseable text
+    Rule('future_dates', "dates in the future", _is_date,
+         lambda col: f"datetime({col}) > datetime('now')"),
+]
+
+# Count predicates are packed into integer bitmasks, this many per result column
+MASK_BITS = 62
+
+SCAN_BATCH_SIZE = 10000
+
+
+def row_digest(row: tuple) -> bytes:
+    """
+    128-bit digest of a row, to count distinct rows without keeping them.
+
+    hash() is not usable here: it collides for ordinary values (hash(-1) ==
+    hash(-2)), and a collision would report distinct rows as duplicates.
+    """
+    return hashlib.blake2b(repr(row).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class ScanQuery:
+    """
+    SELECT list evaluating a table plan in one pass, and how to read its rows.
+
+    Result layout: count-rule bitmask columns, then one key per distinct
+    rule, then the columns of the whole-row duplicate key.
+    """
+
+    def __init__(self, plan: List[Dict[str, Any]]):
+        self.row_step = next((step for step in plan if step['rule'] is DUPLICATE_ROWS_RULE), None)
+        self.count_steps = [step for step in plan if step['rule'].kind == 'count']
+        self.distinct_steps = [
+            step for step in plan if step['rule'].kind == 'distinct' and step is not self.row_step
+        ]
+
+        self.select = []
+        for offset in range(0, len(self.count_steps), MASK_BITS):
+            self.select.append(" | ".join(
+                f"(coalesce(({step['sql']}), 0) << {bit})"
+                for bit, step in enumerate(self.count_steps[offset:offset + MASK_BITS])
+            ))
+        self.mask_columns = len(self.select)
+        self.select.extend(step['sql'] for step in self.distinct_steps)
+        self.row_key_start = len(self.select)
+        if self.row_step:
+            self.select.append(self.row_step['sql'])
+        if not self.select:
+            self.select.append("1")
+
+    def key_columns(self, columns: List[tuple]) -> List[tuple]:
+        """Per-distinct-rule value columns from a transposed batch"""
+        return columns[self.mask_columns:self.row_key_start]
+
+    def row_key(self, row: tuple) -> tuple:
+        return row[self.row_key_start:]
+
+    def count_findings(self, mask_counters: List[Counter]) -> Dict[int, int]:
+        """Offending rows per count rule (keyed by id(step)) from tallies of the bitmask columns"""
+        counts = {}
+        for i, step in enumerate(self.count_steps):
+            bit = 1 << (i % MASK_BITS)
+            counts[id(step)] = sum(n for mask, n in mask_counters[i // MASK_BITS].items() if mask & bit)
+        return counts
+
+
+class HealthScanner:
+    """
+    Runs data-quality rules against every table of a database.
+
+    Candidate columns come from SQLiteAdapter.get_full_schema. Every rule for
+    a table is evaluated in one streamed SELECT: count predicates are packed
+    into a per-row bitmask computed by SQLite, and distinct keys (including
+    the whole-row duplicate key) are deduplicated in Python: column keys by
+    value, whole rows by a 128-bit digest (see row_digest). SQLite's
+    COUNT(DISTINCT ...) builds a b-tree per expression and is several times
+    slower. Orphaned foreign keys need a join and run as one query per
+    foreign key.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, rules: Optional[List[Rule]] = None):
+        self.adapter = adapter
+        self.rules = COLUMN_RULES if rules is None else rules
+
+    def plan_table(self, table_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Rules that will be evaluated for a table.
+
+        Returns:
+            List of {'rule', 'column', 'sql'}; column is None for the whole-row
+            duplicate check, whose sql is the list of compared columns
+        """
+        plan = []
+        for column in table_info['columns']:
+            for rule in self.rules:
+                if rule.applies(column):
+                    plan.append({
+                        'rule': rule,
+                        'column': column['name'],
+                        'sql': rule.expression(quote_identifier(column['name']))
+                    })
+
+        # Whole-row duplicates, ignoring the primary key
+        data_columns = [c['name'] for c in table_info['columns'] if not c['primary_key']]
+        if data_columns:
+            plan.append({
+                'rule': DUPLICATE_ROWS_RULE,
+                'column': None,
+                'sql': ", ".join(quote_identifier(name) for name in data_columns)
+            })
+        return plan
+
+    def scan_table(self, table_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate all rules for one table in a single pass"""
+        table_name = table_info['table_name']
+        plan = self.plan_table(table_info)
+        query = ScanQuery(plan)
+        started = time.perf_counter()
+
+        mask_counters = [Counter() for _ in range(query.mask_columns)]
+        key_values = [set() for _ in query.distinct_steps]
+        key_counts = [0] * len(query.distinct_steps)
+        row_digests = set()
+        row_count = 0
+
+        for rows in self.adapter.execute_query_batches(
+                f"SELECT {', '.join(query.select)} FROM {quote_identifier(table_name)}",
+                batch_size=SCAN_BATCH_SIZE):
+            row_count += len(rows)
+            columns = list(zip(*rows))
+            for counter, masks in zip(mask_counters, columns):
+                counter.update(masks)
+            for i, values in enumerate(query.key_columns(columns)):
+                present = [value for value in values if value is not None]
+                key_counts[i] += len(present)
+                key_values[i].update(present)
+            if query.row_step:
+                row_digests.update(row_digest(query.row_key(row)) for row in rows)
+
+        counts = query.count_findings(mask_counters)
+        for step, total, values in zip(query.distinct_steps, key_counts, key_values):
+            counts[id(step)] = total - len(values)
+        if query.row_step:
+            counts[id(query.row_step)] = row_count - len(row_digests)
+
+        issues = self.make_issues(table_name, plan, counts, row_count)
+        issues.extend(self.check_orphans(table_info, row_count))
+
+        return {
+            'table_name': table_name,
+            'row_count': row_count,
+            'rules_evaluated': len(plan) + len(table_info['foreign_keys']),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'issues': issues
+        }
+
+    def make_issues(self, table_name: str, plan: List[Dict[str, Any]], counts: Dict[int, int],
+                    row_count: int) -> List[Dict[str, Any]]:
+        """Issues for the plan steps with a non-zero count (keyed by id(step)), in plan order"""
+        return [
+            self._issue(table_name, step['column'], step['rule'], counts[id(step)], row_count)
+            for step in plan
+            if counts.get(id(step))
+        ]
+
+    def scan(self, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Scan all tables (or the given ones).
+
+        Returns:
+            {'tables': {name: scan_table result}, 'issues': [...all issues...]}
+        """
+        schema = self.adapter.get_full_schema(count_mode='estimate')
+        if tables:
+            missing = set(tables) - set(schema)
+            if missing:
+                raise ValueError(f"Unknown tables: {', '.join(sorted(missing))}")
+            schema = {name: schema[name] for name in tables}
+
+        results = {name: self.scan_table(info) for name, info in schema.items()}
+        return {
+            'tables': results,
+            'issues': [issue for result in results.values() for issue in result['issues']]
+        }
+
+    def check_orphans(self, table_info: Dict[str, Any], row_count: int) -> List[Dict[str, Any]]:
+        issues = []
+        for fk in table_info['foreign_keys']:
+            count = self.count_orphans(table_info['table_name'], fk)
+            if count:
+                issues.append(self.orphan_issue(table_info['table_name'], fk, count, row_count))
+        return issues
+
+    def count_orphans(self, table_name: str, fk: Dict[str, Any], after_rowid: Optional[int] = None) -> int:
+        """Child rows whose foreign key has no parent row, optionally only rows past ``after_rowid``"""
+        child = quote_identifier(table_name)
+        column = quote_identifier(fk['column'])
+        parent = quote_identifier(fk['references_table'])
+        # references_column is None when the FK targets the parent's primary key implicitly
+        parent_column = quote_identifier(fk['references_column']) if fk['references_column'] else 'rowid'
+        only_new = "" if after_rowid is None else "AND c.rowid > ?"
+        params = () if after_rowid is None else (after_rowid,)
+        cursor = self.adapter.conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM {child} AS c
+                WHERE c.{column} IS NOT NULL {only_new}
+                  AND NOT EXISTS (SELECT 1 FROM {parent} AS p WHERE p.{parent_column} = c.{column})
+            """, params)
+        except sqlite3.OperationalError as e:
+            # Parent table missing entirely: every non-NULL reference is dangling
+            if 'no such table' not in str(e):
+                raise
+            cursor.execute(f"SELECT COUNT(c.{column}) FROM {child} AS c WHERE 1 {only_new}", params)
+        return cursor.fetchone()[0]
+
+    def orphan_issue(self, table_name: str, fk: Dict[str, Any], count: int, row_count: int) -> Dict[str, Any]:
+        issue = self._issue(table_name, fk['column'], ORPHAN_RULE, count, row_count)
+        issue['references'] = f"{fk['references_table']}.{fk['references_column']}"
+        return issue
+
+    @staticmethod
+    def _issue(table_name: str, column: Optional[str], rule: Rule, count: int, row_count: int) -> Dict[str, Any]:
+        return {
+            'table': table_name,
+            'column': column,
+            'rule': rule.name,
+            'severity': rule.severity,
+            'description': rule.description,
+            'count': count,
+            'rate': round(count / row_count, 6) if row_count else 0.0
+        }
+
+
+DUPLICATE_ROWS_RULE = Rule('duplicate_rows', "exact duplicate rows (excluding primary key)",
+                           lambda column: False, lambda col: col, kind='distinct', severity='error')
+ORPHAN_RULE = Rule('orphaned_references', "references to missing parent rows",
+                   lambda column: False, lambda col: "", severity='error')
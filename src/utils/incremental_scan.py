@@ -0,0 +1,433 @@
+"""Incremental health scans that only read rows added since the last run"""
+import hashlib
+import json
+import sqlite3
+import struct
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.db.metadata_cache import cache_path, file_fingerprint
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+from src.utils.health_check import SCAN_BATCH_SIZE, HealthScanner, Rule, ScanQuery
+
+# Page cache for the state database; the key hash index is the hot structure
+STATE_CACHE_KIB = 64 * 1024
+
+STATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scan_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS watermarks (
+        table_name TEXT PRIMARY KEY,
+        signature TEXT NOT NULL,
+        schema_version INTEGER NOT NULL,
+        max_rowid INTEGER,
+        row_count INTEGER NOT NULL,
+        scanned_at TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS aggregates (
+        step_id INTEGER PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        step TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        distinct_keys INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (table_name, step)
+    );
+    CREATE TABLE IF NOT EXISTS key_hashes (
+        step_id INTEGER NOT NULL,
+        hash INTEGER NOT NULL,
+        PRIMARY KEY (step_id, hash)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS orphan_checks (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        parent_version TEXT NOT NULL,
+        orphans INTEGER NOT NULL,
+        PRIMARY KEY (table_name, column_name)
+    ) WITHOUT ROWID;
+"""
+
+
+_INT64 = struct.Struct('<q')
+
+
+def stable_hash(value: Any) -> int:
+    """64-bit hash that is identical in every process (hash() of str is salted per process)"""
+    digest = hashlib.blake2b(repr(value).encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return _INT64.unpack(digest)[0]
+
+
+def _step_key(step: Dict[str, Any]) -> str:
+    return f"{step['rule'].name}:{step['column'] or '*'}"
+
+
+class IncrementalScanner:
+    """
+    Health scans that remember where they stopped.
+
+    For each table the state file keeps the rowid high-water mark, the row
+    count below it and a signature of the table definition and rule plan,
+    together with the partial aggregates of HealthScanner's single pass:
+    per-rule counts and the hashes of every distinct key seen. A later run
+    streams only rows with a rowid above the mark and folds them into the
+    stored aggregates, so append-only tables cost time proportional to the
+    new rows.
+
+    A table is rescanned from scratch when its definition or the rules
+    change, when rows below the mark were deleted (the count below the mark
+    no longer matches), when the database file changed but the table got
+    no new rows (so the change can only be an update), or when full=True.
+    Updates to existing rows alongside new rows cannot be seen from rowids,
+    and time-dependent rules such as future_dates are evaluated when a row
+    is first read; run with full=True to recompute those. FixEngine drops
+    the state of the tables it repairs (see forget). WITHOUT ROWID tables
+    have no watermark and are always scanned in full.
+
+    When the database file is unchanged since a table was last scanned
+    (size and mtime of the file and its WAL) its stored result is returned
+    without touching the table.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, state_path: Optional[str] = None,
+                 rules: Optional[List[Rule]] = None):
+        """
+        Args:
+            adapter: Connected adapter for the database to scan
+            state_path: SQLite file holding the scan state
+                (default: next to the metadata cache in the cache directory)
+            rules: Column rules, defaults to HealthScanner's
+        """
+        self.adapter = adapter
+        self.scanner = HealthScanner(adapter, rules)
+        if state_path is None:
+            state_path = cache_path(adapter.db_path, ".scan.db", adapter.cache_dir)
+        self.state_path = Path(state_path)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state = sqlite3.connect(self.state_path, isolation_level=None)
+        self.state.execute(f"PRAGMA cache_size = -{STATE_CACHE_KIB}")
+        self.state.executescript(STATE_SCHEMA)
+
+    def close(self):
+        """Close the state database"""
+        self.state.close()
+
+    def scan(self, tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Scan all tables (or the given ones), reading only rows added since the last run.
+
+        Returns:
+            Same shape as HealthScanner.scan; each table result also has
+            'mode' ('full', 'incremental' or 'unchanged') and 'scanned_rows'
+        """
+        schema = self.adapter.get_full_schema(count_mode='estimate', use_cache=True)
+        if tables:
+            missing = set(tables) - set(schema)
+            if missing:
+                raise ValueError(f"Unknown tables: {', '.join(sorted(missing))}")
+            schema = {name: schema[name] for name in tables}
+
+        fingerprint = file_fingerprint(self.adapter.db_path)
+        schema_version = self.adapter.conn.execute("PRAGMA schema_version").fetchone()[0]
+
+        results = {}
+        for name, info in schema.items():
+            plan = self.scanner.plan_table(info)
+            signature = self._signature(name, plan)
+            # Compared with the file's fingerprint when this table was last scanned; no file never matches
+            stored_fingerprint = self._get_state(f"fingerprint:{name}")
+            file_changed = full or fingerprint is None or stored_fingerprint != json.dumps(fingerprint)
+            if not file_changed:
+                stored = self._load_result(info, plan, signature)
+                if stored is not None:
+                    results[name] = stored
+                    continue
+            results[name] = self.scan_table(info, plan, signature, schema_version, full, file_changed)
+            if fingerprint is not None:
+                self._set_state(f"fingerprint:{name}", json.dumps(fingerprint))
+
+        return {
+            'tables': results,
+            'issues': [issue for result in results.values() for issue in result['issues']]
+        }
+
+    def scan_table(self, table_info: Dict[str, Any], plan: List[Dict[str, Any]], signature: str,
+                   schema_version: int, full: bool = False, file_changed: bool = True) -> Dict[str, Any]:
+        """
+        Bring one table's stored aggregates up to date and report its issues.
+
+        ``file_changed`` says the database file changed since the table was
+        last scanned; a table without new rows is then read again in full.
+        """
+        table_name = table_info['table_name']
+        started = time.perf_counter()
+
+        high = self._max_rowid(table_name)
+        if high is False:
+            result = self.scanner.scan_table(table_info)
+            result.update(mode='full', scanned_rows=result['row_count'])
+            return result
+
+        mode, low, kept_rows = self._plan_mode(table_name, signature, high, full, file_changed)
+        with self._transaction():
+            if mode == 'full':
+                self._reset(table_name)
+            scanned_rows = 0
+            if mode != 'unchanged':
+                scanned_rows = self._fold_rows(table_name, plan, low, high)
+            row_count = kept_rows + scanned_rows
+            self.state.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?, ?)",
+                (table_name, signature, schema_version, high, row_count, datetime.now().isoformat())
+            )
+            issues = self.scanner.make_issues(table_name, plan, self._load_counts(table_name, plan), row_count)
+            issues.extend(self._check_orphans(table_info, row_count, None if mode == 'full' else low))
+
+        return {
+            'table_name': table_name,
+            'row_count': row_count,
+            'scanned_rows': scanned_rows,
+            'mode': mode,
+            'rules_evaluated': len(plan) + len(table_info['foreign_keys']),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'issues': issues
+        }
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    def forget(self, tables: List[str]):
+        """Drop the stored state of tables changed outside a scan, so the next scan reads them in full"""
+        with self._transaction():
+            for table_name in tables:
+                self._reset(table_name)
+
+    def _plan_mode(self, table_name: str, signature: str, high: Optional[int],
+                   full: bool, file_changed: bool) -> Tuple[str, Optional[int], int]:
+        """
+        Decide how much of a table to read.
+
+        Returns:
+            (mode, low, kept_rows): rows with low < rowid <= high are read,
+            kept_rows are already folded into the stored aggregates
+        """
+        row = self.state.execute(
+            "SELECT signature, max_rowid, row_count FROM watermarks WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        if full or row is None or row[0] != signature:
+            return 'full', None, 0
+
+        _, low, stored_rows = row
+        if low is None:
+            return ('unchanged' if high is None else 'incremental'), None, 0
+        if high is None or high < low:
+            return 'full', None, 0
+
+        # Rows deleted below the mark would leave stale aggregates behind
+        kept_rows = self.adapter.conn.execute(
+            f"SELECT COUNT(*) FROM {quote_identifier(table_name)} WHERE rowid <= ?", (low,)
+        ).fetchone()[0]
+        if kept_rows != stored_rows:
+            return 'full', None, 0
+        if high == low:
+            # No new rows and no deletes, yet the file changed: rows may have been updated
+            return ('full', None, 0) if file_changed else ('unchanged', low, kept_rows)
+        return 'incremental', low, kept_rows
+
+    def _fold_rows(self, table_name: str, plan: List[Dict[str, Any]], low: Optional[int],
+                   high: Optional[int]) -> int:
+        """Run the single-pass scan over a rowid range and add it to the stored aggregates"""
+        if high is None:
+            return 0
+        query = ScanQuery(plan)
+        where = "rowid <= ?" if low is None else "rowid > ? AND rowid <= ?"
+        params = (high,) if low is None else (low, high)
+
+        mask_counters = [Counter() for _ in range(query.mask_columns)]
+        key_steps = [_step_key(step) for step in query.distinct_steps]
+        present = Counter()
+        hashes = defaultdict(set)
+        row_count = 0
+
+        for rows in self.adapter.execute_query_batches(
+                f"SELECT {', '.join(query.select)} FROM {quote_identifier(table_name)} WHERE {where}",
+                params, batch_size=SCAN_BATCH_SIZE):
+            row_count += len(rows)
+            columns = list(zip(*rows))
+            for counter, masks in zip(mask_counters, columns):
+                counter.update(masks)
+            keyed = [
+                (step_key, [value for value in values if value is not None])
+                for step_key, values in zip(key_steps, query.key_columns(columns))
+            ]
+            if query.row_step:
+                keyed.append((_step_key(query.row_step), [query.row_key(row) for row in rows]))
+            for step_key, values in keyed:
+                present[step_key] += len(values)
+                hashes[step_key].update(map(stable_hash, values))
+
+        totals = {_step_key(step): count for step, count in
+                  zip(query.count_steps, self._counts_by_step(query, mask_counters))}
+        totals.update(present)
+        for step_key, total in totals.items():
+            self.state.execute(
+                "INSERT OR IGNORE INTO aggregates (table_name, step) VALUES (?, ?)", (table_name, step_key)
+            )
+            step_id = self.state.execute(
+                "SELECT step_id FROM aggregates WHERE table_name = ? AND step = ?", (table_name, step_key)
+            ).fetchone()[0]
+            new_keys = 0
+            if step_key in hashes:
+                # Inserting in key order appends to the index b-tree instead of splitting pages at random
+                new_keys = self.state.executemany(
+                    "INSERT OR IGNORE INTO key_hashes VALUES (?, ?)",
+                    ((step_id, value) for value in sorted(hashes.pop(step_key)))
+                ).rowcount
+            self.state.execute(
+                "UPDATE aggregates SET total = total + ?, distinct_keys = distinct_keys + ? WHERE step_id = ?",
+                (total, new_keys, step_id)
+            )
+        return row_count
+
+    @staticmethod
+    def _counts_by_step(query: ScanQuery, mask_counters: List[Counter]) -> List[int]:
+        counts = query.count_findings(mask_counters)
+        return [counts[id(step)] for step in query.count_steps]
+
+    def _load_counts(self, table_name: str, plan: List[Dict[str, Any]]) -> Dict[int, int]:
+        """Findings per plan step (keyed by id(step)) from the stored aggregates"""
+        stored = {
+            step: (total, distinct_keys) for step, total, distinct_keys in self.state.execute(
+                "SELECT step, total, distinct_keys FROM aggregates WHERE table_name = ?", (table_name,)
+            )
+        }
+        counts = {}
+        for step in plan:
+            total, distinct_keys = stored.get(_step_key(step), (0, 0))
+            counts[id(step)] = total - distinct_keys if step['rule'].kind == 'distinct' else total
+        return counts
+
+    def _check_orphans(self, table_info: Dict[str, Any], row_count: int,
+                       low: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Orphaned references, re-checking only new child rows while the parent table is unchanged.
+
+        Any insert or delete in the parent can create or resolve orphans among
+        old child rows, so then the whole foreign key is checked again.
+        """
+        table_name = table_info['table_name']
+        issues = []
+        for fk in table_info['foreign_keys']:
+            parent_version = self._table_version(fk['references_table'])
+            row = self.state.execute(
+                "SELECT parent_version, orphans FROM orphan_checks WHERE table_name = ? AND column_name = ?",
+                (table_name, fk['column'])
+            ).fetchone()
+            if low is not None and parent_version and row is not None and row[0] == parent_version:
+                count = row[1] + self.scanner.count_orphans(table_name, fk, after_rowid=low)
+            else:
+                count = self.scanner.count_orphans(table_name, fk)
+            self.state.execute(
+                "INSERT OR REPLACE INTO orphan_checks VALUES (?, ?, ?, ?)",
+                (table_name, fk['column'], parent_version or '', count)
+            )
+            if count:
+                issues.append(self.scanner.orphan_issue(table_name, fk, count, row_count))
+        return issues
+
+    def _load_result(self, table_info: Dict[str, Any], plan: List[Dict[str, Any]],
+                     signature: str) -> Optional[Dict[str, Any]]:
+        """Stored result for a table, or None if it has no state for this signature"""
+        table_name = table_info['table_name']
+        row = self.state.execute(
+            "SELECT row_count FROM watermarks WHERE table_name = ? AND signature = ?", (table_name, signature)
+        ).fetchone()
+        if row is None:
+            return None
+        row_count = row[0]
+        issues = self.scanner.make_issues(table_name, plan, self._load_counts(table_name, plan), row_count)
+        for fk in table_info['foreign_keys']:
+            orphans = self.state.execute(
+                "SELECT orphans FROM orphan_checks WHERE table_name = ? AND column_name = ?",
+                (table_name, fk['column'])
+            ).fetchone()
+            if orphans is None:
+                return None
+            if orphans[0]:
+                issues.append(self.scanner.orphan_issue(table_name, fk, orphans[0], row_count))
+        return {
+            'table_name': table_name,
+            'row_count': row_count,
+            'scanned_rows': 0,
+            'mode': 'unchanged',
+            'rules_evaluated': len(plan) + len(table_info['foreign_keys']),
+            'elapsed_ms': 0.0,
+            'issues': issues
+        }
+
+    def _max_rowid(self, table_name: str):
+        """Highest rowid (None if empty), or False for WITHOUT ROWID tables"""
+        try:
+            return self.adapter.conn.execute(
+                f"SELECT max(rowid) FROM {quote_identifier(table_name)}"
+            ).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            if 'no such column' not in str(e):
+                raise
+            return False
+
+    def _table_version(self, table_name: str) -> Optional[str]:
+        """Changes whenever rows are inserted into or deleted from a table; None if it cannot be tracked"""
+        try:
+            high, count = self.adapter.conn.execute(
+                f"SELECT max(rowid), COUNT(*) FROM {quote_identifier(table_name)}"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None  # Missing or WITHOUT ROWID parent: always re-check
+        return f"{high}:{count}"
+
+    def _signature(self, table_name: str, plan: List[Dict[str, Any]]) -> str:
+        """Digest of the table definition and the rules evaluated on it"""
+        row = self.adapter.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        payload = json.dumps([row[0] if row else None] + [[_step_key(step), step['sql']] for step in plan])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _reset(self, table_name: str):
+        self.state.execute(
+            "DELETE FROM key_hashes WHERE step_id IN (SELECT step_id FROM aggregates WHERE table_name = ?)",
+            (table_name,)
+        )
+        for table in ('aggregates', 'orphan_checks', 'watermarks'):
+            self.state.execute(f"DELETE FROM {table} WHERE table_name = ?", (table_name,))
+        self.state.execute("DELETE FROM scan_state WHERE key = ?", (f"fingerprint:{table_name}",))
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.state.execute("SELECT value FROM scan_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str):
+        self.state.execute("INSERT OR REPLACE INTO scan_state VALUES (?, ?)", (key, value))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """One state transaction per table, so an interrupted run never leaves half-folded aggregates"""
+        self.state.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.state
+        except BaseException:
+            self.state.execute("ROLLBACK")
+            raise
+        self.state.execute("COMMIT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
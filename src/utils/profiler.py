@@ -0,0 +1,199 @@
+"""Per-column statistics from one streaming pass with fixed-size sketches"""
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.db.columnar import declared_kind
+from src.db.sqlite_adapter import COLUMNAR_CHUNK_ROWS, SQLiteAdapter, quote_identifier
+from src.utils.sampling import iter_sample_batches
+from src.utils.sketches import HLL_PRECISION, KLL_K, SPACE_SAVING_FACTOR, HyperLogLog, KLLSketch, SpaceSaving
+
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+DEFAULT_TOP_K = 10
+
+# Python type of a fetched value -> SQLite storage class
+STORAGE_CLASSES = {int: 'integer', float: 'real', str: 'text', bytes: 'blob'}
+
+# Storage classes a column's affinity should have converted away; finding one is type drift
+UNEXPECTED_CLASSES = {
+    'integer': {'text', 'blob'},
+    'real': {'text', 'blob'},
+    'text': {'integer', 'real'},
+}
+
+# SQLite's sort order across storage classes (integers and reals compare as numbers),
+# used for min/max of mixed columns
+_BOUND_ORDER = ('number', 'text', 'blob')
+
+
+class ColumnProfile:
+    """Sketches for one column; memory does not grow with the number of rows"""
+
+    def __init__(self, name: str, declared_type: Optional[str], top_k: int = DEFAULT_TOP_K,
+                 hll_precision: int = HLL_PRECISION, kll_k: int = KLL_K, seed: Optional[int] = None):
+        self.name = name
+        self.declared_type = declared_type
+        self.top_k = top_k
+        self.rows = 0
+        self.nulls = 0
+        self.types = Counter()
+        self.distinct = HyperLogLog(hll_precision)
+        self.frequent = SpaceSaving(top_k * SPACE_SAVING_FACTOR)
+        # KLL compaction is randomized; a fixed seed keeps repeated profiles identical
+        self.quantiles = KLLSketch(kll_k, seed=0 if seed is None else seed)
+        self.numeric_sum = 0.0
+        # Smallest and largest value seen per _BOUND_ORDER class
+        self.bounds: Dict[str, List[Any]] = {}
+
+    def add(self, values: np.ndarray):
+        """Add one batch of the column (object array, None for NULL)"""
+        self.rows += len(values)
+        present = values[~np.equal(values, None)]
+        self.nulls += len(values) - len(present)
+        if not len(present):
+            return
+        classes = {STORAGE_CLASSES.get(kind, 'text'): n for kind, n in Counter(map(type, present)).items()}
+        self.types.update(classes)
+        self.frequent.add(present)
+        self.distinct.add(present)
+        if classes.keys() <= {'integer', 'real'}:
+            self._add_numbers(present.astype(np.float64))
+        elif len(classes) == 1:
+            self._widen(next(iter(classes)), min(present), max(present))
+        else:
+            self._add_mixed(present)
+
+    def _add_mixed(self, present: np.ndarray):
+        by_class = {}
+        for value in present:
+            by_class.setdefault(STORAGE_CLASSES.get(type(value), 'text'), []).append(value)
+        numbers = by_class.pop('integer', []) + by_class.pop('real', [])
+        if numbers:
+            self._add_numbers(np.array(numbers, dtype=np.float64))
+        for storage_class, values in by_class.items():
+            self._widen(storage_class, min(values), max(values))
+
+    def _add_numbers(self, numbers: np.ndarray):
+        self.quantiles.add(numbers)
+        self.numeric_sum += float(numbers.sum())
+        self._widen('number', float(numbers.min()), float(numbers.max()))
+
+    def _widen(self, bound_class: str, low: Any, high: Any):
+        current = self.bounds.get(bound_class)
+        if current:
+            low, high = min(low, current[0]), max(high, current[1])
+        self.bounds[bound_class] = [low, high]
+
+    def result(self) -> Dict[str, Any]:
+        present = sorted(self.bounds, key=_BOUND_ORDER.index)
+        minimum = self.bounds[present[0]][0] if present else None
+        maximum = self.bounds[present[-1]][1] if present else None
+        numeric = self.types['integer'] + self.types['real']
+        if numeric and not self.types['real']:
+            # Integer-only columns went through float64; report their bounds as ints
+            minimum = int(minimum) if present[0] == 'number' else minimum
+            maximum = int(maximum) if present[-1] == 'number' else maximum
+        affinity = declared_kind(self.declared_type)
+        quantiles = None
+        if numeric:
+            quantiles = dict(zip((f"p{round(q * 100):02d}" for q in QUANTILES), self.quantiles.quantiles(QUANTILES)))
+        return {
+            'name': self.name,
+            'declared_type': self.declared_type,
+            'rows': self.rows,
+            'nulls': self.nulls,
+            'null_rate': round(self.nulls / self.rows, 6) if self.rows else 0.0,
+            'distinct_estimate': min(self.distinct.count(), self.rows - self.nulls),
+            'types': dict(self.types),
+            'type_drift': sorted(set(self.types) & UNEXPECTED_CLASSES.get(affinity, set())),
+            'min': minimum,
+            'max': maximum,
+            'mean': self.numeric_sum / numeric if numeric else None,
+            'quantiles': quantiles,
+            'top_values': self.frequent.top(self.top_k)
+        }
+
+
+class TableProfiler:
+    """
+    Null rate, approximate distinct count, top values, min/max and quantiles per column.
+
+    Every column of a table is profiled from one streamed SELECT (or from a
+    rowid sample of it) into fixed-size sketches: HyperLogLog for distinct
+    counts, Space-Saving for top values and KLL for quantiles. Memory is
+    bounded by the sketches and one fetch batch, not by the table size.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, top_k: int = DEFAULT_TOP_K, hll_precision: int = HLL_PRECISION,
+                 kll_k: int = KLL_K, batch_size: int = COLUMNAR_CHUNK_ROWS):
+        self.adapter = adapter
+        self.top_k = top_k
+        self.hll_precision = hll_precision
+        self.kll_k = kll_k
+        self.batch_size = batch_size
+
+    def profile_table(self, table_name: str, columns: Optional[List[str]] = None,
+                      sample_size: Optional[int] = None, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Profile one table.
+
+        Args:
+            table_name: Table to profile
+            columns: Only these columns (default: all)
+            sample_size: Profile a uniform random sample of this many rows, read by rowid
+            seed: Seed for the sample
+
+        Returns:
+            {'table_name', 'rows_profiled', 'sampled', 'elapsed_ms', 'columns': [column results]}
+        """
+        declared = {
+            row[1]: row[2]
+            for row in self.adapter.conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+        }
+        if not declared:
+            raise ValueError(f"Unknown table: {table_name}")
+        columns = list(columns or declared)
+        missing = [name for name in columns if name not in declared]
+        if missing:
+            raise ValueError(f"Unknown columns in {table_name}: {', '.join(missing)}")
+
+        started = time.perf_counter()
+        profiles = [
+            ColumnProfile(name, declared[name], self.top_k, self.hll_precision, self.kll_k, seed)
+            for name in columns
+        ]
+        select = ", ".join(quote_identifier(name) for name in columns)
+        if sample_size:
+            batches = iter_sample_batches(self.adapter, table_name, select, sample_size, seed)
+        else:
+            batches = self.adapter.execute_query_batches(
+                f"SELECT {select} FROM {quote_identifier(table_name)}", batch_size=self.batch_size
+            )
+
+        rows_profiled = 0
+        for rows in batches:
+            rows_profiled += len(rows)
+            table = np.empty((len(rows), len(columns)), dtype=object)
+            table[:] = rows
+            for j, profile in enumerate(profiles):
+                profile.add(table[:, j])
+
+        return {
+            'table_name': table_name,
+            'rows_profiled': rows_profiled,
+            'sampled': bool(sample_size),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'columns': [profile.result() for profile in profiles]
+        }
+
+    def profile(self, tables: Optional[List[str]] = None, sample_size: Optional[int] = None,
+                seed: Optional[int] = None) -> Dict[str, Any]:
+        """Profile all tables (or the given ones): {'tables': {name: profile_table result}}"""
+        return {
+            'tables': {
+                name: self.profile_table(name, sample_size=sample_size, seed=seed)
+                for name in (tables or self.adapter.get_tables())
+            }
+        }
@@ -0,0 +1,164 @@
+"""Approximate health scans of large tables from a random row sample"""
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+from src.utils.health_check import ORPHAN_RULE, HealthScanner, Rule, ScanQuery
+from src.utils.sampling import (DEFAULT_CONFIDENCE, _rows_by_rowid, iter_sample_batches, stratified_interval,
+                                stratified_rowids, wilson_interval)
+
+
+class SampledScanner:
+    """
+    Health scans that read a random sample of each table instead of every row.
+
+    Count rules (NULLs, negative values, future dates) and orphaned foreign
+    keys are evaluated per sampled row with HealthScanner's bitmask query;
+    each finding is reported as a rate with a confidence interval and an
+    estimated row count for the whole table. With the default 'rowid'
+    method only the sampled rows are read, so the cost depends on the
+    sample size rather than the table size.
+
+    Duplicate rules cannot be estimated from a sample (a row's duplicate is
+    rarely sampled with it) and are listed under 'skipped_rules'.
+    """
+
+    def __init__(self, adapter: SQLiteAdapter, sample_size: int, seed: Optional[int] = None,
+                 confidence: float = DEFAULT_CONFIDENCE, method: str = 'rowid',
+                 stratify_by: Optional[str] = None, rules: Optional[List[Rule]] = None):
+        """
+        Args:
+            adapter: Connected adapter for the database to scan
+            sample_size: Rows sampled per table
+            seed: Seed for repeatable samples
+            confidence: Confidence level of the reported intervals
+            method: 'rowid' or 'reservoir', see src.utils.sampling
+            stratify_by: Stratify tables that have this column by its values
+            rules: Column rules, defaults to HealthScanner's
+        """
+        if sample_size < 1:
+            raise ValueError("Sample size must be at least 1")
+        self.adapter = adapter
+        self.scanner = HealthScanner(adapter, rules)
+        self.sample_size = sample_size
+        self.seed = seed
+        self.confidence = confidence
+        self.method = method
+        self.stratify_by = stratify_by
+
+    def scan(self, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Scan a sample of all tables (or the given ones).
+
+        Returns:
+            Same shape as HealthScanner.scan; each table result also has
+            'sampled_rows' and 'skipped_rules', and each issue 'sample_count',
+            'rate_low', 'rate_high' and 'sampled'; 'count' is an estimate
+        """
+        schema = self.adapter.get_full_schema(count_mode='estimate', use_cache=True)
+        if tables:
+            missing = set(tables) - set(schema)
+            if missing:
+                raise ValueError(f"Unknown tables: {', '.join(sorted(missing))}")
+            schema = {name: schema[name] for name in tables}
+
+        results = {name: self.scan_table(info) for name, info in schema.items()}
+        return {
+            'tables': results,
+            'issues': [issue for result in results.values() for issue in result['issues']]
+        }
+
+    def scan_table(self, table_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate the count rules and foreign keys of one table on a sample"""
+        table_name = table_info['table_name']
+        started = time.perf_counter()
+        plan = self.scanner.plan_table(table_info)
+        steps = [step for step in plan if step['rule'].kind == 'count']
+        steps.extend(self._orphan_steps(table_info))
+        query = ScanQuery(steps)
+        population = table_info['row_count']
+
+        column_names = {column['name'] for column in table_info['columns']}
+        if self.stratify_by and self.stratify_by in column_names:
+            strata = stratified_rowids(self.adapter, table_name, self.stratify_by, self.sample_size, self.seed)
+            tallies = [
+                (stratum['population'], *self._tally(query, _rows_by_rowid(
+                    self.adapter, quote_identifier(table_name), ", ".join(query.select), stratum['rowids'])))
+                for stratum in strata.values()
+            ]
+            population = sum(stratum['population'] for stratum in strata.values())
+        else:
+            batches = iter_sample_batches(self.adapter, table_name, ", ".join(query.select),
+                                          self.sample_size, self.seed, self.method)
+            tallies = [(population, *self._tally(query, batches))]
+        sampled_rows = sum(n for _, n, _ in tallies)
+
+        issues = []
+        for step in query.count_steps:
+            found = [(stratum_population, n, counts[id(step)]) for stratum_population, n, counts in tallies]
+            sample_count = sum(x for _, _, x in found)
+            if not sample_count:
+                continue
+            if len(found) == 1:
+                rate = sample_count / sampled_rows
+                low, high = wilson_interval(sample_count, sampled_rows, self.confidence, population)
+            else:
+                rate, low, high = stratified_interval(found, self.confidence)
+            issues.append(self._issue(table_name, step, sample_count, rate, low, high, population))
+
+        return {
+            'table_name': table_name,
+            'row_count': population,
+            'sampled_rows': sampled_rows,
+            'rules_evaluated': len(query.count_steps),
+            'skipped_rules': sorted({step['rule'].name for step in plan if step['rule'].kind != 'count'}),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'issues': issues
+        }
+
+    # ========================================
+    # PRIVATE HELPER METHODS
+    # ========================================
+
+    @staticmethod
+    def _tally(query: ScanQuery, batches) -> tuple:
+        """(rows, findings per count step keyed by id(step)) over sampled rows"""
+        mask_counters = [Counter() for _ in range(query.mask_columns)]
+        rows_seen = 0
+        for rows in batches:
+            rows_seen += len(rows)
+            for counter, masks in zip(mask_counters, zip(*rows)):
+                counter.update(masks)
+        return rows_seen, query.count_findings(mask_counters)
+
+    def _orphan_steps(self, table_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Per-row orphan predicates, so foreign keys are checked on the sampled rows only"""
+        child = quote_identifier(table_info['table_name'])
+        existing = set(self.adapter.get_tables())
+        steps = []
+        for fk in table_info['foreign_keys']:
+            column = f"{child}.{quote_identifier(fk['column'])}"
+            sql = f"{column} IS NOT NULL"
+            if fk['references_table'] in existing:
+                parent = quote_identifier(fk['references_table'])
+                parent_column = quote_identifier(fk['references_column']) if fk['references_column'] else 'rowid'
+                sql += f" AND NOT EXISTS (SELECT 1 FROM {parent} AS p WHERE p.{parent_column} = {column})"
+            steps.append({'rule': ORPHAN_RULE, 'column': fk['column'], 'sql': sql, 'fk': fk})
+        return steps
+
+    def _issue(self, table_name: str, step: Dict[str, Any], sample_count: int, rate: float,
+               low: float, high: float, population: int) -> Dict[str, Any]:
+        if 'fk' in step:
+            issue = self.scanner.orphan_issue(table_name, step['fk'], 0, population)
+        else:
+            issue = self.scanner._issue(table_name, step['column'], step['rule'], 0, population)
+        issue.update(
+            count=round(rate * population),
+            rate=round(rate, 6),
+            rate_low=round(low, 6),
+            rate_high=round(high, 6),
+            sample_count=sample_count,
+            sampled=True
+        )
+        return issue
@@ -0,0 +1,297 @@
+"""Random row samples, and confidence intervals for rates measured on them"""
+import math
+import sqlite3
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.db.sqlite_adapter import SQLiteAdapter, quote_identifier
+
+# How rows are picked:
+#   'rowid'     - random probes into the rowid b-tree; reads only the sampled rows
+#   'reservoir' - one streamed pass over the table (Algorithm L); for WITHOUT ROWID tables
+SAMPLING_METHODS = ('rowid', 'reservoir')
+
+# Rowids looked up per IN (...) query; stays under SQLite's oldest parameter limit (999)
+ROWID_CHUNK = 500
+
+# Extra rowids drawn to make up for gaps left by deleted rows
+OVERSAMPLE = 1.2
+MAX_DRAW_ROUNDS = 8
+
+# Stratified samples keep one reservoir per distinct value of the stratum column
+MAX_STRATA = 1000
+
+DEFAULT_CONFIDENCE = 0.95
+
+SCAN_BATCH_SIZE = 10000
+
+
+def rowid_bounds(adapter: SQLiteAdapter, table_name: str) -> Optional[tuple]:
+    """(min rowid, max rowid) from the rowid b-tree, None for empty or WITHOUT ROWID tables"""
+    table = quote_identifier(table_name)
+    try:
+        # Separate subqueries: SQLite only seeks the b-tree for a lone min() or max(), both together scan
+        low, high = adapter.conn.execute(
+            f"SELECT (SELECT min(rowid) FROM {table}), (SELECT max(rowid) FROM {table})"
+        ).fetchone()
+    except sqlite3.OperationalError as e:
+        if 'no such column' not in str(e):
+            raise
+        return None
+    return None if low is None else (low, high)
+
+
+def sample_rowids(adapter: SQLiteAdapter, table_name: str, size: int,
+                  seed: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Up to ``size`` distinct rowids chosen uniformly at random, in ascending order.
+
+    Candidates are drawn uniformly from [min rowid, max rowid] and kept if a
+    row exists, so every row is equally likely whatever the gaps. Each probe
+    is a rowid b-tree lookup; no table pages other than those holding the
+    sampled rows are read.
+
+    Returns:
+        Sorted rowids, or None if the table has no rowid (WITHOUT ROWID)
+    """
+    if size < 1:
+        raise ValueError("Sample size must be at least 1")
+    table = quote_identifier(table_name)
+    bounds = rowid_bounds(adapter, table_name)
+    if bounds is None:
+        exists = adapter.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+        return None if exists else []
+    low, high = bounds
+    span = high - low + 1
+    rows, _ = adapter.get_row_count(table_name, 'estimate')
+    density = min(1.0, max(rows, 1) / span)
+
+    rng = np.random.default_rng(seed)
+    tried = set()
+    found: List[int] = []
+    for _ in range(MAX_DRAW_ROUNDS):
+        wanted = size - len(found)
+        if wanted <= 0 or len(tried) >= span:
+            break
+        draw = min(span - len(tried), int(math.ceil(wanted / density * OVERSAMPLE)) + 1)
+        candidates = [rowid for rowid in (low + rng.choice(span, draw, replace=False)).tolist()
+                      if rowid not in tried]
+        tried.update(candidates)
+        found.extend(_existing_rowids(adapter, table, candidates))
+    if len(found) > size:
+        found = rng.choice(found, size, replace=False).tolist()
+    return sorted(found)
+
+
+def _existing_rowids(adapter: SQLiteAdapter, table: str, rowids: List[int]) -> Iterator[int]:
+    cursor = adapter.conn.cursor()
+    cursor.row_factory = None
+    for start in range(0, len(rowids), ROWID_CHUNK):
+        chunk = rowids[start:start + ROWID_CHUNK]
+        cursor.execute(f"SELECT rowid FROM {table} WHERE rowid IN ({', '.join('?' * len(chunk))})", chunk)
+        yield from (row[0] for row in cursor.fetchall())
+
+
+class Reservoir:
+    """
+    Uniform sample of ``size`` items from a stream of unknown length (Algorithm L).
+
+    After the reservoir fills, the number of items to skip before the next
+    replacement is drawn directly, so the work per item skipped is an index
+    increment rather than a random draw.
+    """
+
+    def __init__(self, size: int, rng: np.random.Generator):
+        self.size = size
+        self.items: List[Any] = []
+        self.seen = 0
+        self._rng = rng
+        self._weight = 1.0
+        # Stream index of the next item to take once the reservoir is full
+        self._next = size - 1
+
+    def add_batch(self, batch: List[Any]):
+        if len(self.items) < self.size:
+            self.items.extend(batch[:self.size - len(self.items)])
+            if len(self.items) < self.size or not self.size:
+                self.seen += len(batch)
+                return
+            self._advance()
+        while True:
+            index = self._next - self.seen
+            if index >= len(batch):
+                break
+            self.items[self._rng.integers(self.size)] = batch[index]
+            self._advance()
+        self.seen += len(batch)
+
+    def _advance(self):
+        # 1 - random() is in (0, 1], so the logarithms are finite
+        self._weight *= math.exp(math.log(1.0 - self._rng.random()) / self.size)
+        skip = math.log(1.0 - self._rng.random()) / math.log(1 - self._weight)
+        self._next += int(math.floor(skip)) + 1
+
+
+def reservoir_sample(batches: Iterable[List[Any]], size: int, seed: Optional[int] = None) -> Tuple[List[Any], int]:
+    """
+    Returns:
+        (sample, items seen)
+    """
+    reservoir = Reservoir(size, np.random.default_rng(seed))
+    for batch in batches:
+        reservoir.add_batch(batch)
+    return reservoir.items, reservoir.seen
+
+
+def iter_sample_batches(adapter: SQLiteAdapter, table_name: str, select: str, size: int,
+                        seed: Optional[int] = None, method: str = 'rowid') -> Iterator[List[tuple]]:
+    """
+    Rows of a uniform random sample of ``size`` rows, ROWID_CHUNK at a time.
+
+    ``select`` is the SELECT list to evaluate for each sampled row. 'rowid'
+    falls back to 'reservoir' for WITHOUT ROWID tables; a reservoir over a
+    rowid table keeps only rowids and reads the sampled rows afterwards.
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method '{method}', expected one of {SAMPLING_METHODS}")
+    table = quote_identifier(table_name)
+    rowids = sample_rowids(adapter, table_name, size, seed) if method == 'rowid' else None
+    if rowids is None:
+        if rowid_bounds(adapter, table_name) is None:
+            rows, _ = reservoir_sample(
+                adapter.execute_query_batches(f"SELECT {select} FROM {table}", batch_size=SCAN_BATCH_SIZE),
+                size, seed
+            )
+            for start in range(0, len(rows), ROWID_CHUNK):
+                yield rows[start:start + ROWID_CHUNK]
+            return
+        sampled, _ = reservoir_sample(_rowid_batches(adapter, table), size, seed)
+        rowids = sorted(sampled)
+    yield from _rows_by_rowid(adapter, table, select, rowids)
+
+
+def _rowid_batches(adapter: SQLiteAdapter, table: str, extra: str = "") -> Iterator[List[Any]]:
+    for rows in adapter.execute_query_batches(f"SELECT rowid{extra} FROM {table}", batch_size=SCAN_BATCH_SIZE):
+        yield [row[0] for row in rows] if not extra else rows
+
+
+def _rows_by_rowid(adapter: SQLiteAdapter, table: str, select: str, rowids: List[int]) -> Iterator[List[tuple]]:
+    cursor = adapter.conn.cursor()
+    cursor.row_factory = None
+    for start in range(0, len(rowids), ROWID_CHUNK):
+        chunk = rowids[start:start + ROWID_CHUNK]
+        cursor.execute(f"SELECT {select} FROM {table} WHERE rowid IN ({', '.join('?' * len(chunk))})", chunk)
+        rows = cursor.fetchall()
+        if rows:
+            yield rows
+
+
+def stratified_rowids(adapter: SQLiteAdapter, table_name: str, column: str, size: int,
+                      seed: Optional[int] = None) -> Dict[Any, Dict[str, Any]]:
+    """
+    Stratified random sample by the values of ``column``, allocated proportionally.
+
+    Stratum sizes come from a GROUP BY (an index scan when the column is
+    indexed); then one pass over (rowid, column) fills a reservoir per
+    stratum. Every non-empty stratum gets at least one row, so rare values
+    are represented.
+
+    Returns:
+        {stratum value: {'population': rows in the stratum, 'rowids': sorted sampled rowids}}
+    """
+    if size < 1:
+        raise ValueError("Sample size must be at least 1")
+    table = quote_identifier(table_name)
+    column_sql = quote_identifier(column)
+    counts = dict(adapter.conn.execute(f"SELECT {column_sql}, count(*) FROM {table} GROUP BY 1").fetchall())
+    if len(counts) > MAX_STRATA:
+        raise ValueError(f"{column} has {len(counts):,} distinct values; stratify by a column with at most {MAX_STRATA}")
+    total = sum(counts.values())
+    rng = np.random.default_rng(seed)
+    reservoirs = {
+        value: Reservoir(min(count, max(1, round(size * count / total))), rng)
+        for value, count in counts.items()
+    }
+    for rows in _rowid_batches(adapter, table, f", {column_sql}"):
+        by_stratum: Dict[Any, List[int]] = {}
+        for rowid, value in rows:
+            by_stratum.setdefault(value, []).append(rowid)
+        for value, stratum_rowids in by_stratum.items():
+            reservoirs[value].add_batch(stratum_rowids)
+    return {
+        value: {'population': counts[value], 'rowids': sorted(reservoir.items)}
+        for value, reservoir in reservoirs.items()
+    }
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, n: int, confidence: float = DEFAULT_CONFIDENCE,
+                    population: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Wilson score interval for a proportion measured on a simple random sample.
+
+    With ``population`` the finite population correction is applied by
+    inflating the effective sample size, so a sample of the whole table has
+    zero width.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    if population is not None and population > 1:
+        if n >= population:
+            return p, p
+        n = n * (population - 1) / (population - n)
+    z = _z(confidence)
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def stratified_interval(strata: Iterable[Tuple[int, int, int]],
+                        confidence: float = DEFAULT_CONFIDENCE) -> Tuple[float, float, float]:
+    """
+    Rate and normal-approximation interval from a stratified sample.
+
+    Args:
+        strata: (population, sample size, successes) per stratum
+
+    Returns:
+        (rate, low, high)
+    """
+    strata = [stratum for stratum in strata if stratum[1]]
+    total = sum(population for population, _, _ in strata)
+    if not total:
+        return 0.0, 0.0, 1.0
+    rate = variance = 0.0
+    for population, n, successes in strata:
+        weight = population / total
+        p = successes / n
+        rate += weight * p
+        if population > 1:
+            variance += weight ** 2 * p * (1 - p) / n * (population - n) / (population - 1)
+    margin = _z(confidence) * math.sqrt(variance)
+    return rate, max(0.0, rate - margin), min(1.0, rate + margin)
+
+
+def sample_rows(adapter: SQLiteAdapter, table_name: str, size: int, method: str = 'rowid',
+                seed: Optional[int] = None, stratify_by: Optional[str] = None,
+                columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Rows of a uniform (or, with ``stratify_by``, stratified) random sample as dicts"""
+    if columns is None:
+        columns = [row[1] for row in adapter.conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")]
+        if not columns:
+            raise ValueError(f"Unknown table: {table_name}")
+    select = ", ".join(quote_identifier(name) for name in columns)
+    if stratify_by:
+        strata = stratified_rowids(adapter, table_name, stratify_by, size, seed)
+        rowids = sorted(rowid for stratum in strata.values() for rowid in stratum['rowids'])
+        batches = _rows_by_rowid(adapter, quote_identifier(table_name), select, rowids)
+    else:
+        batches = iter_sample_batches(adapter, table_name, select, size, seed, method)
+    return [dict(zip(columns, row)) for rows in batches for row in rows]
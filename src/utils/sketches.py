@@ -0,0 +1,218 @@
+"""Fixed-memory streaming sketches: distinct counts, heavy hitters and quantiles"""
+import heapq
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import mmh3
+import numpy as np
+
+# HyperLogLog precision: 2**14 one-byte registers, ~0.8% standard error
+HLL_PRECISION = 14
+
+# Space-Saving counters kept per top-k requested
+SPACE_SAVING_FACTOR = 10
+
+# KLL accuracy parameter: ~1.7/k normalized rank error (~0.8% at 200)
+KLL_K = 200
+_KLL_DECAY = 2 / 3
+
+_U64 = np.uint64
+_MASK32 = _U64(0xFFFFFFFF)
+_MASK62 = _U64((1 << 62) - 1)
+_TEXT_TAG = _U64(1 << 62)
+_BLOB_TAG = _U64(2 << 62)
+
+
+def fmix64(h: np.ndarray) -> np.ndarray:
+    """MurmurHash3 64-bit finalizer, vectorized"""
+    h = h ^ (h >> _U64(33))
+    h = h * _U64(0xFF51AFD7ED558CCD)
+    h = h ^ (h >> _U64(33))
+    h = h * _U64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> _U64(33))
+
+
+def hash_values(values: Sequence[Any]) -> np.ndarray:
+    """
+    64-bit hashes of SQLite values, equal for values SQL's DISTINCT treats as equal.
+
+    Numbers use Python's hash(), which is deterministic for numbers and
+    equal for 1 and 1.0 (as SQLite compares them); text and blobs use
+    64-bit MurmurHash3 with a per-class tag in the top two bits, so
+    high-cardinality text is not capped at 2**32 hash values. All are
+    spread with fmix64 before use.
+    """
+    values = values.tolist() if isinstance(values, np.ndarray) and values.dtype != object else values
+    count = len(values)
+    types = set(map(type, values))
+    if types <= {int, float}:
+        return fmix64(np.fromiter(map(hash, values), dtype=np.int64, count=count).view(np.uint64))
+    if types == {str}:
+        return fmix64(_tagged(_murmur64(values), _TEXT_TAG))
+    hashes = np.empty(count, dtype=np.uint64)
+    values = np.asarray(values, dtype=object)
+    kinds = np.fromiter((0 if isinstance(value, (int, float)) else 1 if isinstance(value, str) else 2
+                         for value in values), dtype=np.int8, count=count)
+    numbers, text, blobs = kinds == 0, kinds == 1, kinds == 2
+    hashes[numbers] = np.fromiter(map(hash, values[numbers]), dtype=np.int64).view(np.uint64)
+    hashes[text] = _tagged(_murmur64(values[text]), _TEXT_TAG)
+    hashes[blobs] = _tagged(_murmur64(values[blobs]), _BLOB_TAG)
+    return fmix64(hashes)
+
+
+def _murmur64(values: Sequence[Any]) -> np.ndarray:
+    # The first 8 bytes of the x64 128-bit digest, i.e. mmh3.hash64(value)[0],
+    # without building a tuple per value.
+    digests = b"".join(map(mmh3.hash_bytes, values))
+    return np.frombuffer(digests, dtype="<i8")[::2].astype(np.int64)
+
+
+def _tagged(hashes: np.ndarray, tag: np.uint64) -> np.ndarray:
+    return (hashes.view(np.uint64) & _MASK62) | tag
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact bit length of uint64 values (frexp on 32-bit halves, which float64 holds exactly)"""
+    high = (values >> _U64(32)).astype(np.float64)
+    low = (values & _MASK32).astype(np.float64)
+    high_bits = np.frexp(high)[1]
+    return np.where(high_bits > 0, high_bits + 32, np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2**precision bytes"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        index = (hashes >> _U64(64 - self.precision)).astype(np.intp)
+        rest = hashes << _U64(self.precision)
+        # Leading zeros of the remaining bits plus one, capped when they are all zero
+        rank = (64 - self.precision + 1 - np.maximum(_bit_length(rest) - self.precision, 0)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, values: Sequence[Any]):
+        self.add_hashes(hash_values(values))
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """
+    Heavy hitters with a fixed number of counters.
+
+    Batches are merged Misra-Gries/Space-Saving style: counts of the
+    batch are added to the summary, and if more than ``capacity`` values
+    are tracked, only the largest are kept. A value that enters later is
+    charged the largest count dropped so far as possible undercount
+    (``error``), so a reported count overestimates the true count by at
+    most its error.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self.floor = 0
+
+    def add(self, values: Iterable[Any]):
+        self.add_counts(Counter(values))
+
+    def add_counts(self, counts: Counter):
+        for value in self.counts:
+            self.counts[value] += counts.get(value, 0)
+        # New values all start from the same floor, so only the batch's most
+        # frequent capacity + 1 of them can be kept or set the next floor
+        arrivals = [
+            (value, count) for value, count in counts.most_common(self.capacity + 1 + len(self.counts))
+            if value not in self.counts
+        ][:self.capacity + 1]
+        for value, count in arrivals:
+            self.counts[value] = count + self.floor
+            self.errors[value] = self.floor
+        if len(self.counts) > self.capacity:
+            kept = heapq.nlargest(self.capacity + 1, self.counts.items(), key=lambda item: item[1])
+            # Ties at the boundary are dropped too, so the floor bounds every evicted count
+            self.floor = max(self.floor, kept[-1][1])
+            self.counts = {value: count for value, count in kept[:-1] if count > self.floor}
+            self.errors = {value: self.errors[value] for value in self.counts}
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """The k most frequent values: [{'value', 'count', 'error'}]; true count is in [count - error, count]"""
+        ranked = heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+        return [{'value': value, 'count': count, 'error': self.errors[value]} for value, count in ranked]
+
+
+class KLLSketch:
+    """
+    Quantiles of a numeric stream in O(k log(n/k)) memory (Karnin, Lang, Liberty).
+
+    Level h holds items standing for 2**h inputs each. A full level is
+    sorted and every other item, from a random offset, is promoted to the
+    next level; the top level gets capacity k and lower ones shrink by 2/3
+    per level. Levels are only compacted once the whole sketch is full.
+    """
+
+    def __init__(self, k: int = KLL_K, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * _KLL_DECAY ** depth)))
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        # Lazy compaction: only while the sketch is over its total capacity,
+        # always compacting the lowest full level
+        while self.size() > sum(self._capacity(level) for level in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) > self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind so the promoted half keeps exact weight
+            keep = items[:len(items) % 2]
+            promoted = items[len(keep):][self._rng.integers(2)::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def quantiles(self, fractions: Sequence[float]) -> List[Optional[float]]:
+        if not self.count:
+            return [None] * len(fractions)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.float64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+        targets = np.asarray(fractions, dtype=np.float64) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(values) - 1)
+        return [float(value) for value in values[index]]
+
+    def size(self) -> int:
+        return sum(len(items) for items in self.levels)
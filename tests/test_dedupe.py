@@ -0,0 +1,36 @@
+"""Duplicate detection on tables it can and cannot search"""
+import sqlite3
+
+import pytest
+
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.dedupe import DuplicateFinder
+
+
+def _finder(path, *statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(";".join(statements))
+    conn.close()
+    return SQLiteAdapter(str(path), cache_dir=str(path.parent / "cache"))
+
+
+def test_exact_duplicates_are_grouped(tmp_path):
+    with _finder(tmp_path / "users.db",
+                 "CREATE TABLE users (email TEXT)",
+                 "INSERT INTO users VALUES ('A@x.io'), ('a@x.io '), ('b@x.io')") as db:
+        result = DuplicateFinder(db).exact_duplicates('users', ['email'])
+    assert result['groups'] == 1
+    assert result['examples'] == [[1, 2]]
+
+
+@pytest.mark.parametrize('fuzzy', [False, True])
+def test_without_rowid_table_is_a_value_error(tmp_path, fuzzy):
+    with _finder(tmp_path / "keys.db",
+                 "CREATE TABLE k (a TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID",
+                 "INSERT INTO k VALUES ('x', 'same'), ('y', 'same')") as db:
+        finder = DuplicateFinder(db)
+        with pytest.raises(ValueError, match="WITHOUT ROWID"):
+            if fuzzy:
+                finder.near_duplicates('k', ['name'])
+            else:
+                finder.exact_duplicates('k', ['name'])
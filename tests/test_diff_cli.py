@@ -0,0 +1,33 @@
+"""diff shows every kind of changed row, up to --rows"""
+import sqlite3
+
+from click.testing import CliRunner
+
+from src.cli.main import cli
+from src.db.snapshot_manager import SnapshotManager
+
+
+def test_inserted_deleted_and_updated_rows_are_listed(tmp_path):
+    db_path, snapshots_dir = tmp_path / "app.db", tmp_path / "snapshots"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("CREATE TABLE t (x TEXT); INSERT INTO t VALUES ('a'), ('b'), ('c'), ('d'), ('e')")
+    conn.commit()
+    manager = SnapshotManager(str(db_path), str(snapshots_dir))
+    before = manager.create_snapshot("before")
+    conn.executescript("""
+        DELETE FROM t WHERE x IN ('a', 'b', 'c');
+        UPDATE t SET x = 'D' WHERE x = 'd';
+        INSERT INTO t VALUES ('f');
+    """)
+    conn.close()
+    after = manager.create_snapshot("after")
+
+    result = CliRunner().invoke(cli, ['diff', str(db_path), before, after, '--rows', '2',
+                                      '--snapshots-dir', str(snapshots_dir)], env={'COLUMNS': '200'})
+    assert result.exit_code == 0, result.output
+    assert "+ t rowid 6: x=f" in result.output
+    assert "- t rowid 1: x=a" in result.output
+    assert "- t rowid 2: x=b" in result.output
+    assert "- t rowid 3" not in result.output
+    assert "1 more deleted rows in t" in result.output
+    assert "~ t rowid 4: x: d → D" in result.output
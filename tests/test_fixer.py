@@ -0,0 +1,78 @@
+"""A dry run must report the rows apply() will change"""
+import sqlite3
+
+from src.db.snapshot_manager import SnapshotManager
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.fixer import FixEngine
+from src.utils.health_check import HealthScanner
+
+
+def _estimate_and_apply(path, *statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(";".join(statements))
+    conn.close()
+    with SQLiteAdapter(str(path), cache_dir=str(path.parent / "cache")) as db:
+        engine = FixEngine(db)
+        plan = engine.plan(HealthScanner(db).scan()['issues'])
+        estimate = engine.estimate(plan)
+        applied = engine.apply(plan)
+    return estimate, applied
+
+
+def _rows(result):
+    return [(repair['rule'], repair['column'], repair['rows']) for repair in result['repairs']]
+
+
+def test_overlapping_duplicate_rules_are_not_counted_twice(tmp_path):
+    # Row 2 repeats row 1 exactly (and so its email, in any case); row 3 only differs in case
+    estimate, applied = _estimate_and_apply(
+        tmp_path / "users.db",
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT)",
+        "INSERT INTO users (name, email) VALUES ('a', 'a@x.io'), ('a', 'a@x.io'), ('b', 'A@x.io'), ('c', 'c@x.io')"
+    )
+    assert applied['rows'] == 2
+    assert estimate['rows'] == applied['rows']
+    assert _rows(estimate) == _rows(applied)
+
+
+def test_duplicate_group_losing_its_kept_row_is_replayed(tmp_path):
+    # Deleting row 2 as a duplicate of row 1 by email leaves row 3 alone in its backup_email group
+    estimate, applied = _estimate_and_apply(
+        tmp_path / "users.db",
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, backup_email TEXT)",
+        "INSERT INTO users (email, backup_email) VALUES ('a@x.io', 'y@x.io'), ('a@x.io', 'x@x.io'), "
+        "('b@x.io', 'x@x.io')"
+    )
+    assert _rows(estimate) == _rows(applied)
+    assert estimate['rows'] == applied['rows'] == 1
+
+
+def test_values_deleted_as_duplicates_are_not_repaired_again(tmp_path):
+    estimate, applied = _estimate_and_apply(
+        tmp_path / "products.db",
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price INTEGER)",
+        "INSERT INTO products (name, price) VALUES ('a', -1), ('a', -1), ('b', -2)"
+    )
+    assert _rows(applied) == [('duplicate_rows', None, 1), ('negative_values', 'price', 2)]
+    assert _rows(estimate) == _rows(applied)
+
+
+def test_pre_fix_snapshot_uses_the_online_backup(tmp_path):
+    db_path = tmp_path / "live.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA wal_autocheckpoint=0;
+        CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price INTEGER);
+        INSERT INTO products (name, price) VALUES ('a', 1), ('b', -2);
+    """)
+    try:
+        with SQLiteAdapter(str(db_path), cache_dir=str(tmp_path / "cache")) as db:
+            manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"), method='copy')
+            engine = FixEngine(db, manager)
+            snapshot_id = engine.apply(engine.plan(HealthScanner(db).scan()['issues']))['snapshot_id']
+    finally:
+        conn.close()
+    metadata = manager.get_snapshot(snapshot_id)
+    assert metadata['method'] == 'backup'
+    assert metadata['table_row_counts'] == {'products': 2}
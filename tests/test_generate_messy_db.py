@@ -0,0 +1,40 @@
+"""Seeded fixtures are the same database on any day"""
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from generate_messy_db import SEEDED_NOW, create_messy_database  # noqa: E402
+
+
+def _dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return list(conn.iterdump())
+    finally:
+        conn.close()
+
+
+def test_seed_reproduces_the_database(tmp_path):
+    first = create_messy_database(str(tmp_path / "a.db"), scale=0.2, seed=7, quiet=True)
+    second = create_messy_database(str(tmp_path / "b.db"), scale=0.2, seed=7, quiet=True)
+    assert _dump(first) == _dump(second)
+
+
+def test_seeded_dates_are_anchored_not_read_from_the_clock(tmp_path):
+    db_path = create_messy_database(str(tmp_path / "a.db"), scale=0.2, seed=7, quiet=True)
+    conn = sqlite3.connect(db_path)
+    latest = conn.execute(
+        "SELECT max(created_at) FROM (SELECT created_at FROM users UNION ALL SELECT created_at FROM orders) "
+        "WHERE created_at < '2050'"
+    ).fetchone()[0]
+    conn.close()
+    assert latest[:4] == SEEDED_NOW[:4] and latest <= SEEDED_NOW
+
+
+def test_today_moves_the_anchor(tmp_path):
+    db_path = create_messy_database(str(tmp_path / "a.db"), scale=0.2, seed=7, quiet=True, today='2019-03-01')
+    conn = sqlite3.connect(db_path)
+    years = {row[0] for row in conn.execute("SELECT DISTINCT substr(created_at, 1, 4) FROM users")}
+    conn.close()
+    assert years == {'2019', '2050'}
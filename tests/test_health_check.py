@@ -0,0 +1,42 @@
+"""Duplicate counts of the single-pass health scan must be exact"""
+import sqlite3
+
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.health_check import HealthScanner
+
+
+def _scan(path, *statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(";".join(statements))
+    conn.close()
+    with SQLiteAdapter(str(path)) as db:
+        issues = HealthScanner(db).scan()['issues']
+    return {(issue['column'], issue['rule']): issue['count'] for issue in issues}
+
+
+def test_rows_with_colliding_hashes_are_not_duplicates(tmp_path):
+    assert hash(-1) == hash(-2)
+    counts = _scan(
+        tmp_path / "shop.db",
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price INTEGER)",
+        "INSERT INTO products (name, price) VALUES ('a', -1), ('a', -2)"
+    )
+    assert (None, 'duplicate_rows') not in counts
+
+
+def test_true_duplicate_rows_are_counted(tmp_path):
+    counts = _scan(
+        tmp_path / "shop.db",
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price INTEGER)",
+        "INSERT INTO products (name, price) VALUES ('a', -1), ('a', -2), ('a', -2), ('a', -2)"
+    )
+    assert counts[(None, 'duplicate_rows')] == 2
+
+
+def test_values_with_colliding_hashes_are_not_duplicates(tmp_path):
+    counts = _scan(
+        tmp_path / "users.db",
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, email)",
+        "INSERT INTO users (email) VALUES (-1), (-2), ('x@example.com'), ('x@example.com')"
+    )
+    assert counts[('email', 'duplicate_values')] == 1
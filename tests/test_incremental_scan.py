@@ -0,0 +1,58 @@
+"""Incremental scans must not report rows as they were before an update"""
+import sqlite3
+
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.utils.fixer import FixEngine
+from src.utils.health_check import HealthScanner
+from src.utils.incremental_scan import IncrementalScanner
+
+
+def _execute(path, *statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(";".join(statements))
+    conn.close()
+
+
+def _scan(path, table='products'):
+    with SQLiteAdapter(str(path), cache_dir=str(path.parent / "cache")) as db:
+        with IncrementalScanner(db) as scanner:
+            result = scanner.scan([table])['tables'][table]
+    negatives = sum(issue['count'] for issue in result['issues'] if issue['rule'] == 'negative_values')
+    return result['mode'], negatives
+
+
+def _products(path):
+    _execute(
+        path,
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price INTEGER)",
+        "INSERT INTO products (name, price) VALUES ('a', -1), ('b', -2), ('c', 3)"
+    )
+
+
+def test_untouched_table_is_served_from_state(tmp_path):
+    db_path = tmp_path / "shop.db"
+    _products(db_path)
+    assert _scan(db_path) == ('full', 2)
+    assert _scan(db_path) == ('unchanged', 2)
+
+
+def test_updated_rows_without_new_rows_are_rescanned(tmp_path):
+    db_path = tmp_path / "shop.db"
+    _products(db_path)
+    assert _scan(db_path) == ('full', 2)
+
+    _execute(db_path, "UPDATE products SET price = 0 WHERE price < 0")
+    assert _scan(db_path) == ('full', 0)
+
+
+def test_fix_drops_the_state_of_repaired_tables(tmp_path):
+    db_path = tmp_path / "shop.db"
+    _products(db_path)
+    assert _scan(db_path) == ('full', 2)
+
+    with SQLiteAdapter(str(db_path), cache_dir=str(tmp_path / "cache")) as db:
+        engine = FixEngine(db)
+        engine.apply(engine.plan(HealthScanner(db).scan()['issues']))
+    # A new row as well: rowids alone would make this an incremental scan of that row only
+    _execute(db_path, "INSERT INTO products (name, price) VALUES ('d', 4)")
+    assert _scan(db_path) == ('full', 0)
@@ -0,0 +1,61 @@
+"""MCP tool calls: cancellation of exclusive calls, and paging of client queries"""
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from src.mcp.server import MCPServer, _ReadWriteGate
+from src.db.sqlite_adapter import SQLiteAdapter
+from src.mcp.tools import Tool, execute_query
+
+
+def test_cancelled_exclusive_call_holds_the_gate_until_it_finishes(tmp_path):
+    db_path = tmp_path / "app.db"
+    sqlite3.connect(db_path).executescript("CREATE TABLE t (x)").close()
+    started, release, finished = threading.Event(), threading.Event(), []
+
+    def slow_restore(manager, arguments):
+        started.set()
+        release.wait(5)
+        finished.append(True)
+        return {}
+
+    tool = Tool('slow_restore', "Replace the database", {'type': 'object'}, slow_restore,
+                kind='snapshot', exclusive=True)
+    server = MCPServer(str(db_path), snapshots_dir=str(tmp_path / "snapshots"), tools=[tool])
+
+    async def run():
+        server._gate = _ReadWriteGate()
+        pool = server.pool
+        task = asyncio.create_task(server.call_tool('slow_restore', {}))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        assert not task.done() and server._gate._writer  # Still replacing the file: the gate stays closed
+        task.cancel()  # A second cancel does not cut the wait short either
+        await asyncio.sleep(0.05)
+        assert not task.done()
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert finished
+        assert not server._gate._writer
+        assert server.pool is not pool
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
+
+
+@pytest.mark.parametrize('params', [[1], {'n': 1}])
+def test_query_ending_in_a_line_comment(tmp_path, params):
+    db_path = tmp_path / "app.db"
+    sqlite3.connect(db_path).executescript("CREATE TABLE t (x); INSERT INTO t VALUES (1), (2)").close()
+    placeholder = '?' if isinstance(params, list) else ':n'
+    with SQLiteAdapter(str(db_path)) as adapter:
+        result = execute_query(adapter, {'sql': f"SELECT x FROM t WHERE x > {placeholder} -- only the big ones",
+                                         'params': params})
+    assert result['rows'] == [[2]]
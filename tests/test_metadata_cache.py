@@ -0,0 +1,30 @@
+"""The metadata cache lives in a per-user directory, not wherever a command is run"""
+import sqlite3
+
+from src.db.metadata_cache import default_cache_dir
+from src.db.sqlite_adapter import SQLiteAdapter
+
+
+def _cache_schema(db_path):
+    sqlite3.connect(db_path).executescript("CREATE TABLE t (x)").close()
+    with SQLiteAdapter(str(db_path)) as db:
+        db.get_full_schema(use_cache=True)
+
+
+def test_default_cache_is_per_user(tmp_path, monkeypatch):
+    monkeypatch.delenv("DB_AGENT_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    _cache_schema(tmp_path / "m.db")
+    assert default_cache_dir() == tmp_path / "xdg" / "db-agent"
+    assert list(workdir.iterdir()) == []
+    assert [path.suffix for path in default_cache_dir().iterdir()] == ['.json']
+
+
+def test_environment_overrides_the_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_AGENT_CACHE_DIR", str(tmp_path / "cache"))
+    _cache_schema(tmp_path / "m.db")
+    assert len(list((tmp_path / "cache").iterdir())) == 1
@@ -0,0 +1,47 @@
+"""On-disk schema cache must not outlive the file it was built from"""
+import sqlite3
+
+from src.db.sqlite_adapter import SQLiteAdapter
+
+
+def _create(path, *statements):
+    conn = sqlite3.connect(path)
+    conn.executescript(";".join(statements))
+    conn.close()
+
+
+def _cached_tables(path, cache_dir):
+    with SQLiteAdapter(str(path), cache_dir=str(cache_dir)) as db:
+        return sorted(db.get_full_schema(use_cache=True))
+
+
+def test_replaced_file_with_same_schema_version_is_a_miss(tmp_path):
+    db_path, cache_dir = tmp_path / "tenant.db", tmp_path / "cache"
+    _create(db_path, "CREATE TABLE a (x)", "CREATE TABLE b (y)")
+    assert _cached_tables(db_path, cache_dir) == ['a', 'b']
+
+    # A new file at the same path: same PRAGMA schema_version, different tables
+    db_path.unlink()
+    _create(db_path, "CREATE TABLE z (x)", "CREATE TABLE y (y)")
+    assert _cached_tables(db_path, cache_dir) == ['y', 'z']
+
+
+def test_unchanged_schema_is_served_from_cache(tmp_path):
+    db_path, cache_dir = tmp_path / "db.sqlite", tmp_path / "cache"
+    _create(db_path, "CREATE TABLE a (x)")
+    _cached_tables(db_path, cache_dir)
+
+    with SQLiteAdapter(str(db_path), cache_dir=str(cache_dir)) as db:
+        db._introspect_tables = None  # Any introspection would fail
+        assert list(db.get_full_schema(use_cache=True)) == ['a']
+
+
+def test_altered_schema_is_reintrospected(tmp_path):
+    db_path, cache_dir = tmp_path / "db.sqlite", tmp_path / "cache"
+    _create(db_path, "CREATE TABLE a (x)")
+    _cached_tables(db_path, cache_dir)
+    _create(db_path, "ALTER TABLE a ADD COLUMN y")
+
+    with SQLiteAdapter(str(db_path), cache_dir=str(cache_dir)) as db:
+        columns = db.get_full_schema(use_cache=True)['a']['columns']
+    assert [column['name'] for column in columns] == ['x', 'y']
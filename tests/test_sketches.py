@@ -0,0 +1,28 @@
+"""Sketch hashes keep the full 64 bits for every kind of value"""
+import mmh3
+import numpy as np
+
+from src.utils.sketches import HyperLogLog, hash_values
+
+
+def test_text_is_not_limited_to_32_bit_hashes():
+    # Distinct strings whose 32-bit MurmurHash3 values collide
+    left, right = 'user34597@example.com', 'user65560@example.com'
+    assert mmh3.hash(left) == mmh3.hash(right)
+    assert len(set(hash_values([left, right]).tolist())) == 2
+    assert len(set(hash_values([left.encode(), right.encode()]).tolist())) == 2
+    assert len(set(hash_values([left, right.encode(), 7]).tolist())) == 3
+
+
+def test_equal_values_hash_equally_across_kinds():
+    hashes = hash_values([1, 1.0, 'a', 'a', b'a'])
+    assert hashes[0] == hashes[1] and hashes[2] == hashes[3]
+    assert len(set(hashes.tolist())) == 3
+
+
+def test_distinct_count_of_text():
+    sketch = HyperLogLog()
+    values = np.array([f"user{i}@example.com" for i in range(200_000)], dtype=object)
+    sketch.add(values)
+    sketch.add(values[:50_000])
+    assert abs(sketch.count() - 200_000) < 200_000 * 0.03
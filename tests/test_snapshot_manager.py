@@ -0,0 +1,131 @@
+"""Snapshots hold what the database holds, and restores never damage the live file"""
+import os
+import sqlite3
+
+from pathlib import Path
+
+import pytest
+
+from src.db.compression import decompress_file
+from src.db.snapshot_manager import SnapshotManager
+
+
+def _wal_database(path, rows=1000):
+    """WAL database whose committed rows are all still in the -wal file; returns the open connection"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", ((i,) for i in range(rows)))
+    conn.commit()
+    return conn
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _stored_count(manager, metadata, tmp_path):
+    """Rows of t in the snapshot's stored content"""
+    snapshot_path = Path(metadata['snapshot_path'])
+    if metadata['storage'] == 'file':
+        return _count(snapshot_path)
+    content = tmp_path / "content.db"
+    if metadata['storage'] == 'chunked':
+        manager.chunk_store.restore_file(snapshot_path, content)
+    else:
+        decompress_file(snapshot_path, content, metadata['compression'], metadata['checksum'])
+    return _count(content)
+
+
+@pytest.mark.parametrize('storage', ['file', 'chunked', 'compressed'])
+@pytest.mark.parametrize('method', ['backup', 'copy'])
+def test_snapshot_includes_committed_wal_frames(tmp_path, storage, method):
+    db_path = tmp_path / "live.db"
+    conn = _wal_database(db_path)
+    try:
+        manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"), storage=storage)
+        snapshot_id = manager.create_snapshot("wal", method=method)
+    finally:
+        conn.close()
+    metadata = manager.get_snapshot(snapshot_id)
+    assert metadata['table_row_counts'] == {'t': 1000}
+    assert _stored_count(manager, metadata, tmp_path) == 1000
+
+
+def test_backup_is_the_default_method(tmp_path):
+    db_path = tmp_path / "live.db"
+    conn = _wal_database(db_path)
+    try:
+        manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"))
+        metadata = manager.get_snapshot(manager.create_snapshot("default"))
+    finally:
+        conn.close()
+    assert metadata['method'] == 'backup'
+    assert _count(metadata['snapshot_path']) == 1000
+
+
+@pytest.mark.parametrize('storage', ['file', 'chunked', 'compressed'])
+def test_restore_brings_back_the_snapshot(tmp_path, storage):
+    db_path = tmp_path / "live.db"
+    _wal_database(db_path).close()
+    manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"), storage=storage)
+    snapshot_id = manager.create_snapshot("before delete")
+    sqlite3.connect(db_path).executescript("DELETE FROM t").close()
+
+    manager.restore_snapshot(snapshot_id)
+    assert _count(db_path) == 1000
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('.')] == []
+
+
+def test_restore_with_another_connection_open(tmp_path):
+    db_path = tmp_path / "live.db"
+    conn = _wal_database(db_path, rows=10)
+    try:
+        manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"))
+        snapshot_id = manager.create_snapshot("ten rows")
+        conn.executemany("INSERT INTO t VALUES (?)", ((i,) for i in range(5)))
+        conn.commit()
+        manager.restore_snapshot(snapshot_id)
+    finally:
+        conn.close()
+    assert _count(db_path) == 10
+
+
+def test_count_mismatch_leaves_the_live_database_untouched(tmp_path, monkeypatch):
+    db_path = tmp_path / "live.db"
+    conn = _wal_database(db_path)
+    try:
+        manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"))
+        snapshot_id = manager.create_snapshot("empty")
+        get = manager.catalog.get
+        monkeypatch.setattr(manager.catalog, 'get', lambda id: {**get(id), 'table_row_counts': {'t': 5}})
+
+        with pytest.raises(ValueError, match="row counts"):
+            manager.restore_snapshot(snapshot_id, snapshot_current=False)
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1000
+    finally:
+        conn.close()
+    assert _count(db_path) == 1000
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('.')] == []
+
+
+def test_corrupted_copy_is_never_moved_over_the_database(tmp_path):
+    db_path = tmp_path / "live.db"
+    _wal_database(db_path).close()
+    manager = SnapshotManager(str(db_path), str(tmp_path / "snapshots"))
+    metadata = manager.get_snapshot(manager.create_snapshot("good"))
+
+    # Same size and times as the original: the cached digest still matches, the staged copy does not
+    snapshot_path = Path(metadata['snapshot_path'])
+    stat = snapshot_path.stat()
+    snapshot_path.write_bytes(bytes(stat.st_size))
+    os.utime(snapshot_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        manager.restore_snapshot(metadata['id'], snapshot_current=False)
+    assert _count(db_path) == 1000
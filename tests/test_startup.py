@@ -0,0 +1,27 @@
+"""CLI startup stays within the limits of benchmarks/startup.py"""
+import os
+
+import pytest
+
+from benchmarks.startup import check
+
+# Wall-clock budgets flake on loaded machines, so they only run on request:
+# DB_AGENT_STARTUP_BUDGET=1 pytest -m startup_budget
+BUDGET = os.environ.get("DB_AGENT_STARTUP_BUDGET", "") not in ("", "0")
+# Slower machines can allow more, like the script's --slack
+SLACK = float(os.environ.get("DB_AGENT_STARTUP_SLACK", "1.0"))
+
+
+@pytest.mark.parametrize('command', ['info', 'schema'])
+def test_metadata_command_skips_heavy_imports(command):
+    [result] = check([command], repeat=1, slack=SLACK)
+    assert not result['heavy'], f"{command} imports {', '.join(result['heavy'])}"
+
+
+@pytest.mark.startup_budget
+@pytest.mark.skipif(not BUDGET, reason="set DB_AGENT_STARTUP_BUDGET=1 to check import time")
+@pytest.mark.parametrize('command', ['info', 'schema'])
+def test_metadata_command_starts_within_budget(command):
+    [result] = check([command], repeat=3, slack=SLACK)
+    assert result['ms'] <= result['budget_ms'], \
+        f"{command} imports in {result['ms']} ms, over its {result['budget_ms']} ms budget"